@@ -0,0 +1,263 @@
+"""Streaming tyre alert engine.
+
+Turns `get_tires_info_by_vehicle` results into alert events for low
+pressure, over-temperature and rapid pressure loss per wheel position.
+
+Readings are processed in batches: each batch is converted to columns once
+and every rule is evaluated over a whole column at a time. Rate-of-change
+rules keep a rolling window per wheel position, and every rule has
+hysteresis (a separate clear level) and debouncing (a number of consecutive
+readings needed to raise or clear), so noisy sensors do not flap.
+
+Example:
+    ```python
+    engine = AlertEngine(default_rules())
+    for vehicle_id in vehicle_ids:
+        tires_info = api.get_tires_info_by_vehicle(vehicle_id)
+        readings.extend(readings_from_tires_info(vehicle_id, tires_info))
+    for event in engine.process(readings):
+        notify(event)
+    ```
+"""
+
+import math
+import time
+from array import array
+from collections import deque, namedtuple
+
+# Reading field -> field name in the tyre data returned by the API.
+FIELDS = {
+    "axleIndex": "axleIndex",
+    "wheelIndex": "wheelIndex",
+    "sensorCode": "sensorCode",
+    "tyreCode": "tyreCode",
+    "pressure": "pressure",
+    "temperature": "temperature",
+}
+
+AlertEvent = namedtuple(
+    "AlertEvent", ["rule", "key", "state", "value", "timestamp", "reading"]
+)
+AlertEvent.__doc__ = """An alert raised or cleared for one wheel position.
+
+`key` is `(vehicleId, axleIndex, wheelIndex)`, `state` is "raised" or
+"cleared" and `value` is the measurement (or rate) that triggered it."""
+
+RAISED = "raised"
+CLEARED = "cleared"
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def readings_from_tires_info(vehicle_id, tires_info, timestamp=None, fields=FIELDS):
+    """
+    Flattens a `get_tires_info_by_vehicle` result into one reading per tyre.
+
+    Args:
+        vehicle_id: The vehicle the data belongs to.
+        tires_info (list | dict): The API result: a list of tyres, or a dict
+            holding that list under `tyreList`, `tyres` or `records`.
+        timestamp (float): Reading time in seconds. Defaults to now.
+        fields (dict): Mapping of reading fields to API field names.
+
+    Returns:
+        A list of reading dicts with `vehicleId`, `timestamp` and the `fields` keys.
+    """
+    if not tires_info:
+        return []
+    if isinstance(tires_info, dict):
+        for key in ("tyreList", "tyres", "records"):
+            if isinstance(tires_info.get(key), list):
+                tires_info = tires_info[key]
+                break
+        else:
+            tires_info = [tires_info]
+
+    timestamp = time.time() if timestamp is None else timestamp
+    readings = []
+    for tyre in tires_info:
+        reading = {name: tyre.get(source) for name, source in fields.items()}
+        reading["vehicleId"] = vehicle_id
+        reading["timestamp"] = timestamp
+        readings.append(reading)
+    return readings
+
+
+class ThresholdRule:
+    """
+    Raises while a field is beyond a limit, e.g. pressure below 7 bar.
+
+    With `below`, the alert is raised when the value drops under it and
+    cleared once it is back at `clear` or more; with `above`, the other way
+    round. `clear` defaults to the limit itself.
+    """
+
+    def __init__(self, name, field, below=None, above=None, clear=None, debounce=1):
+        if (below is None) == (above is None):
+            raise ValueError("Exactly one of below and above must be given")
+        self.name = name
+        self.field = field
+        self.below = below
+        self.above = above
+        self.clear = clear if clear is not None else (below if below is not None else above)
+        self.debounce = debounce
+
+    def evaluate(self, columns, keys):
+        """Returns the value, breach and clear columns for a batch."""
+        values = columns[self.field]
+        if self.below is not None:
+            limit, clear = self.below, self.clear
+            breach = [value < limit for value in values]
+            cleared = [value >= clear for value in values]
+        else:
+            limit, clear = self.above, self.clear
+            breach = [value > limit for value in values]
+            cleared = [value <= clear for value in values]
+        return values, breach, cleared
+
+
+class RateOfChangeRule:
+    """
+    Raises when a field falls faster than `max_drop` units per minute over a
+    rolling `window` of seconds, e.g. a pressure loss of 0.3 bar/min.
+    """
+
+    def __init__(self, name, field, max_drop, window=300, clear_drop=None, debounce=1):
+        self.name = name
+        self.field = field
+        self.max_drop = max_drop
+        self.window = window
+        self.clear_drop = clear_drop if clear_drop is not None else max_drop
+        self.debounce = debounce
+        self._history = {}
+
+    def evaluate(self, columns, keys):
+        """Updates the rolling windows and returns the rate, breach and clear columns."""
+        values = columns[self.field]
+        timestamps = columns["timestamp"]
+        rates = array("d")
+        for key, value, timestamp in zip(keys, values, timestamps):
+            history = self._history.get(key)
+            if history is None:
+                history = self._history[key] = deque()
+            if value == value:  # skip NaN
+                history.append((timestamp, value))
+            while history and history[0][0] < timestamp - self.window:
+                history.popleft()
+            if len(history) < 2 or history[-1][0] <= history[0][0]:
+                rates.append(math.nan)
+                continue
+            (first_time, first), (last_time, last) = history[0], history[-1]
+            rates.append((last - first) / (last_time - first_time) * 60)
+
+        breach = [rate < -self.max_drop for rate in rates]
+        cleared = [rate >= -self.clear_drop for rate in rates]
+        return rates, breach, cleared
+
+    def forget(self, key):
+        """Drops the rolling window of a wheel position."""
+        self._history.pop(key, None)
+
+
+def default_rules(
+    low_pressure=7.0,
+    high_temperature=80.0,
+    pressure_drop=0.3,
+):
+    """Low pressure, over-temperature and rapid pressure loss rules with
+    small hysteresis bands and two-reading debouncing."""
+    return [
+        ThresholdRule("low_pressure", "pressure", below=low_pressure,
+                      clear=low_pressure + 0.2, debounce=2),
+        ThresholdRule("high_temperature", "temperature", above=high_temperature,
+                      clear=high_temperature - 5, debounce=2),
+        RateOfChangeRule("pressure_loss", "pressure", max_drop=pressure_drop,
+                         clear_drop=pressure_drop / 2, debounce=2),
+    ]
+
+
+class AlertEngine:
+    """
+    Evaluates rules over batches of readings and emits state changes.
+    """
+
+    def __init__(self, rules, on_event=None):
+        """
+        Initializes the engine.
+
+        Args:
+            rules (list): `ThresholdRule` and `RateOfChangeRule` instances.
+            on_event (callable): Optional callback receiving every `AlertEvent`.
+        """
+        self.rules = list(rules)
+        self.on_event = on_event
+        # (rule name, key) -> [active, consecutive breaches, consecutive clears]
+        self._state = {}
+
+    def active(self):
+        """Returns the `(rule name, key)` pairs currently alerting."""
+        return [pair for pair, state in self._state.items() if state[0]]
+
+    def process(self, readings):
+        """
+        Evaluates a batch of readings.
+
+        Args:
+            readings (list): Reading dicts as built by `readings_from_tires_info`,
+                in time order per wheel position.
+
+        Returns:
+            The `AlertEvent`s raised or cleared by this batch.
+        """
+        if not readings:
+            return []
+        keys = [
+            (reading.get("vehicleId"), reading.get("axleIndex"), reading.get("wheelIndex"))
+            for reading in readings
+        ]
+        fields = {rule.field for rule in self.rules}
+        columns = {
+            field: array("d", (_number(reading.get(field)) for reading in readings))
+            for field in fields
+        }
+        columns["timestamp"] = array("d", (_number(r.get("timestamp")) for r in readings))
+
+        events = []
+        for rule in self.rules:
+            values, breach, cleared = rule.evaluate(columns, keys)
+            for index, key in enumerate(keys):
+                # Readings that neither breach nor clear (hysteresis band or
+                # missing values) leave the state untouched.
+                if not breach[index] and not cleared[index]:
+                    continue
+                state = self._state.get((rule.name, key))
+                if state is None:
+                    state = self._state[(rule.name, key)] = [False, 0, 0]
+                if breach[index]:
+                    state[1] += 1
+                    state[2] = 0
+                    if not state[0] and state[1] >= rule.debounce:
+                        state[0] = True
+                        events.append(self._event(rule, key, RAISED, values[index],
+                                                  readings[index]))
+                else:
+                    state[2] += 1
+                    state[1] = 0
+                    if state[0] and state[2] >= rule.debounce:
+                        state[0] = False
+                        events.append(self._event(rule, key, CLEARED, values[index],
+                                                  readings[index]))
+
+        if self.on_event is not None:
+            for event in events:
+                self.on_event(event)
+        return events
+
+    @staticmethod
+    def _event(rule, key, state, value, reading):
+        return AlertEvent(rule.name, key, state, value, reading.get("timestamp"), reading)
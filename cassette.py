@@ -0,0 +1,272 @@
+"""Record/replay HTTP cassettes for the SmartTyre API client.
+
+A `Cassette` is a transport for `SmartTyreAPI` (see the `transport` module).
+In record mode it forwards every call to a real transport and captures the
+request/response pairs; in replay mode it answers from the captured pairs
+without touching the network, so tests and benchmarks run offline.
+
+Example:
+    ```python
+    with Cassette("cassettes/vehicles.json.gz", mode="once") as cassette:
+        api = SmartTyreAPI(base_url, client_id, client_secret, sign_key,
+                           transport=cassette)
+        api.get_vehicle_list()
+    ```
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from urllib.parse import urlsplit
+
+from transport import Response
+
+# Headers that change on every request and must not take part in matching.
+VOLATILE_HEADERS = ("timestamp", "nonce", "sign", "accessToken")
+
+# Header and body fields whose values are replaced before being written.
+SECRET_FIELDS = ("clientId", "clientSecret", "accessToken", "refreshToken")
+
+SCRUBBED = "<scrubbed>"
+
+MODES = ("record", "replay", "once")
+
+
+class CassetteError(Exception):
+    """Raised when a request cannot be answered from the cassette."""
+
+
+def _scrub(value, secret_fields):
+    if isinstance(value, dict):
+        return {
+            key: SCRUBBED if key in secret_fields else _scrub(item, secret_fields)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_scrub(item, secret_fields) for item in value]
+    return value
+
+
+def _scrub_text(text, secret_fields):
+    """Scrub a JSON document, leaving non-JSON text untouched."""
+    if not text:
+        return text or ""
+    try:
+        document = json.loads(text)
+    except ValueError:
+        return text
+    return json.dumps(
+        _scrub(document, secret_fields),
+        separators=(",", ":"),
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+
+
+class Cassette:
+    """
+    Records and replays the HTTP traffic of a `SmartTyreAPI` instance.
+
+    Requests are matched on method, path, query parameters, body and the
+    non-volatile headers. Secrets are scrubbed from both the stored entries
+    and the incoming requests, so a cassette recorded with one set of
+    credentials replays with any other.
+    """
+
+    def __init__(
+        self,
+        path,
+        mode="once",
+        transport=None,
+        speed=0.0,
+        ignore_headers=VOLATILE_HEADERS,
+        secret_fields=SECRET_FIELDS,
+    ):
+        """
+        Initializes the cassette.
+
+        Args:
+            path (str): File the cassette is read from and saved to.
+                A `.gz` suffix stores it gzip-compressed.
+            mode (str): "record" always hits the network and overwrites the
+                cassette, "replay" never hits the network and "once" replays
+                when the file exists and records otherwise.
+            transport: Transport (see the `transport` module) used while
+                recording. Defaults to the `requests` module.
+            speed (float): Replay speed relative to the recorded latency.
+                1.0 replays in real time, 2.0 twice as fast and 0 instantly.
+            ignore_headers (tuple): Header names left out of request matching.
+            secret_fields (tuple): Header and JSON body fields to scrub.
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+
+        self.path = path
+        self.speed = speed
+        self.ignore_headers = frozenset(ignore_headers)
+        self.secret_fields = frozenset(secret_fields)
+        self.entries = []
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._queues = defaultdict(deque)
+        self._last = {}
+
+        if mode == "once":
+            mode = "replay" if os.path.exists(path) else "record"
+        self.mode = mode
+
+        if mode == "replay":
+            self.load()
+        elif transport is None:
+            import requests  # pylint: disable=import-outside-toplevel
+
+            transport = requests
+        self.transport = transport
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None and self.complete:
+            self.save()
+
+    @property
+    def recording(self):
+        """Whether the cassette is forwarding requests to the network."""
+        return self.mode == "record"
+
+    @property
+    def complete(self):
+        """Whether a recording captured requests and none of them raised,
+        so saving it will not leave a partial cassette behind."""
+        return self.recording and bool(self.entries) and not self.failures
+
+    # Persistence
+
+    def load(self):
+        """Loads the recorded entries from `path`."""
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "rt", encoding="utf-8") as file:
+            self.entries = json.load(file)["entries"]
+
+        self._queues.clear()
+        self._last.clear()
+        for entry in self.entries:
+            self._queues[self._entry_key(entry)].append(entry)
+
+    def save(self):
+        """Writes the recorded entries to `path` in compact JSON."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        opener = gzip.open if self.path.endswith(".gz") else open
+        with opener(self.path, "wt", encoding="utf-8") as file:
+            json.dump(
+                {"version": 1, "entries": self.entries},
+                file,
+                separators=(",", ":"),
+                ensure_ascii=False,
+            )
+
+    # requests-compatible interface
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        """Records or replays a GET request."""
+        return self._request("GET", url, headers, params, None, timeout)
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        """Records or replays a POST request."""
+        return self._request("POST", url, headers, None, data, timeout)
+
+    # Internals
+
+    def _normalize(self, method, url, headers, params, body):
+        headers = {
+            key: SCRUBBED if key in self.secret_fields else value
+            for key, value in (headers or {}).items()
+            if key not in self.ignore_headers
+        }
+        params = {
+            key: sorted(str(item) for item in (value if isinstance(value, list) else [value]))
+            for key, value in (params or {}).items()
+        }
+        return {
+            "method": method,
+            "path": urlsplit(url).path,
+            "params": params,
+            "headers": headers,
+            "body": _scrub_text(body, self.secret_fields),
+        }
+
+    @staticmethod
+    def _entry_key(entry):
+        request = entry["request"]
+        return json.dumps(
+            [
+                request["method"],
+                request["path"],
+                request["params"],
+                request["headers"],
+                request["body"],
+            ],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+
+    def _request(self, method, url, headers, params, body, timeout):
+        request = self._normalize(method, url, headers, params, body)
+        if self.recording:
+            return self._record(request, method, url, headers, params, body, timeout)
+        return self._replay(request)
+
+    def _record(self, request, method, url, headers, params, body, timeout):
+        started = time.perf_counter()
+        try:
+            if method == "GET":
+                response = self.transport.get(url, headers=headers, params=params, timeout=timeout)
+            else:
+                response = self.transport.post(url, headers=headers, data=body, timeout=timeout)
+        except Exception:
+            with self._lock:
+                self.failures += 1
+            raise
+        elapsed = time.perf_counter() - started
+
+        entry = {
+            "request": request,
+            "response": {
+                "status": response.status_code,
+                "body": _scrub_text(response.text, self.secret_fields),
+            },
+            "elapsed": round(elapsed, 4),
+        }
+        with self._lock:
+            self.entries.append(entry)
+        return response
+
+    def _replay(self, request):
+        key = self._entry_key({"request": request})
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._last[key] = entry
+            else:
+                # Once every recording of a request has been played, keep
+                # answering with the last one so benchmarks can loop.
+                entry = self._last.get(key)
+        if entry is None:
+            raise CassetteError(
+                f"No recorded response for {request['method']} {request['path']} "
+                f"in {self.path}"
+            )
+
+        if self.speed > 0:
+            time.sleep(entry.get("elapsed", 0) / self.speed)
+
+        response = entry["response"]
+        return Response(response["status"], response["body"])
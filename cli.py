@@ -0,0 +1,469 @@
+"""SmartTyre command line interface
+Non-interactive, scriptable access to the SmartTyre API.
+
+Every command writes its results as NDJSON (one JSON document per line) to
+stdout or to the file given with `--output`; a `.gz` or `.zst` suffix
+compresses it. Files are written atomically when the command finishes.
+
+Examples:
+    ```
+    python cli.py tires list --all
+    python cli.py vehicles get 7543
+    python cli.py tires bind 7543 ABC123 1 2
+    python cli.py import tires suppliers.csv --workers 8 --checkpoint tires.ckpt
+    python cli.py run manifest.ndjson --workers 16 --output results.ndjson.gz
+    python cli.py --daemon vehicles get 7543
+    ```
+
+With `--daemon` the operations are sent to a running `daemon.py` process,
+falling back to a direct client when no daemon is listening.
+
+A manifest holds one operation per line (or a JSON array of them):
+    ```
+    {"id": "v1", "op": "vehicles.get", "args": {"vehicle_id": 7543}}
+    {"op": "tires.list", "args": {"all": true}}
+    ```
+
+Tyre, sensor and TBox imports stream the CSV through `importer.Importer`:
+rows are validated, codes that already exist are skipped and, with
+`--checkpoint`, an interrupted import resumes where it stopped.
+
+With `--deadline SECONDS` the whole command shares one time budget; once it
+is spent, outstanding operations fail with "The deadline budget is spent".
+
+Exit codes: 0 when every operation succeeded, 1 when at least one failed or
+a deadline cut a list walk short, 2 on usage errors, 3 when credentials are
+missing and 130 on interrupt.
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager, nullcontext
+
+from deadline import Deadline
+from importer import RESOURCES, Importer, read_csv_rows
+from persistence import atomic_writer
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_CONFIG = 3
+EXIT_INTERRUPTED = 130
+
+DEFAULT_BASE_URL = "https://www.dajintruck.com"
+
+# Operation name -> (SmartTyreAPI method, positional argument names).
+# Arguments ending in "_info" are JSON payloads.
+OPERATIONS = {
+    "token": ("get_access_token", []),
+    "vehicles.list": ("get_vehicle_list", []),
+    "vehicles.get": ("get_vehicle_info", ["vehicle_id"]),
+    "vehicles.tires": ("get_tires_info_by_vehicle", ["vehicle_id"]),
+    "vehicles.add": ("add_vehicle", ["vehicle_info"]),
+    "vehicles.update": ("update_vehicle", ["vehicle_info"]),
+    "tires.list": ("get_tire_list", []),
+    "tires.get": ("get_tire_info", ["tire_id"]),
+    "tires.add": ("add_tire", ["tire_info"]),
+    "tires.update": ("update_tire", ["tire_info"]),
+    "tires.bind": (
+        "bind_tire_to_vehicle",
+        ["vehicle_id", "tire_code", "axle_index", "wheel_index"],
+    ),
+    "tires.unbind": ("unbind_tire_from_vehicle", ["vehicle_id", "tire_id"]),
+    "sensors.list": ("get_sensor_list", []),
+    "sensors.get": ("get_sensor_info", ["sensor_id"]),
+    "sensors.add": ("add_sensor", ["sensor_info"]),
+    "sensors.update": ("update_sensor", ["sensor_info"]),
+    "sensors.bind": (
+        "bind_sensor_to_tire",
+        ["tire_code", "vehicle_id", "axle_index", "wheel_index", "sensor_code"],
+    ),
+    "sensors.unbind": (
+        "unbind_sensor_from_tire",
+        ["tire_code", "vehicle_id", "axle_index", "wheel_index", "sensor_code"],
+    ),
+    "tboxes.list": ("get_tboxes_list", []),
+    "tboxes.get": ("get_tbox_info", ["tbox_id"]),
+    "tboxes.add": ("add_tbox", ["tbox_info"]),
+    "tboxes.update": ("update_tbox", ["tbox_info"]),
+    "reference.brands": ("get_tire_brands", []),
+    "reference.sizes": ("get_tire_sizes", []),
+    "reference.models": ("get_vehicle_models", []),
+    "reference.axles": ("get_axle_types", []),
+}
+
+# Resource -> insert operation used by the `import` command.
+IMPORTS = {
+    "vehicles": "vehicles.add",
+    "tires": "tires.add",
+    "sensors": "sensors.add",
+    "tboxes": "tboxes.add",
+}
+
+
+@contextmanager
+def open_output(path):
+    """Open the NDJSON destination: stdout for "-", otherwise an atomic,
+    optionally compressed file."""
+    if not path or path == "-":
+        yield sys.stdout
+        return
+    with atomic_writer(path) as output:
+        yield output
+
+
+def write_line(output, document):
+    """Write one NDJSON line; stdout is flushed so consumers see it immediately."""
+    output.write(json.dumps(document, separators=(",", ":"), ensure_ascii=False))
+    output.write("\n")
+    if output is sys.stdout:
+        output.flush()
+
+
+def load_manifest(path):
+    """
+    Read a manifest given as a JSON array or as NDJSON.
+
+    NDJSON manifests are streamed line by line, so large jobs are never held
+    in memory; a JSON array has to be parsed at once.
+
+    Raises:
+        OSError: If the file cannot be opened, before anything is read.
+        ValueError: While iterating, for a line that is not valid JSON.
+    """
+    file = open(path, encoding="utf-8")  # pylint: disable=consider-using-with
+    first = file.read(1)
+    while first.isspace():
+        first = file.read(1)
+    if first == "[":
+        with file:
+            return json.loads(first + file.read())
+    return _manifest_lines(file, first)
+
+
+def _manifest_lines(file, first):
+    with file:
+        for number, line in enumerate(file, start=1):
+            if number == 1:
+                line = first + line
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise ValueError(f"manifest line {number}: {error}") from error
+
+
+def execute(api, op, args):
+    """
+    Run a single operation against the API.
+
+    Args:
+        api (SmartTyreAPI): The client to use.
+        op (str): The operation name, a key of `OPERATIONS`.
+        args (dict): The method arguments. List operations also accept
+            `all` (walk every page), `page`, `page_size` and `params`.
+
+    Returns:
+        A list of records for `all` list operations, otherwise the method result.
+    """
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown operation {op!r}")
+    method_name, arg_names = OPERATIONS[op]
+    method = getattr(api, method_name)
+    args = dict(args or {})
+
+    if op.endswith(".list"):
+        params = {key: [str(value)] for key, value in (args.get("params") or {}).items()}
+        if args.get("all"):
+            return list(
+                api.iter_records(method, params, page_size=int(args.get("page_size", 100)))
+            )
+        if args.get("page"):
+            params["page"] = [str(args["page"])]
+            params["pageSize"] = [str(args.get("page_size", 10))]
+        return method(params=params or None)
+
+    return method(**{name: args[name] for name in arg_names})
+
+
+def run_operations(api, operations, output, workers=4, executor=execute, backlog=4):
+    """
+    Execute operations concurrently and stream one NDJSON result per
+    operation as soon as it completes.
+
+    Args:
+        operations (iterable): The operations, consumed lazily.
+        executor (callable): Called as `executor(api, op, args)` for every
+            operation. Defaults to `execute`.
+        backlog (int): Operations queued per worker; at most
+            `workers * backlog` are in memory at once.
+
+    Returns:
+        The number of operations that failed.
+    """
+    failures = 0
+    pending = {}
+
+    def report(done):
+        nonlocal failures
+        for future in done:
+            index, item = pending.pop(future)
+            line = {"id": item.get("id", index), "op": item.get("op")}
+            try:
+                result = future.result()
+            except Exception as error:  # pylint: disable=broad-except
+                line.update(ok=False, error=str(error))
+            else:
+                line.update(ok=result is not None, result=result)
+            failures += not line["ok"]
+            write_line(output, line)
+
+    workers = max(1, workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for index, item in enumerate(operations):
+            if len(pending) >= workers * backlog:
+                report(wait(pending, return_when=FIRST_COMPLETED)[0])
+            future = pool.submit(
+                contextvars.copy_context().run, executor, api, item.get("op"), item.get("args")
+            )
+            pending[future] = (index, item)
+        report(as_completed(list(pending)))
+    return failures
+
+
+def _parse_value(name, value):
+    if name.endswith("_info"):
+        if value.startswith("@"):
+            with open(value[1:], encoding="utf-8") as file:
+                return json.load(file)
+        return json.loads(value)
+    return value
+
+
+def build_parser():
+    """Build the argument parser with one subcommand per resource and action."""
+    parser = argparse.ArgumentParser(prog="smarttyre", description="SmartTyre API client")
+    parser.add_argument("--base-url", default=os.getenv("SMARTTYRE_BASE_URL", DEFAULT_BASE_URL))
+    parser.add_argument("--output", "-o", default="-", help="NDJSON destination, '-' for stdout")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent operations")
+    parser.add_argument("--daemon", action="store_true", help="Use a running daemon when available")
+    parser.add_argument(
+        "--deadline", type=float, metavar="SECONDS",
+        help="Time budget for the whole command; unfinished operations fail",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    resources = {}
+    for op, (_, arg_names) in OPERATIONS.items():
+        resource, _, action = op.partition(".")
+        if not action:
+            commands.add_parser(resource, help=f"Run the {resource} operation")
+            continue
+        if resource not in resources:
+            resources[resource] = commands.add_parser(resource).add_subparsers(
+                dest="action", required=True
+            )
+        action_parser = resources[resource].add_parser(action)
+        for name in arg_names:
+            help_text = "JSON payload or @file" if name.endswith("_info") else None
+            action_parser.add_argument(name, help=help_text)
+        if action == "list":
+            action_parser.add_argument("--all", action="store_true", help="Walk every page")
+            action_parser.add_argument("--page", type=int)
+            action_parser.add_argument("--page-size", type=int, default=100)
+            action_parser.add_argument(
+                "--param", action="append", default=[], metavar="KEY=VALUE"
+            )
+
+    import_parser = commands.add_parser("import", help="Insert every row of a CSV file")
+    import_parser.add_argument("resource", choices=sorted(IMPORTS))
+    import_parser.add_argument("file")
+    import_parser.add_argument(
+        "--checkpoint", help="Progress file; an interrupted import resumes from it"
+    )
+    import_parser.add_argument("--batch-size", type=int, default=500)
+    import_parser.add_argument(
+        "--no-dedupe", action="store_true", help="Do not skip codes that already exist"
+    )
+
+    run_parser = commands.add_parser("run", help="Execute a manifest of operations")
+    run_parser.add_argument("manifest")
+    return parser
+
+
+def _operations_from_args(args):
+    if args.command == "run":
+        return load_manifest(args.manifest)
+    if _streams_import(args):
+        return []
+    if args.command == "import":
+        op = IMPORTS[args.resource]
+        info_name = OPERATIONS[op][1][0]
+        return (
+            {"id": line, "op": op, "args": {info_name: row}}
+            for line, row in enumerate(read_csv_rows(args.file), start=2)
+        )
+    if args.command == "token":
+        return [{"op": "token"}]
+
+    op = f"{args.command}.{args.action}"
+    if args.action == "list":
+        return [
+            {
+                "op": op,
+                "args": {
+                    "all": args.all,
+                    "page": args.page,
+                    "page_size": args.page_size,
+                    "params": dict(item.split("=", 1) for item in args.param),
+                },
+            }
+        ]
+    return [
+        {
+            "op": op,
+            "args": {name: _parse_value(name, getattr(args, name)) for name in OPERATIONS[op][1]},
+        }
+    ]
+
+
+def _streams_import(args):
+    return args.command == "import" and args.resource in RESOURCES
+
+
+def run_import(api, args, output):
+    """
+    Stream a CSV import through `importer.Importer`, writing one NDJSON line
+    per row.
+
+    Returns:
+        The number of rows that were invalid or failed.
+    """
+    op = IMPORTS[args.resource]
+    failures = 0
+
+    def report(line, row, status, error):
+        nonlocal failures
+        ok = status in ("inserted", "duplicate")
+        failures += not ok
+        write_line(output, {"id": line, "op": op, "ok": ok, "status": status, "error": error})
+
+    importer = Importer(
+        api,
+        args.resource,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        dedupe=not args.no_dedupe,
+        checkpoint=args.checkpoint,
+    )
+    try:
+        importer.run(args.file, on_result=report)
+    except Exception as error:  # pylint: disable=broad-except
+        # E.g. the dedupe walk could not reach the service.
+        failures += 1
+        write_line(output, {"op": op, "ok": False, "error": str(error)})
+    return failures
+
+
+def new_api(base_url, transport=None):
+    """Build a client from the CLIENT_ID, CLIENT_SECRET and SIGN_KEY settings.
+    When SMARTTYRE_TOKEN_DIR is set, access tokens are shared through it, and
+    SMARTTYRE_TRANSPORT picks the default transport ("requests" or "urllib3")."""
+    # pylint: disable=import-outside-toplevel
+    from dotenv import load_dotenv
+
+    from smarttyre_api import SmartTyreAPI
+
+    load_dotenv()
+    credentials = [os.getenv(name) for name in ("CLIENT_ID", "CLIENT_SECRET", "SIGN_KEY")]
+    if not all(credentials):
+        return None
+    client_id, client_secret, sign_key = credentials
+
+    token_store = None
+    if os.getenv("SMARTTYRE_TOKEN_DIR"):
+        from token_store import FileTokenStore
+
+        token_store = FileTokenStore(os.getenv("SMARTTYRE_TOKEN_DIR"))
+    return SmartTyreAPI(
+        base_url,
+        client_id,
+        client_secret,
+        sign_key,
+        token_store=token_store,
+        transport=transport or os.getenv("SMARTTYRE_TRANSPORT"),
+    )
+
+
+def main(argv=None, api=None):
+    """Entry point. Returns the process exit code."""
+    args = build_parser().parse_args(argv)
+    try:
+        operations = _operations_from_args(args)
+    except (OSError, ValueError) as error:
+        print(f"smarttyre: {error}", file=sys.stderr)
+        return EXIT_USAGE
+
+    executor = execute
+    if api is None and args.daemon and not _streams_import(args):
+        # pylint: disable=import-outside-toplevel
+        from daemon_client import DaemonClient
+
+        client = DaemonClient()
+        if client.ping():
+            api = client
+
+            def executor(daemon, op, op_args):
+                return daemon.execute(op, op_args)
+
+    api = api or new_api(args.base_url)
+    if api is None:
+        print("smarttyre: CLIENT_ID, CLIENT_SECRET and SIGN_KEY must be set", file=sys.stderr)
+        return EXIT_CONFIG
+
+    try:
+        budget = Deadline(args.deadline) if args.deadline else nullcontext()
+        with open_output(args.output) as output, budget as deadline:
+            if _streams_import(args):
+                failures = run_import(api, args, output)
+                return EXIT_FAILED if failures else EXIT_OK
+            operation = operations[0] if args.command not in ("run", "import") else None
+            if operation and operation["op"].endswith(".list") and operation["args"]["all"]:
+                # Stream the records of a full list walk one per line.
+                try:
+                    if executor is execute:
+                        method = getattr(api, OPERATIONS[operation["op"]][0])
+                        params = {
+                            key: [value] for key, value in operation["args"]["params"].items()
+                        }
+                        records = api.iter_records(
+                            method, params, page_size=operation["args"]["page_size"]
+                        )
+                    else:
+                        records = executor(api, operation["op"], operation["args"]) or []
+                    for record in records:
+                        write_line(output, record)
+                except Exception as error:  # pylint: disable=broad-except
+                    write_line(output, {"op": operation["op"], "ok": False, "error": str(error)})
+                    return EXIT_FAILED
+                return EXIT_FAILED if deadline and deadline.skipped else EXIT_OK
+            failures = run_operations(
+                api, operations, output, workers=args.workers, executor=executor
+            )
+    except ValueError as error:
+        # A malformed manifest line, found while streaming it.
+        print(f"smarttyre: {error}", file=sys.stderr)
+        return EXIT_USAGE
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+    return EXIT_FAILED if failures else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
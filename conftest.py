@@ -0,0 +1,57 @@
+"""Shared test fakes: SmartTyre clients talking to an in-process service."""
+
+import pytest
+
+from smarttyre_api import SmartTyreAPI
+from transport import FakeTransport
+
+BASE_URL = "https://example.test"
+
+
+def authorizing(handler, token="token"):
+    """Wraps a fake service handler so that authorize calls are granted `token`."""
+
+    def wrapper(method, path, params, body):
+        if path.endswith("/auth/oauth20/authorize"):
+            return 200, {"data": {"accessToken": token, "expiresIn": 7200}}
+        return handler(method, path, params, body)
+
+    return wrapper
+
+
+@pytest.fixture(name="fake_transport")
+def fixture_fake_transport():
+    """
+    Factory for fake transports: `fake_transport(handler)` answers authorize
+    calls itself and every other call from `handler`.
+    """
+
+    def factory(handler, transport_class=FakeTransport, token="token"):
+        return transport_class(authorizing(handler, token))
+
+    return factory
+
+
+@pytest.fixture(name="fake_api")
+def fixture_fake_api(fake_transport):
+    """
+    Factory for clients of a fake service: `fake_api(handler)` builds a
+    `SmartTyreAPI` on `fake_transport(handler)`, `fake_api(transport=...)` on
+    a ready transport. Other keyword arguments go to `SmartTyreAPI`.
+    """
+
+    def factory(
+        handler=None,
+        transport=None,
+        base_url=BASE_URL,
+        client_id="client",
+        client_secret="secret",
+        **kwargs,
+    ):
+        if transport is None:
+            transport = fake_transport(handler)
+        return SmartTyreAPI(
+            base_url, client_id, client_secret, "key", transport=transport, **kwargs
+        )
+
+    return factory
@@ -0,0 +1,151 @@
+"""SmartTyre daemon
+Keeps a warm `SmartTyreAPI` (pooled connections, cached access token and
+cached reference data) in a background process and serves operations over a
+Unix socket, so one-off commands skip interpreter, import and TLS start-up.
+
+Start it with `python daemon.py` and talk to it with `daemon_client.DaemonClient`
+or `python cli.py --daemon ...`. Messages are newline-delimited JSON:
+`{"op": "vehicles.get", "args": {"vehicle_id": 7543}}` is answered with
+`{"result": ...}` or `{"error": "..."}`.
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+
+from cli import DEFAULT_BASE_URL, EXIT_CONFIG, execute, new_api
+from daemon_client import DaemonClient, default_socket_path
+from transport import TRANSPORTS, new_transport
+
+REFERENCE_OPERATIONS = (
+    "reference.brands",
+    "reference.sizes",
+    "reference.models",
+    "reference.axles",
+)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+                reply = self.server.dispatch(message.get("op"), message.get("args"))
+            except Exception as error:  # pylint: disable=broad-except
+                reply = {"error": str(error)}
+            self.wfile.write(
+                json.dumps(reply, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+                + b"\n"
+            )
+            self.wfile.flush()
+
+
+class SmartTyreDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    A Unix socket server that runs operations against a shared, warm client.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, api, socket_path=None, reference_ttl=3600):
+        """
+        Initializes the daemon and binds its socket.
+
+        Args:
+            api (SmartTyreAPI): The client shared by every request.
+            socket_path (str): Where to listen. Defaults to `default_socket_path()`.
+            reference_ttl (float): Seconds reference data is served from cache.
+        """
+        self.api = api
+        self.reference_ttl = reference_ttl
+        self._reference_cache = {}
+        self._cache_lock = threading.Lock()
+
+        socket_path = socket_path or default_socket_path()
+        if os.path.exists(socket_path):
+            if DaemonClient(socket_path, timeout=1).ping():
+                raise RuntimeError(f"A daemon is already listening on {socket_path}")
+            os.unlink(socket_path)
+        # Create the socket owner-only, leaving no window before a chmod.
+        umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _Handler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+    def warm(self):
+        """Fetches an access token and the reference data ahead of the first request."""
+        # Through the cache, so a token shared by the token store is reused.
+        self.api._cached_access_token()  # pylint: disable=protected-access
+        for op in REFERENCE_OPERATIONS:
+            self.dispatch(op, {})
+
+    def dispatch(self, op, args):
+        """Runs one operation and returns the reply document."""
+        if op == "ping":
+            return {"result": "pong"}
+        if op == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"result": "bye"}
+        if op in REFERENCE_OPERATIONS:
+            return {"result": self._reference(op)}
+        return {"result": execute(self.api, op, args)}
+
+    def _reference(self, op):
+        now = time.monotonic()
+        with self._cache_lock:
+            cached = self._reference_cache.get(op)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        result = execute(self.api, op, {})
+        if result is not None:
+            with self._cache_lock:
+                self._reference_cache[op] = (now + self.reference_ttl, result)
+        return result
+
+
+def main(argv=None):
+    """Runs the daemon in the foreground until it is shut down."""
+    parser = argparse.ArgumentParser(prog="smarttyre-daemon")
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument("--base-url", default=os.getenv("SMARTTYRE_BASE_URL", DEFAULT_BASE_URL))
+    parser.add_argument("--reference-ttl", type=float, default=3600)
+    parser.add_argument(
+        "--transport", choices=sorted(TRANSPORTS),
+        default=os.getenv("SMARTTYRE_TRANSPORT", "requests"),
+    )
+    parser.add_argument("--no-warm", action="store_true", help="Skip the start-up warm-up")
+    args = parser.parse_args(argv)
+
+    api = new_api(args.base_url, transport=new_transport(args.transport))
+    if api is None:
+        print("smarttyre-daemon: CLIENT_ID, CLIENT_SECRET and SIGN_KEY must be set",
+              file=sys.stderr)
+        return EXIT_CONFIG
+
+    server = SmartTyreDaemon(api, args.socket, reference_ttl=args.reference_ttl)
+    try:
+        if not args.no_warm:
+            server.warm()
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
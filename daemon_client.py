@@ -0,0 +1,93 @@
+"""Lightweight client for the SmartTyre daemon.
+
+This module only uses the standard library, so scripts that talk to a warm
+`daemon.py` process never pay for importing `requests`.
+
+Example:
+    ```python
+    client = DaemonClient()
+    vehicle = client.call("vehicles.get", vehicle_id=7543)
+    ```
+"""
+
+import json
+import os
+import socket
+import tempfile
+
+from token_store import private_directory
+
+
+def default_socket_path():
+    """
+    Socket path from SMARTTYRE_SOCKET, or a socket in a per-user directory of
+    the runtime dir (or the temp dir) that is checked to be private.
+
+    Raises:
+        PermissionError: If the per-user directory is not private to this user.
+    """
+    path = os.getenv("SMARTTYRE_SOCKET")
+    if path:
+        return path
+    directory = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    directory = private_directory(os.path.join(directory, f"smarttyre-{os.getuid()}"))
+    return os.path.join(directory, "daemon.sock")
+
+
+class DaemonError(Exception):
+    """Raised when the daemon reports that an operation failed."""
+
+
+class DaemonClient:
+    """
+    Sends operations to a running SmartTyre daemon over its Unix socket.
+    """
+
+    def __init__(self, socket_path=None, timeout=30):
+        """
+        Initializes the client.
+
+        Args:
+            socket_path (str): The daemon socket. Defaults to `default_socket_path()`.
+            timeout (float): Seconds to wait for the daemon to answer.
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+
+    def _send(self, message):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(self.timeout)
+            conn.connect(self.socket_path)
+            conn.sendall(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+            with conn.makefile("rb") as reader:
+                line = reader.readline()
+        if not line:
+            raise DaemonError("The daemon closed the connection without answering")
+        return json.loads(line)
+
+    def execute(self, op, args=None):
+        """
+        Runs an operation (see `cli.OPERATIONS`) in the daemon.
+
+        Returns:
+            The operation result, None when the API request failed.
+        """
+        reply = self._send({"op": op, "args": args or {}})
+        if "error" in reply:
+            raise DaemonError(reply["error"])
+        return reply.get("result")
+
+    def call(self, op, **args):
+        """Keyword-argument shortcut for `execute`."""
+        return self.execute(op, args)
+
+    def ping(self):
+        """Returns True when a daemon is listening on the socket."""
+        try:
+            return self._send({"op": "ping"}).get("result") == "pong"
+        except (OSError, ValueError, DaemonError):
+            return False
+
+    def shutdown(self):
+        """Asks the daemon to stop."""
+        self._send({"op": "shutdown"})
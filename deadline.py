@@ -0,0 +1,169 @@
+"""Deadline budgets for composite SmartTyre operations.
+
+A `Deadline` is set once around a multi-call operation (token fetch, list
+walk, detail fan-out, ...). While it is active every request made by
+`SmartTyreAPI` uses the smaller of its usual timeout and the time left, and
+requests started after the budget is spent fail fast with
+`DeadlineExceeded`, as do requests still in flight when it runs out. Work
+that had to be dropped is listed in `skipped`, so callers can return partial
+results and say what is missing.
+
+Example:
+    ```python
+    with Deadline(5) as deadline:
+        tires = list(api.iter_records(api.get_tire_list))
+        details = fan_out(api.get_vehicle_info, vehicle_ids)
+    if deadline.skipped:
+        print("incomplete:", deadline.skipped)
+    ```
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+_CURRENT = contextvars.ContextVar("smarttyre_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request would start after the deadline has passed."""
+
+
+class Deadline:
+    """
+    A time budget shared by every request made inside its `with` block,
+    including the threads started through `fan_out` or `Deadline.wrap`.
+    """
+
+    def __init__(self, seconds, clock=time.monotonic):
+        """
+        Initializes the deadline.
+
+        Args:
+            seconds (float): The budget, starting now.
+            clock (callable): Monotonic time source, replaceable in tests.
+        """
+        self._clock = clock
+        self.expires_at = clock() + seconds
+        self.skipped = []
+        self._lock = threading.Lock()
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_CURRENT.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        _CURRENT.reset(self._tokens.pop())
+
+    def remaining(self):
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self):
+        """Whether the budget is spent."""
+        return self.remaining() <= 0
+
+    def timeout(self, default):
+        """
+        The timeout for a request starting now.
+
+        Raises:
+            DeadlineExceeded: If the budget is already spent.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("The deadline budget is spent")
+        return min(default, remaining) if default else remaining
+
+    def skip(self, item):
+        """Records work dropped because of the deadline."""
+        with self._lock:
+            self.skipped.append(item)
+
+    def wrap(self, function):
+        """Returns `function` bound to this deadline, for use in other threads."""
+        def run(*args, **kwargs):
+            token = _CURRENT.set(self)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _CURRENT.reset(token)
+
+        return run
+
+
+def current_deadline():
+    """The active `Deadline`, or None."""
+    return _CURRENT.get()
+
+
+def request_timeout(default):
+    """
+    The timeout for a request starting now: `default`, capped by the active
+    deadline if any.
+
+    Raises:
+        DeadlineExceeded: If the active deadline is spent.
+    """
+    deadline = _CURRENT.get()
+    if deadline is None:
+        return default
+    return deadline.timeout(default)
+
+
+def expired_error(error):
+    """
+    `DeadlineExceeded` for an error raised by a request after the active
+    deadline ran out, or None. Request timeouts are capped to the time left,
+    so a transport timeout at that point means the budget is spent.
+    """
+    deadline = _CURRENT.get()
+    if isinstance(error, DeadlineExceeded) or deadline is None or not deadline.expired:
+        return None
+    return DeadlineExceeded("The deadline budget ran out during the request")
+
+
+def fan_out(function, items, workers=8):
+    """
+    Calls `function(item)` for every item concurrently under the active deadline.
+
+    When the deadline expires, items not started yet are cancelled and the
+    ones still running are abandoned; both are recorded in `skipped`.
+
+    Returns:
+        A dict of `{item: result}` for the calls that finished in time.
+    """
+    deadline = _CURRENT.get()
+    items = list(items)
+    if deadline is None:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return dict(zip(items, pool.map(function, items)))
+
+    results = {}
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {pool.submit(deadline.wrap(function), item): item for item in items}
+        while pending:
+            done, _ = wait(pending, timeout=deadline.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    results[item] = future.result()
+                except DeadlineExceeded:
+                    deadline.skip(item)
+                except Exception:  # pylint: disable=broad-except
+                    # E.g. a transport timeout cut short by the deadline.
+                    if not deadline.expired:
+                        raise
+                    deadline.skip(item)
+        for future, item in pending.items():
+            future.cancel()
+            deadline.skip(item)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
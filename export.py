@@ -0,0 +1,316 @@
+"""Columnar fleet inventory export.
+
+Streams the vehicle, tyre, sensor and TBox list endpoints into chunked
+columnar files that load in seconds, instead of concatenated JSON dumps.
+Pages are fetched in parallel with at most `workers` pages in flight, and at
+most `chunk_rows` rows are buffered before a chunk is written, so memory
+stays bounded however large the fleet is.
+
+Two formats are supported, each needing an optional package:
+
+- "npz" (`numpy`): one `<resource>-<n>.npz` per chunk. Numeric columns are
+  plain arrays (NaN or -1 when missing) and text columns are dictionary
+  encoded as `<column>.codes` (int32, -1 when missing) and
+  `<column>.dictionary`. `load` reads them back.
+- "parquet" (`pyarrow`): one `<resource>-<n>.parquet` per chunk, with text
+  columns dictionary encoded.
+
+A `manifest.json` lists the chunks, columns and row counts. It is only
+written once every page was fetched; a failed page raises `ExportError`.
+
+Example:
+    ```python
+    manifest = export_inventory(api, "inventory/", workers=8)
+    tires = load("inventory/", "tires")
+    worn = tires["tyreCode"][tires["newTreadDepth"] < 3]
+    ```
+"""
+
+import contextvars
+import json
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from persistence import write_json
+
+# Column type codes: "i8" int64 (-1 when missing), "f8" float64 (NaN when
+# missing), "str" dictionary-encoded text.
+COLUMNS = {
+    "vehicles": {
+        "id": "i8", "licensePlateNumber": "str", "isTractor": "i8", "emptyWeight": "f8",
+        "fullWeight": "f8", "axleTypeId": "str", "modelId": "str", "orgId": "str",
+        "tboxCode": "str", "vehicleChassisNumber": "str",
+    },
+    "tires": {
+        "id": "i8", "tyreCode": "str", "tyreBrandId": "str", "tyreSizeId": "str",
+        "tyrePattern": "str", "initialTreadDepth": "f8", "newTreadDepth": "f8",
+        "totalDistance": "f8", "loadIndex": "str", "speedLevel": "str", "vehicleId": "i8",
+        "axleIndex": "i8", "wheelIndex": "i8", "sensorCode": "str", "orgId": "str",
+    },
+    "sensors": {
+        "id": "i8", "sensorCode": "str", "version": "str", "tyreCode": "str", "orgId": "str",
+    },
+    "tboxes": {
+        "id": "i8", "tboxCode": "str", "version": "str", "vehicleId": "i8",
+        "ioTCardNumber": "str", "carrier": "str", "orgId": "str",
+    },
+}
+
+LIST_METHODS = {
+    "vehicles": "get_vehicle_list",
+    "tires": "get_tire_list",
+    "sensors": "get_sensor_list",
+    "tboxes": "get_tboxes_list",
+}
+
+
+class ExportError(Exception):
+    """Raised when a page of a list endpoint could not be fetched."""
+
+
+def _require(module):
+    # pylint: disable=import-outside-toplevel
+    try:
+        if module == "numpy":
+            import numpy
+
+            return numpy
+        import pyarrow
+        import pyarrow.parquet
+
+        return pyarrow
+    except ImportError as error:
+        raise ImportError(f"This export format requires the {module!r} package") from error
+
+
+def iter_pages(list_method, page_size=100, workers=4, params=None):
+    """
+    Yields the record lists of every page of a list endpoint, in order.
+
+    The first page gives the total; the remaining pages are fetched by
+    `workers` threads with at most `workers` pages in flight. Without a
+    total, pages are fetched one by one until a short page.
+
+    Raises:
+        ExportError: If a page request fails, so a partial walk never passes
+            for a complete one.
+    """
+    def fetch(page):
+        page_params = dict(params or {})
+        page_params["page"] = [str(page)]
+        page_params["pageSize"] = [str(page_size)]
+        result = list_method(params=page_params)
+        if result is None:
+            name = getattr(list_method, "__name__", "the list endpoint")
+            raise ExportError(f"Page {page} of {name} could not be fetched")
+        return result
+
+    first = fetch(1)
+    records = first.get("records") or []
+    yield records
+    total = int(first.get("total") or 0)
+    if len(records) < page_size:
+        return
+    if not total:
+        page = 2
+        while True:
+            records = fetch(page).get("records") or []
+            yield records
+            if len(records) < page_size:
+                return
+            page += 1
+
+    pages = range(2, -(-total // page_size) + 1)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        in_flight = deque()
+        for page in pages:
+            in_flight.append(pool.submit(contextvars.copy_context().run, fetch, page))
+            if len(in_flight) >= workers:
+                yield in_flight.popleft().result().get("records") or []
+        while in_flight:
+            yield in_flight.popleft().result().get("records") or []
+
+
+class _Chunk:
+    """Per-column buffers of up to `chunk_rows` rows."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.values = {name: [] for name in columns}
+        self.rows = 0
+
+    def append(self, record):
+        for name, values in self.values.items():
+            values.append(record.get(name))
+        self.rows += 1
+
+
+def _number(value, kind):
+    if value in (None, ""):
+        return -1 if kind == "i8" else float("nan")
+    try:
+        return int(float(value)) if kind == "i8" else float(value)
+    except (TypeError, ValueError):
+        return -1 if kind == "i8" else float("nan")
+
+
+def _encode(values):
+    """Dictionary-encodes text values: returns (codes, dictionary)."""
+    dictionary = {}
+    codes = []
+    for value in values:
+        if value in (None, ""):
+            codes.append(-1)
+        else:
+            codes.append(dictionary.setdefault(str(value), len(dictionary)))
+    return codes, list(dictionary)
+
+
+def _write_npz(path, chunk):
+    numpy = _require("numpy")
+    arrays = {}
+    for name, kind in chunk.columns.items():
+        values = chunk.values[name]
+        if kind == "str":
+            codes, dictionary = _encode(values)
+            arrays[f"{name}.codes"] = numpy.array(codes, dtype=numpy.int32)
+            arrays[f"{name}.dictionary"] = numpy.array(dictionary, dtype=str)
+        else:
+            dtype = numpy.int64 if kind == "i8" else numpy.float64
+            arrays[name] = numpy.array([_number(value, kind) for value in values], dtype=dtype)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(suffix=".npz.tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            numpy.savez(file, **arrays)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _write_parquet(path, chunk):
+    pyarrow = _require("pyarrow")
+    arrays = {}
+    for name, kind in chunk.columns.items():
+        values = chunk.values[name]
+        if kind == "str":
+            text = [None if value in (None, "") else str(value) for value in values]
+            arrays[name] = pyarrow.array(text, type=pyarrow.string()).dictionary_encode()
+        else:
+            arrays[name] = pyarrow.array(
+                [_number(value, kind) for value in values],
+                type=pyarrow.int64() if kind == "i8" else pyarrow.float64(),
+            )
+    temp_path = f"{path}.tmp"
+    pyarrow.parquet.write_table(pyarrow.table(arrays), temp_path)
+    os.replace(temp_path, path)
+
+
+WRITERS = {"npz": _write_npz, "parquet": _write_parquet}
+
+
+def export_resource(api, directory, resource, file_format="npz", chunk_rows=100_000,
+                    page_size=100, workers=4, columns=None):
+    """
+    Exports one resource into chunk files.
+
+    Args:
+        api (SmartTyreAPI): The client to read from.
+        directory (str): The output directory, created if needed.
+        resource (str): "vehicles", "tires", "sensors" or "tboxes".
+        file_format (str): "npz" or "parquet".
+        chunk_rows (int): Rows per chunk file.
+        page_size (int): Records requested per page.
+        workers (int): Pages fetched in parallel.
+        columns (dict): `{column: type}` overriding `COLUMNS[resource]`.
+
+    Returns:
+        The manifest entry of the resource: its columns, chunk files and rows.
+    """
+    if file_format not in WRITERS:
+        raise ValueError(f"Unsupported format {file_format!r}")
+    _require("numpy" if file_format == "npz" else "pyarrow")
+    columns = columns or COLUMNS[resource]
+    os.makedirs(directory, exist_ok=True)
+    write = WRITERS[file_format]
+    files = []
+    rows = 0
+
+    def flush(chunk):
+        name = f"{resource}-{len(files):05d}.{file_format}"
+        write(os.path.join(directory, name), chunk)
+        files.append(name)
+
+    chunk = _Chunk(columns)
+    list_method = getattr(api, LIST_METHODS[resource])
+    for records in iter_pages(list_method, page_size=page_size, workers=workers):
+        for record in records:
+            chunk.append(record)
+            if chunk.rows >= chunk_rows:
+                flush(chunk)
+                rows += chunk.rows
+                chunk = _Chunk(columns)
+    if chunk.rows or not files:
+        flush(chunk)
+        rows += chunk.rows
+    return {"columns": columns, "files": files, "rows": rows}
+
+
+def export_inventory(api, directory, resources=tuple(COLUMNS), file_format="npz", **kwargs):
+    """
+    Exports every resource and writes `manifest.json`.
+
+    Args:
+        kwargs: Passed to `export_resource`.
+
+    Returns:
+        The manifest: `{"format": ..., "resources": {resource: entry}}`.
+    """
+    manifest = {
+        "format": file_format,
+        "resources": {
+            resource: export_resource(api, directory, resource, file_format, **kwargs)
+            for resource in resources
+        },
+    }
+    write_json(os.path.join(directory, "manifest.json"), manifest, compression=None)
+    return manifest
+
+
+def load(directory, resource, decode=True):
+    """
+    Loads an exported "npz" resource into one numpy array per column.
+
+    Args:
+        decode (bool): Whether to turn text columns back into string arrays
+            ("" when missing) instead of returning `<column>.codes` and
+            `<column>.dictionary` per chunk.
+    """
+    numpy = _require("numpy")
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as file:
+        entry = json.load(file)["resources"][resource]
+
+    parts = {name: [] for name in entry["columns"]}
+    for name in entry["files"]:
+        with numpy.load(os.path.join(directory, name)) as chunk:
+            for column, kind in entry["columns"].items():
+                if kind != "str":
+                    parts[column].append(chunk[column])
+                    continue
+                codes = chunk[f"{column}.codes"]
+                dictionary = chunk[f"{column}.dictionary"]
+                if not decode:
+                    parts[column].append((codes, dictionary))
+                    continue
+                # Missing values have code -1, which picks the appended "".
+                lookup = numpy.append(dictionary, numpy.array([""], dtype=dictionary.dtype))
+                parts[column].append(lookup[codes])
+    if not decode:
+        return parts
+    return {
+        column: numpy.concatenate(arrays) if arrays else numpy.array([])
+        for column, arrays in parts.items()
+    }
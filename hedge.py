@@ -0,0 +1,179 @@
+"""Hedged requests for tail-latency-sensitive reads.
+
+With a `HedgePolicy` attached, `SmartTyreAPI` sends idempotent reads (GET
+endpoints and `get_tires_info_by_vehicle`) normally, and if no answer came
+back after a delay taken from that endpoint's recent latency percentile, it
+sends a second, freshly signed copy and uses whichever answers first. The
+share of extra requests is capped, and `stats()` reports how often hedges
+were sent and how often they won.
+
+Example:
+    ```python
+    hedge = HedgePolicy(percentile=95, max_extra=0.05,
+                        endpoints=["/smartyre/openapi/vehicle/detail"])
+    api = SmartTyreAPI(base_url, client_id, client_secret, sign_key, hedge=hedge)
+    ...
+    print(hedge.stats())
+    ```
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class HedgePolicy:
+    """
+    Decides when to hedge and keeps the latency samples and metrics.
+    """
+
+    def __init__(
+        self,
+        percentile=95,
+        delay=None,
+        initial_delay=0.2,
+        min_delay=0.005,
+        max_extra=0.1,
+        window=200,
+        min_samples=20,
+        endpoints=None,
+        max_workers=32,
+    ):
+        """
+        Initializes the policy.
+
+        Args:
+            percentile (float): Latency percentile of the endpoint after which
+                the hedge is sent.
+            delay (float): Fixed hedge delay in seconds, overriding `percentile`.
+            initial_delay (float): Delay used until `min_samples` latencies
+                of the endpoint have been seen.
+            min_delay (float): Lower bound of the hedge delay.
+            max_extra (float): Maximum share of extra requests, e.g. 0.1 for 10%.
+            window (int): Latency samples kept per endpoint.
+            min_samples (int): Samples needed before using the percentile.
+            endpoints (iterable): Endpoints eligible for hedging. None hedges
+                every idempotent read.
+            max_workers (int): Threads sending hedged requests. A hedge is
+                only sent while one of them is idle.
+        """
+        self.percentile = percentile
+        self.delay = delay
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_extra = max_extra
+        self.window = window
+        self.min_samples = min_samples
+        self.endpoints = frozenset(endpoints) if endpoints is not None else None
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self._lock = threading.Lock()
+        self._running = 0
+        self._latencies = {}
+        self._requests = 0
+        self._hedges = 0
+        self._wins = 0
+
+    def applies(self, endpoint):
+        """Whether reads of `endpoint` may be hedged."""
+        return self.endpoints is None or endpoint in self.endpoints
+
+    def hedge_delay(self, endpoint):
+        """Seconds to wait for the first answer before hedging."""
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            samples = sorted(self._latencies.get(endpoint, ()))
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return max(self.min_delay, samples[index])
+
+    def _record(self, endpoint, latency):
+        with self._lock:
+            samples = self._latencies.get(endpoint)
+            if samples is None:
+                samples = self._latencies[endpoint] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def _timed(self, endpoint, send, sending=None):
+        with self._lock:
+            self._running += 1
+        if sending is not None:
+            sending.set()
+        started = time.perf_counter()
+        try:
+            response = send()
+        finally:
+            with self._lock:
+                self._running -= 1
+        self._record(endpoint, time.perf_counter() - started)
+        return response
+
+    def _allow_hedge(self):
+        # Budgeted against requests actually sent, and never queued behind
+        # busy threads, where it would only add load.
+        with self._lock:
+            if (
+                self._hedges < self.max_extra * self._requests
+                and self._running < self.max_workers
+            ):
+                self._hedges += 1
+                return True
+            return False
+
+    def call(self, endpoint, send):
+        """
+        Runs `send()` and, if it is slow, a second `send()`; returns the first
+        response. `send` must build and sign a fresh request on every call.
+
+        The hedge delay starts once the first request is actually sent, so
+        time spent queued for a thread never counts as latency.
+        """
+        delay = self.hedge_delay(endpoint)
+
+        sending = threading.Event()
+        primary = self._pool.submit(
+            contextvars.copy_context().run, self._timed, endpoint, send, sending
+        )
+        sending.wait()
+        with self._lock:
+            self._requests += 1
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._allow_hedge():
+            return primary.result()
+
+        hedge = self._pool.submit(contextvars.copy_context().run, self._timed, endpoint, send)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                if future is hedge and primary not in done:
+                    with self._lock:
+                        self._wins += 1
+                return future.result()
+        raise error
+
+    def stats(self):
+        """Returns the request, hedge and win counters and the current delays."""
+        with self._lock:
+            requests, hedges, wins = self._requests, self._hedges, self._wins
+            endpoints = list(self._latencies)
+        return {
+            "requests": requests,
+            "hedges": hedges,
+            "hedge_wins": wins,
+            "hedge_rate": hedges / requests if requests else 0.0,
+            "win_rate": wins / hedges if hedges else 0.0,
+            "delays": {endpoint: self.hedge_delay(endpoint) for endpoint in endpoints},
+        }
+
+    def close(self):
+        """Stops the hedging threads."""
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,258 @@
+"""Resumable CSV importer for tyres, sensors and TBoxes.
+
+Supplier files are read row by row and handled in batches: every batch is
+validated at once (required code, the 12-character hex rule for
+`sensorCode`/`tboxCode`, brand and size names resolved to their IDs), rows
+whose code already exists remotely or earlier in the file are skipped, and
+the rest are inserted concurrently. After each batch the position and the
+lines whose insert failed are saved to a checkpoint file, so an interrupted
+import started again with the same checkpoint retries the failed rows and
+continues after the last finished batch.
+
+Example:
+    ```python
+    importer = Importer(api, "sensors", workers=16, checkpoint="sensors.ckpt")
+    counts = importer.run("supplier_sensors.csv")
+    # {"inserted": 99870, "duplicate": 112, "invalid": 18, "failed": 0}
+    ```
+
+Rows of a batch that was cut short are sent again on resume; the remote
+dedupe walk at start-up skips the ones that made it in. A finished import
+keeps its checkpoint, so running it again with the same file only retries
+the rows that failed.
+"""
+
+import csv
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from persistence import write_json
+from scheduler import BULK, priority
+
+# Resource -> (insert method, list method, code field).
+RESOURCES = {
+    "tires": ("add_tire", "get_tire_list", "tyreCode"),
+    "sensors": ("add_sensor", "get_sensor_list", "sensorCode"),
+    "tboxes": ("add_tbox", "get_tboxes_list", "tboxCode"),
+}
+
+# Code fields that must be 12 characters from 0-9 and A-F.
+HEX_FIELDS = ("sensorCode", "tboxCode")
+HEX_CODE = re.compile(r"[0-9A-F]{12}")
+
+# ID field -> (name column accepted in the CSV, reference data method).
+REFERENCES = {
+    "tyreBrandId": ("tyreBrand", "get_tire_brands"),
+    "tyreSizeId": ("tyreSize", "get_tire_sizes"),
+}
+# Fields holding the display name in reference data records.
+REFERENCE_NAME_FIELDS = ("name", "brandName", "sizeName")
+
+STATUSES = ("inserted", "duplicate", "invalid", "failed")
+
+
+def read_csv_rows(path):
+    """Yield the rows of a CSV file as dicts, dropping empty cells."""
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        for row in csv.DictReader(file):
+            yield {key: value for key, value in row.items() if key and value not in ("", None)}
+
+
+class Importer:
+    """
+    Streams a CSV file into the insert endpoint of one resource.
+    """
+
+    def __init__(self, api, resource, workers=8, batch_size=500, dedupe=True, checkpoint=None):
+        """
+        Initializes the importer.
+
+        Args:
+            api (SmartTyreAPI): The client to insert through.
+            resource (str): "tires", "sensors" or "tboxes".
+            workers (int): Concurrent insert requests.
+            batch_size (int): Rows validated and checkpointed together.
+            dedupe (bool): Whether to skip codes that already exist remotely.
+            checkpoint (str): Path of the checkpoint file. None disables resuming.
+        """
+        if resource not in RESOURCES:
+            raise ValueError(f"Unknown resource {resource!r}")
+        self.api = api
+        self.resource = resource
+        self.insert_name, self.list_name, self.code_field = RESOURCES[resource]
+        self.workers = workers
+        self.batch_size = batch_size
+        self.dedupe = dedupe
+        self.checkpoint = checkpoint
+        self._references = {}
+
+    # Validation
+
+    def _reference_ids(self, id_field):
+        """Maps lower-cased reference names to their IDs, fetched once."""
+        if id_field not in self._references:
+            records = getattr(self.api, REFERENCES[id_field][1])() or []
+            names = {}
+            for record in records:
+                for name_field in REFERENCE_NAME_FIELDS:
+                    if record.get(name_field) not in (None, ""):
+                        names[str(record[name_field]).strip().lower()] = str(record["id"])
+            self._references[id_field] = names
+        return self._references[id_field]
+
+    def validate(self, row):
+        """
+        Normalizes a CSV row into an insert payload.
+
+        Returns:
+            `(payload, None)` for a valid row, `(None, reason)` otherwise.
+        """
+        payload = dict(row)
+        code = str(payload.get(self.code_field, "")).strip()
+        if not code:
+            return None, f"missing {self.code_field}"
+        if self.code_field in HEX_FIELDS:
+            code = code.upper()
+            if not HEX_CODE.fullmatch(code):
+                return None, f"{self.code_field} must be 12 characters from 0-9 and A-F"
+        payload[self.code_field] = code
+
+        if self.resource == "tires":
+            for id_field, (name_field, _) in REFERENCES.items():
+                name = payload.pop(name_field, None)
+                if id_field in payload or name is None:
+                    continue
+                reference_id = self._reference_ids(id_field).get(name.strip().lower())
+                if reference_id is None:
+                    return None, f"unknown {name_field} {name!r}"
+                payload[id_field] = reference_id
+        return payload, None
+
+    # Dedupe
+
+    def existing_codes(self):
+        """The codes of every record that already exists remotely."""
+        if not self.dedupe:
+            return set()
+        list_method = getattr(self.api, self.list_name)
+        with priority(BULK):
+            return {
+                str(record[self.code_field]).upper()
+                if self.code_field in HEX_FIELDS else str(record[self.code_field])
+                for record in self.api.iter_records(list_method)
+                if record.get(self.code_field) not in (None, "")
+            }
+
+    # Checkpoints
+
+    def _fingerprint(self, path):
+        return {"source": os.path.abspath(path), "size": os.path.getsize(path)}
+
+    def _load_checkpoint(self, path):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return 0, dict.fromkeys(STATUSES, 0), set()
+        with open(self.checkpoint, encoding="utf-8") as file:
+            state = json.load(file)
+        if {key: state.get(key) for key in ("source", "size")} != self._fingerprint(path):
+            # A different file: start over, the dedupe walk covers overlaps.
+            return 0, dict.fromkeys(STATUSES, 0), set()
+        return state["line"], state["counts"], set(state.get("failed", ()))
+
+    def _save_checkpoint(self, path, line, counts, failed):
+        if self.checkpoint:
+            write_json(
+                self.checkpoint,
+                {**self._fingerprint(path), "line": line, "counts": counts,
+                 "failed": sorted(failed)},
+                compression=None,
+            )
+
+    # Import
+
+    def _insert(self, payload):
+        try:
+            with priority(BULK):
+                result = getattr(self.api, self.insert_name)(payload)
+        except Exception as error:  # pylint: disable=broad-except
+            return "failed", str(error)
+        return ("inserted", None) if result is not None else ("failed", "request failed")
+
+    def _process(self, pool, batch, seen, on_result):
+        valid = []
+        outcomes = {}
+        for line, row in batch:
+            payload, reason = self.validate(row)
+            if payload is None:
+                outcomes[line] = ("invalid", reason)
+            else:
+                valid.append((line, payload))
+
+        while valid:
+            # One insert per code at a time: a repeated code waits for the
+            # outcome of the earlier row and is only a duplicate if it went in.
+            current, later, codes = [], [], set()
+            for line, payload in valid:
+                code = payload[self.code_field]
+                if code in seen:
+                    outcomes[line] = ("duplicate", None)
+                elif code in codes:
+                    later.append((line, payload))
+                else:
+                    codes.add(code)
+                    current.append((line, payload))
+            payloads = [payload for _, payload in current]
+            for (line, payload), outcome in zip(current, pool.map(self._insert, payloads)):
+                outcomes[line] = outcome
+                if outcome[0] == "inserted":
+                    seen.add(payload[self.code_field])
+            valid = later
+
+        for line, row in batch:
+            status, error = outcomes[line]
+            if on_result is not None:
+                on_result(line, row, status, error)
+            yield line, status
+
+    def run(self, path, on_result=None):
+        """
+        Imports a CSV file, resuming from the checkpoint if there is one.
+
+        Args:
+            path (str): The CSV file, with one column per payload field.
+                Tyre files may give `tyreBrand`/`tyreSize` names instead of IDs.
+            on_result (callable): Called as `on_result(line, row, status, error)`
+                for every row, where `status` is one of `STATUSES`.
+
+        Returns:
+            A dict counting the rows per status, including earlier runs.
+            Rows retried from an earlier run are counted once, by their
+            latest status.
+        """
+        start, counts, retry = self._load_checkpoint(path)
+        seen = self.existing_codes()
+        failed = set()
+        batch = []
+
+        def flush():
+            for line, status in self._process(pool, batch, seen, on_result):
+                counts[status] += 1
+                if status == "failed":
+                    failed.add(line)
+            self._save_checkpoint(path, max(start, batch[-1][0]), counts, failed | retry)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            for line, row in enumerate(read_csv_rows(path), start=2):
+                if line <= start:
+                    if line not in retry:
+                        continue
+                    retry.discard(line)
+                    counts["failed"] -= 1
+                batch.append((line, row))
+                if len(batch) >= self.batch_size:
+                    flush()
+                    batch = []
+            if batch:
+                flush()
+        return counts
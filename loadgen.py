@@ -0,0 +1,494 @@
+"""Synthetic fleet load generator and soak test.
+
+Drives `SmartTyreAPI` against a local stand-in server that serves a synthetic
+fleet (10k vehicles and 60k tyres by default) and reports, every `interval`
+seconds, throughput, latency percentiles per operation, error rate and
+process memory, so leaks and saturation points show up over long runs.
+
+The request mix combines interactive lookups, telemetry polling of
+`get_tires_info_by_vehicle`, bulk list paging and tyre updates, each sent
+under its `scheduler` priority class.
+
+Example:
+    ```
+    python loadgen.py --duration 3600 --concurrency 32 --output soak.ndjson
+    python loadgen.py --mix tyre_data=8,tyre_page=2 --latency 0.02 --error-rate 0.01
+    python loadgen.py --slots 8 --rate 200 --duration 300
+    ```
+
+From Python:
+    ```python
+    fleet = SyntheticFleet(vehicles=10_000)
+    with StandInServer(fleet, latency=0.01) as server:
+        api = SmartTyreAPI(server.url, "loadgen", "secret", "key", transport="urllib3")
+        summary = LoadGenerator(api, fleet, concurrency=32).run(600, on_report=print)
+    ```
+
+Each report is one JSON line; the last one holds the totals under "final".
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from rollups import Summary
+from scheduler import BULK, INTERACTIVE, TELEMETRY, RequestScheduler, priority
+from smarttyre_api import SmartTyreAPI
+from transport import TRANSPORTS
+
+PERCENTILES = (50, 90, 99)
+
+
+class SyntheticFleet:
+    """
+    A deterministic fleet whose records are computed from their index, so a
+    large fleet costs no memory.
+    """
+
+    def __init__(self, vehicles=10_000, tyres_per_vehicle=6, orgs=20, brands=12, seed=0):
+        self.vehicles = vehicles
+        self.tyres_per_vehicle = tyres_per_vehicle
+        self.orgs = orgs
+        self.brands = brands
+        self.seed = seed
+
+    @property
+    def tyres(self):
+        """The number of tyres."""
+        return self.vehicles * self.tyres_per_vehicle
+
+    def vehicle(self, index):
+        """The vehicle record at `index` (0-based); its ID is `index + 1`."""
+        return {
+            "id": index + 1,
+            "licensePlateNumber": f"SYN{index:06d}",
+            "orgId": str(index % self.orgs + 1),
+            "tboxCode": f"{index:012X}",
+            "isTractor": index % 3,
+        }
+
+    def tyre(self, index):
+        """The tyre record at `index`, mounted in order on the vehicles."""
+        vehicle, position = divmod(index, self.tyres_per_vehicle)
+        return {
+            "id": index + 1,
+            "tyreCode": f"TY{index:08d}",
+            "tyreBrandId": str(index % self.brands + 1),
+            "vehicleId": vehicle + 1,
+            "axleIndex": position // 2 + 1,
+            "wheelIndex": position % 2 + 1,
+            "sensorCode": f"{index + 0x100000000:012X}",
+            "initialTreadDepth": "16",
+            "newTreadDepth": str(round(4 + (index * 7919 % 120) / 10, 1)),
+            "totalDistance": index * 37 % 250_000,
+        }
+
+    def sensor(self, index):
+        """The sensor record at `index`, fitted in tyre `index`."""
+        return {"id": index + 1, "sensorCode": f"{index + 0x100000000:012X}",
+                "tyreCode": f"TY{index:08d}"}
+
+    def tbox(self, index):
+        """The TBox record at `index`, installed in vehicle `index + 1`."""
+        return {"id": index + 1, "tboxCode": f"{index:012X}", "vehicleId": index + 1}
+
+    def count(self, resource):
+        """The number of records of a list resource ("vehicle", "tyre", ...)."""
+        return self.vehicles if resource in ("vehicle", "tbox") else self.tyres
+
+    def page(self, resource, page, page_size):
+        """One page of a list endpoint."""
+        total = self.count(resource)
+        build = getattr(self, resource)
+        start = (page - 1) * page_size
+        return {
+            "records": [build(index) for index in range(start, min(total, start + page_size))],
+            "total": total,
+        }
+
+    def tyre_data(self, vehicle_id, now=None):
+        """Live readings of a vehicle's tyres, varying over time."""
+        if not 1 <= vehicle_id <= self.vehicles:
+            return None
+        tick = int((now if now is not None else time.time()) // 10)
+        rng = random.Random(hash((self.seed, vehicle_id, tick)))
+        first = (vehicle_id - 1) * self.tyres_per_vehicle
+        return [
+            {**self.tyre(index),
+             "pressure": round(rng.gauss(8.5, 0.6), 2),
+             "temperature": round(rng.gauss(45, 8), 1)}
+            for index in range(first, first + self.tyres_per_vehicle)
+        ]
+
+
+def _handler(fleet, latency, jitter, error_rate):
+    class Handler(BaseHTTPRequestHandler):
+        """Stand-in SmartTyre endpoints answering from the synthetic fleet."""
+
+        protocol_version = "HTTP/1.1"
+        # Send each answer in one segment instead of waiting on delayed ACKs.
+        wbufsize = -1
+        disable_nagle_algorithm = True
+
+        def _answer(self, status, payload):
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _delay_or_fail(self):
+            if latency or jitter:
+                time.sleep(latency + random.uniform(0, jitter))
+            if error_rate and random.random() < error_rate:
+                self._answer(503, {"code": 503, "msg": "injected failure"})
+                return True
+            return False
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            url = urlsplit(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            if self._delay_or_fail():
+                return
+            parts = url.path.rstrip("/").split("/")
+            resource, action = parts[-2], parts[-1]
+            if action == "list":
+                data = fleet.page(resource, int(params.get("page", 1)),
+                                  int(params.get("pageSize", 10)))
+            elif action == "detail" and resource in ("vehicle", "tyre", "sensor", "tbox"):
+                index = int(params.get("vehicleId") or params.get("id") or 0) - 1
+                data = None
+                if 0 <= index < fleet.count(resource):
+                    data = getattr(fleet, resource)(index)
+            else:
+                data = []
+            self._answer(200, {"code": 200, "data": data})
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path.endswith("/authorize"):
+                self._answer(200, {"code": 200, "data": {"accessToken": "synthetic",
+                                                          "expiresIn": 7200}})
+                return
+            if self._delay_or_fail():
+                return
+            if self.path.endswith("/vehicle/tyre/data"):
+                data = fleet.tyre_data(int(body.get("vehicleId") or 0))
+                self._answer(200, {"code": 200, "data": data})
+                return
+            self._answer(200, {"code": 200, "msg": "success"})
+
+        def log_message(self, *args):  # pylint: disable=arguments-differ
+            pass
+
+    return Handler
+
+
+class StandInServer:
+    """
+    Local HTTP server impersonating the SmartTyre API for a synthetic fleet,
+    with optional injected latency and failures. Signatures are not checked.
+    """
+
+    def __init__(self, fleet, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0):
+        """
+        Initializes the server; `start` or a `with` block runs it.
+
+        Args:
+            fleet (SyntheticFleet): The data served.
+            host (str): Interface to listen on.
+            port (int): Port, 0 for any free one.
+            latency (float): Seconds added to every answer.
+            jitter (float): Extra random seconds, up to this value.
+            error_rate (float): Share of requests answered with HTTP 503.
+        """
+        self.server = ThreadingHTTPServer(
+            (host, port), _handler(fleet, latency, jitter, error_rate)
+        )
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """The base URL to give to `SmartTyreAPI`."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serves requests in a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the socket."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop()
+
+
+# Operation -> (priority class, call). Calls return None on failure.
+OPERATIONS = {
+    "vehicle_detail": (
+        INTERACTIVE,
+        lambda api, fleet, rng: api.get_vehicle_info(rng.randint(1, fleet.vehicles)),
+    ),
+    "tyre_data": (
+        TELEMETRY,
+        lambda api, fleet, rng: api.get_tires_info_by_vehicle(rng.randint(1, fleet.vehicles)),
+    ),
+    "tyre_page": (
+        BULK,
+        lambda api, fleet, rng: api.get_tire_list(params={
+            "page": [str(rng.randint(1, max(1, fleet.tyres // 100)))],
+            "pageSize": ["100"],
+        }),
+    ),
+    "update_tire": (
+        INTERACTIVE,
+        lambda api, fleet, rng: api.update_tire({
+            **fleet.tyre(rng.randrange(fleet.tyres)),
+            "newTreadDepth": str(round(rng.uniform(3, 16), 1)),
+        }),
+    ),
+}
+DEFAULT_MIX = {"tyre_data": 6, "vehicle_detail": 2, "tyre_page": 1, "update_tire": 1}
+
+
+def rss_bytes():
+    """Resident memory of this process in bytes, or the peak where unavailable."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # pylint: disable=import-outside-toplevel
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _slope(points):
+    """Least-squares slope of `(x, y)` points, 0 with fewer than two."""
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+class LoadGenerator:
+    """
+    Sends a weighted mix of operations from `concurrency` threads and
+    reports statistics per interval.
+    """
+
+    def __init__(self, api, fleet, mix=None, concurrency=16, interval=10.0, seed=0):
+        """
+        Initializes the generator.
+
+        Args:
+            api (SmartTyreAPI): The client under test.
+            fleet (SyntheticFleet): The fleet the stand-in server serves.
+            mix (dict): `{operation: weight}` over `OPERATIONS`. Defaults to
+                `DEFAULT_MIX`.
+            concurrency (int): Threads sending requests.
+            interval (float): Seconds between reports.
+            seed (int): Seed of the operation and argument choices.
+        """
+        mix = mix or DEFAULT_MIX
+        unknown = sorted(set(mix) - set(OPERATIONS))
+        if unknown:
+            raise ValueError(f"Unknown operations: {', '.join(unknown)}")
+        self.api = api
+        self.fleet = fleet
+        self.mix = mix
+        self.concurrency = concurrency
+        self.interval = interval
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._window = {}
+        self._totals = {}
+
+    def _record(self, name, latency, ok):
+        with self._lock:
+            for stats in (self._window, self._totals):
+                entry = stats.get(name)
+                if entry is None:
+                    entry = stats[name] = [Summary(), 0]
+                entry[0].add(latency)
+                entry[1] += not ok
+
+    def _work(self, index):
+        rng = random.Random(self.seed * 1_000_003 + index)
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        while not self._stop.is_set():
+            name = rng.choices(names, weights)[0]
+            priority_class, call = OPERATIONS[name]
+            started = time.perf_counter()
+            try:
+                with priority(priority_class):
+                    ok = call(self.api, self.fleet, rng) is not None
+            except Exception:  # pylint: disable=broad-except
+                ok = False
+            self._record(name, time.perf_counter() - started, ok)
+
+    @staticmethod
+    def _describe(stats, seconds):
+        requests = sum(summary.count for summary, _ in stats.values())
+        errors = sum(failures for _, failures in stats.values())
+        latency = {}
+        for name, (summary, failures) in sorted(stats.items()):
+            latency[name] = {
+                "count": summary.count,
+                "errors": failures,
+                **{f"p{p}": summary.percentile(p) for p in PERCENTILES},
+                "max": summary.max,
+            }
+        return {
+            "requests": requests,
+            "throughput": requests / seconds if seconds else 0.0,
+            "errors": errors,
+            "error_rate": errors / requests if requests else 0.0,
+            "latency": latency,
+        }
+
+    def run(self, duration, on_report=None):
+        """
+        Runs the load for `duration` seconds.
+
+        Args:
+            duration (float): Seconds to run.
+            on_report (callable): Called with each interval report dict.
+
+        Returns:
+            The totals of the run, including the memory growth rate.
+        """
+        self._stop.clear()
+        workers = [
+            threading.Thread(target=self._work, args=(index,), name=f"loadgen-{index}",
+                             daemon=True)
+            for index in range(self.concurrency)
+        ]
+        started = time.monotonic()
+        rss_start = rss_bytes()
+        memory = [(0.0, rss_start)]
+        for worker in workers:
+            worker.start()
+
+        window_started = started
+        try:
+            while True:
+                now = time.monotonic()
+                remaining = started + duration - now
+                if remaining <= 0:
+                    break
+                self._stop.wait(min(self.interval, remaining))
+                now = time.monotonic()
+                with self._lock:
+                    window, self._window = self._window, {}
+                rss = rss_bytes()
+                memory.append((now - started, rss))
+                report = {
+                    "elapsed": round(now - started, 3),
+                    **self._describe(window, now - window_started),
+                    "rss_bytes": rss,
+                    "rss_growth": rss - rss_start,
+                    "threads": threading.active_count(),
+                }
+                window_started = now
+                if on_report is not None:
+                    on_report(report)
+        finally:
+            self._stop.set()
+            for worker in workers:
+                worker.join()
+
+        elapsed = time.monotonic() - started
+        return {
+            "elapsed": round(elapsed, 3),
+            **self._describe(self._totals, elapsed),
+            "rss_bytes": memory[-1][1],
+            "rss_growth": memory[-1][1] - rss_start,
+            "rss_slope_bytes_per_hour": _slope(memory) * 3600,
+        }
+
+
+def _parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    """Runs a load test and prints one JSON report per interval."""
+    parser = argparse.ArgumentParser(prog="smarttyre-loadgen")
+    parser.add_argument("--vehicles", type=int, default=10_000)
+    parser.add_argument("--tyres-per-vehicle", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run")
+    parser.add_argument("--interval", type=float, default=10, help="Seconds between reports")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=_parse_mix, metavar="OP=WEIGHT,...",
+                        help=f"Request mix over {', '.join(OPERATIONS)}")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stand-in server latency")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--transport", choices=sorted(TRANSPORTS), default="urllib3")
+    parser.add_argument("--pool-maxsize", type=int, default=32)
+    parser.add_argument("--slots", type=int, help="Attach a RequestScheduler with this many slots")
+    parser.add_argument("--rate", type=float, help="Scheduler requests per second")
+    parser.add_argument("--output", "-o", default="-", help="NDJSON destination, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    fleet = SyntheticFleet(args.vehicles, args.tyres_per_vehicle)
+    scheduler = RequestScheduler(args.slots, rate=args.rate) if args.slots else None
+    output = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+
+    def write(report):
+        output.write(json.dumps(report, separators=(",", ":")) + "\n")
+        output.flush()
+
+    try:
+        with StandInServer(fleet, latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate) as server:
+            api = SmartTyreAPI(
+                server.url, "loadgen", "secret", "key",
+                transport=TRANSPORTS[args.transport](pool_maxsize=args.pool_maxsize),
+                scheduler=scheduler,
+            )
+            generator = LoadGenerator(api, fleet, args.mix, args.concurrency, args.interval)
+            write({"final": generator.run(args.duration, on_report=write)})
+    except KeyboardInterrupt:
+        return 130
+    except ValueError as error:
+        print(f"smarttyre-loadgen: {error}", file=sys.stderr)
+        return 2
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
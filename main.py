@@ -2,23 +2,16 @@
 This module provides a client for interacting with the SmartTyre API."""
 
 import os
-import json
-from dotenv import load_dotenv
 
+from persistence import atomic_writer, write_json
 from smarttyre_api import SmartTyreAPI
 
-load_dotenv()
-
-CLIENT_ID = os.getenv("CLIENT_ID")
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
-SIGN_KEY = os.getenv("SIGN_KEY")
-
 def save_response_to_file(response, filename):
-    """Save the API response to a file."""
-    with open(filename, "w") as file:
-        if isinstance(response, dict):
-            file.write(json.dumps(response, indent=4, ensure_ascii=False))
-        else:
+    """Save the API response to a file, replacing it atomically."""
+    if isinstance(response, dict):
+        write_json(filename, response)
+    else:
+        with atomic_writer(filename) as file:
             file.write(str(response))
 
 def menu():
@@ -54,11 +47,15 @@ def menu():
 
 
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
     tire_api = SmartTyreAPI(
         base_url="https://www.dajintruck.com",
-        client_id=CLIENT_ID,
-        client_secret=CLIENT_SECRET,
-        sign_key=SIGN_KEY,
+        client_id=os.getenv("CLIENT_ID"),
+        client_secret=os.getenv("CLIENT_SECRET"),
+        sign_key=os.getenv("SIGN_KEY"),
     )
 
     menu()
@@ -0,0 +1,372 @@
+"""Durable outbox for mutating SmartTyre calls.
+
+Request handlers enqueue mutations (`update_tire`, `bind_sensor_to_tire`,
+`add_vehicle`, ...) into a local SQLite file and return at once; background
+workers send them through `SmartTyreAPI`, retrying failures with
+exponential backoff. Messages about the same entity (a tyre code, sensor
+code, TBox code or licence plate) are sent one at a time in the order they
+were enqueued, while different entities are drained concurrently. A
+message that runs out of attempts is marked failed and no longer holds back
+its entity; `retry` queues it again.
+
+Every message is committed to disk before `enqueue` returns. A claimed
+message is leased to its drainer for `lease` seconds; messages whose
+drainer died are claimed again once the lease runs out, so no write is
+lost, while producers and other drainers opening the same file never take
+over live claims. A drainer whose lease ran out cannot overwrite the outcome
+recorded by the one that claimed the message after it. A write may be sent
+twice after a crash.
+
+Example:
+    ```python
+    outbox = Outbox("outbox.sqlite3", api)
+    outbox.start(workers=4)
+    message_id = outbox.enqueue("update_tire", tire_info=tire)
+    ...
+    outbox.status(message_id)  # {"status": "done", "attempts": 1, ...}
+    outbox.stop()
+    ```
+"""
+
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+logger = logging.getLogger(__name__)
+
+# Mutating method -> (entity prefix, argument, payload field or None).
+ENTITY_KEYS = {
+    "add_vehicle": ("vehicle", "vehicle_info", "licensePlateNumber"),
+    "update_vehicle": ("vehicle", "vehicle_info", "licensePlateNumber"),
+    "add_tire": ("tyre", "tire_info", "tyreCode"),
+    "update_tire": ("tyre", "tire_info", "tyreCode"),
+    "bind_tire_to_vehicle": ("tyre", "tire_code", None),
+    "unbind_tire_from_vehicle": ("tyre", "tire_id", None),
+    "add_tbox": ("tbox", "tbox_info", "tboxCode"),
+    "update_tbox": ("tbox", "tbox_info", "tboxCode"),
+    "add_sensor": ("sensor", "sensor_info", "sensorCode"),
+    "update_sensor": ("sensor", "sensor_info", "sensorCode"),
+    "bind_sensor_to_tire": ("tyre", "tire_code", None),
+    "unbind_sensor_from_tire": ("tyre", "tire_code", None),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    method TEXT NOT NULL,
+    args TEXT NOT NULL,
+    entity TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    lease_until REAL,
+    lease_owner TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, next_attempt);
+CREATE INDEX IF NOT EXISTS outbox_entity ON outbox (entity, id);
+"""
+
+# The oldest ready messages, or claimed ones whose lease ran out, whose
+# entity has no earlier unfinished message.
+_CLAIM = f"""
+SELECT id, method, args, attempts FROM outbox AS message
+WHERE (
+    (status = '{PENDING}' AND next_attempt <= :now)
+    OR (status = '{IN_FLIGHT}' AND lease_until <= :now)
+)
+AND NOT EXISTS (
+    SELECT 1 FROM outbox AS earlier
+    WHERE earlier.entity = message.entity AND earlier.id < message.id
+    AND earlier.status IN ('{PENDING}', '{IN_FLIGHT}')
+)
+ORDER BY id LIMIT :limit
+"""
+
+_COLUMNS = ("id", "method", "args", "entity", "status", "attempts", "next_attempt",
+            "created", "updated", "result", "error")
+
+
+def entity_of(method, args):
+    """The ordering key of a mutation, e.g. "tyre:ABC123", or None."""
+    prefix, name, field = ENTITY_KEYS[method]
+    value = args.get(name)
+    if field is not None:
+        value = (value or {}).get(field)
+    return None if value in (None, "") else f"{prefix}:{value}"
+
+
+class Outbox:
+    """
+    SQLite-backed queue of mutations drained by background workers.
+    """
+
+    def __init__(
+        self,
+        path,
+        api=None,
+        batch_size=20,
+        max_attempts=8,
+        backoff=1.0,
+        max_backoff=300.0,
+        poll_interval=1.0,
+        lease=600.0,
+        clock=time.time,
+    ):
+        """
+        Opens the outbox.
+
+        Args:
+            path (str): The SQLite database file.
+            api (SmartTyreAPI): The client sending the mutations. Only needed
+                to drain; producers can enqueue without one.
+            batch_size (int): Messages claimed and settled per transaction.
+            max_attempts (int): Attempts before a message is marked failed.
+            backoff (float): Delay before the first retry, doubled each time.
+            max_backoff (float): Upper bound of the retry delay.
+            poll_interval (float): Seconds idle workers wait between polls.
+            lease (float): Seconds a claimed batch stays with its drainer
+                before another one may claim it again. Must exceed the time
+                to send a batch.
+            clock (callable): Wall-clock time source, replaceable in tests.
+        """
+        self.api = api
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+
+    # Producers
+
+    def enqueue(self, method, entity=None, **args):
+        """
+        Durably queues a mutation.
+
+        Args:
+            method (str): A mutating `SmartTyreAPI` method, a key of `ENTITY_KEYS`.
+            entity (str): Ordering key overriding the one derived from `args`.
+            **args: The method arguments, which must be JSON-serializable.
+
+        Returns:
+            The message ID.
+        """
+        if method not in ENTITY_KEYS:
+            raise ValueError(f"{method!r} is not a mutating SmartTyreAPI method")
+        entity = entity if entity is not None else entity_of(method, args)
+        now = self._clock()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (method, args, entity, status, next_attempt, created, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (method, json.dumps(args, ensure_ascii=False), entity, PENDING, now, now, now),
+            )
+        self._wakeup.set()
+        return cursor.lastrowid
+
+    # Status
+
+    def status(self, message_id):
+        """The message as a dict, with `args` and `result` decoded, or None."""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM outbox WHERE id = ?", (message_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        message = dict(zip(_COLUMNS, row))
+        message["args"] = json.loads(message["args"])
+        message["result"] = json.loads(message["result"]) if message["result"] else None
+        return message
+
+    def messages(self, status=None, entity=None, limit=100):
+        """The IDs of messages filtered by status and entity, oldest first."""
+        query, values = "SELECT id FROM outbox WHERE 1 = 1", []
+        if status is not None:
+            query += " AND status = ?"
+            values.append(status)
+        if entity is not None:
+            query += " AND entity = ?"
+            values.append(entity)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY id LIMIT ?", (*values, limit)).fetchall()
+        return [row[0] for row in rows]
+
+    def counts(self):
+        """The number of messages per status."""
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status")
+            counts = dict(rows.fetchall())
+        return {status: counts.get(status, 0) for status in (PENDING, IN_FLIGHT, DONE, FAILED)}
+
+    def retry(self, message_id):
+        """Requeues a failed message."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE outbox SET status = ?, attempts = 0, next_attempt = ?"
+                " WHERE id = ? AND status = ?",
+                (PENDING, self._clock(), message_id, FAILED),
+            )
+        self._wakeup.set()
+
+    def purge(self, older_than):
+        """Deletes messages done more than `older_than` seconds ago."""
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM outbox WHERE status = ? AND updated < ?",
+                (DONE, self._clock() - older_than),
+            )
+        return cursor.rowcount
+
+    # Draining
+
+    def _claim(self):
+        """Returns the lease owner token and the claimed rows."""
+        owner = secrets.token_hex(8)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                now = self._clock()
+                rows = self._db.execute(_CLAIM, {"now": now, "limit": self.batch_size}).fetchall()
+                self._db.executemany(
+                    "UPDATE outbox SET status = ?, lease_until = ?, lease_owner = ? WHERE id = ?",
+                    [(IN_FLIGHT, now + self.lease, owner, row[0]) for row in rows],
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return owner, rows
+
+    def _send(self, method, args):
+        try:
+            result = getattr(self.api, method)(**json.loads(args))
+        except Exception as error:  # pylint: disable=broad-except
+            return None, str(error)
+        if result is None:
+            return None, "request failed"
+        return result, None
+
+    def _settle(self, owner, outcomes):
+        now = self._clock()
+        updates = []
+        for message_id, attempts, result, error in outcomes:
+            if error is None:
+                status, next_attempt = DONE, now
+            elif attempts >= self.max_attempts:
+                status, next_attempt = FAILED, now
+            else:
+                status = PENDING
+                next_attempt = now + min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+            updates.append((
+                status, attempts, next_attempt, now,
+                json.dumps(result, ensure_ascii=False) if result is not None else None,
+                error, message_id, owner,
+            ))
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Only while the lease is still ours: once it ran out, another
+                # drainer may have claimed the message and owns its outcome.
+                self._db.executemany(
+                    "UPDATE outbox SET status = ?, attempts = ?, next_attempt = ?, updated = ?,"
+                    " result = ?, error = ?, lease_owner = NULL"
+                    " WHERE id = ? AND lease_owner = ?",
+                    updates,
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        self._wakeup.set()
+
+    def drain_once(self):
+        """
+        Claims one batch of ready messages, sends them and records the outcome.
+
+        Returns:
+            The number of messages sent.
+        """
+        owner, rows = self._claim()
+        if not rows:
+            return 0
+        outcomes = []
+        for message_id, method, args, attempts in rows:
+            result, error = self._send(method, args)
+            outcomes.append((message_id, attempts + 1, result, error))
+        self._settle(owner, outcomes)
+        return len(rows)
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                sent = self.drain_once()
+            except Exception:  # pylint: disable=broad-except
+                # E.g. a locked or full database: keep the worker alive, and
+                # the claimed messages are claimed again once their lease ends.
+                logger.exception("Outbox worker failed to drain a batch")
+                sent = 0
+            if not sent:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def start(self, workers=4):
+        """Starts the background workers."""
+        if self.api is None:
+            raise ValueError("An api is needed to drain the outbox")
+        self._stopping.clear()
+        for index in range(workers):
+            worker = threading.Thread(target=self._work, name=f"outbox-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def join(self, timeout=None):
+        """
+        Waits until no message is pending or in flight.
+
+        Returns:
+            Whether the outbox emptied before the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            counts = self.counts()
+            if not counts[PENDING] and not counts[IN_FLIGHT]:
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def stop(self):
+        """Stops the workers after their current batch."""
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def close(self):
+        """Stops the workers and closes the database."""
+        self.stop()
+        self._db.close()
@@ -0,0 +1,255 @@
+"""Persistence helpers for API responses.
+
+Records are streamed to disk one at a time, so large inventory dumps never
+have to fit in memory as a single string. Complete files are written to a
+temporary file next to the destination and renamed into place, so readers
+never see a half-written file. A `.gz` or `.zst` suffix compresses the
+output; zstd needs the optional `zstandard` package.
+
+Example:
+    ```python
+    write_ndjson("tires.ndjson.gz", api.iter_records(api.get_tire_list))
+
+    with RotatingNDJSONWriter("readings.ndjson", max_bytes=50_000_000) as writer:
+        writer.write_many(readings)
+    ```
+"""
+
+import gzip
+import io
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+COMPRESSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+
+def infer_compression(path):
+    """Returns "gzip", "zstd" or None from the file suffix."""
+    return COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def _resolve(path, compression):
+    if compression == "infer":
+        return infer_compression(path)
+    if compression not in (None, "gzip", "zstd"):
+        raise ValueError(f"Unsupported compression {compression!r}")
+    return compression
+
+
+def _compressor(raw, compression):
+    """Wraps a binary file in a compressing writer that leaves `raw` open."""
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="wb")
+    if compression == "zstd":
+        try:
+            import zstandard  # pylint: disable=import-outside-toplevel
+        except ImportError as error:
+            raise ImportError("zstd compression requires the 'zstandard' package") from error
+        return zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+    return raw
+
+
+def _dumps(record):
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+
+
+@contextmanager
+def atomic_writer(path, compression="infer", encoding="utf-8"):
+    """
+    Opens a text stream whose content replaces `path` only when the block
+    completes without error.
+
+    Args:
+        path (str): The destination file.
+        compression (str): "infer" from the suffix, "gzip", "zstd" or None.
+        encoding (str): The text encoding.
+
+    Yields:
+        A writable text stream.
+    """
+    compression = _resolve(path, compression)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory
+    )
+    raw = os.fdopen(fd, "wb")
+    try:
+        binary = _compressor(raw, compression)
+        stream = io.TextIOWrapper(binary, encoding=encoding, newline="\n")
+        yield stream
+
+        stream.flush()
+        stream.detach()
+        if binary is not raw:
+            binary.close()
+        raw.flush()
+        os.fsync(raw.fileno())
+        raw.close()
+
+        mode = os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        raw.close()
+        os.unlink(temp_path)
+        raise
+
+
+def write_ndjson(path, records, compression="infer"):
+    """
+    Atomically writes records as NDJSON, one JSON document per line.
+
+    Args:
+        path (str): The destination file.
+        records (iterable): The records to write; consumed lazily.
+        compression (str): "infer" from the suffix, "gzip", "zstd" or None.
+
+    Returns:
+        The number of records written.
+    """
+    count = 0
+    with atomic_writer(path, compression) as stream:
+        for record in records:
+            stream.write(_dumps(record))
+            stream.write("\n")
+            count += 1
+    return count
+
+
+def write_json_array(path, records, compression="infer"):
+    """
+    Atomically writes records as a JSON array, streaming one element at a time.
+
+    Returns:
+        The number of records written.
+    """
+    count = 0
+    with atomic_writer(path, compression) as stream:
+        stream.write("[")
+        for record in records:
+            stream.write(",\n" if count else "\n")
+            stream.write(_dumps(record))
+            count += 1
+        stream.write("\n]\n" if count else "]\n")
+    return count
+
+
+def write_json(path, document, compression="infer", indent=4):
+    """Atomically writes a single JSON document."""
+    with atomic_writer(path, compression) as stream:
+        # json.dump encodes in chunks instead of building the whole string.
+        json.dump(document, stream, indent=indent, ensure_ascii=False)
+
+
+def _rotated_path(path, index):
+    base, extension = os.path.splitext(path)
+    return f"{base}.{index}{extension}"
+
+
+class RotatingNDJSONWriter:
+    """
+    Appends NDJSON records to a file for long-running pollers, rotating it
+    to `name.1.ext`, `name.2.ext`, ... once it grows past a size or record limit.
+
+    A compressed file is never appended to: after a crash its last member may
+    be truncated, and readers would stop there. An existing non-empty
+    compressed file is rotated away when the writer opens instead.
+    """
+
+    def __init__(self, path, max_bytes=None, max_records=None, backups=5, compression="infer"):
+        """
+        Initializes the writer and opens `path` for appending.
+
+        Args:
+            path (str): The active file.
+            max_bytes (int): Rotate once this many uncompressed bytes are in
+                the active file. The size of an existing uncompressed file
+                counts too; compressed files always start empty.
+            max_records (int): Rotate once this many records were written to
+                the active file by this writer.
+            backups (int): Number of rotated files kept.
+            compression (str): "infer" from the suffix, "gzip", "zstd" or None.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_records = max_records
+        self.backups = backups
+        self.compression = _resolve(path, compression)
+        self._raw = None
+        self._stream = None
+        self._bytes = 0
+        self._records = 0
+        self._open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def _open(self):
+        if self.compression and os.path.exists(self.path) and os.path.getsize(self.path):
+            self._shift_backups()
+        self._raw = open(self.path, "ab")
+        # Only an uncompressed file is appended to, so its size is its content.
+        self._bytes = self._raw.tell()
+        self._records = 0
+        self._stream = io.TextIOWrapper(
+            _compressor(self._raw, self.compression), encoding="utf-8", newline="\n"
+        )
+
+    def _should_rotate(self):
+        if self.max_bytes is not None and self._bytes >= self.max_bytes:
+            return True
+        return self.max_records is not None and self._records >= self.max_records
+
+    def write(self, record):
+        """Appends one record, rotating first when the active file is full."""
+        if self._should_rotate():
+            self.rotate()
+        line = _dumps(record) + "\n"
+        self._stream.write(line)
+        self._bytes += len(line.encode("utf-8"))
+        self._records += 1
+
+    def write_many(self, records):
+        """Appends several records and flushes them to disk."""
+        for record in records:
+            self.write(record)
+        self.flush()
+
+    def flush(self):
+        """Pushes buffered records to the operating system."""
+        self._stream.flush()
+        binary = self._stream.buffer
+        if binary is not self._raw:
+            binary.flush()
+        self._raw.flush()
+
+    def rotate(self):
+        """Closes the active file, shifts the backups and starts a new file."""
+        self.close()
+        self._shift_backups()
+        self._open()
+
+    def _shift_backups(self):
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else _rotated_path(self.path, index - 1)
+            if os.path.exists(source):
+                os.replace(source, _rotated_path(self.path, index))
+        if self.backups < 1 and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def close(self):
+        """Flushes and closes the active file."""
+        if self._stream is None:
+            return
+        self._stream.flush()
+        binary = self._stream.detach()
+        if binary is not self._raw:
+            binary.close()
+        self._raw.close()
+        self._stream = None
+        self._raw = None
@@ -0,0 +1,184 @@
+"""Multi-tenant SmartTyre client pool.
+
+One `ClientPool` serves many customers, each with its own credentials, over a
+single shared transport and its connection pool. Every tenant gets its own `SmartTyreAPI` (and
+therefore its own access-token cache) and an optional rate budget; clients of
+tenants that stay idle are evicted and rebuilt on their next use.
+
+Example:
+    ```python
+    pool = ClientPool("https://www.dajintruck.com", rate=5)
+    pool.register("acme", client_id, client_secret, sign_key)
+    vehicles = pool.get("acme").get_vehicle_list()
+    ```
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from ratelimit import TokenBucket
+from smarttyre_api import SmartTyreAPI
+from transport import RequestsTransport
+
+
+class ClientPool:
+    """
+    Multiplexes many tenants' credentials over one shared transport.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        transport=None,
+        pool_maxsize=32,
+        idle_timeout=600,
+        max_tenants=None,
+        rate=None,
+        burst=None,
+        token_store=None,
+        scheduler=None,
+    ):
+        """
+        Initializes the pool.
+
+        Args:
+            base_url (str): The base URL of the Smart Tyre API.
+            transport: Shared transport (see the `transport` module). Defaults
+                to a `RequestsTransport` with `pool_maxsize` connections per
+                host, created on first use.
+            pool_maxsize (int): Connections kept per host by the default transport.
+            idle_timeout (float): Seconds after which an unused tenant client
+                is evicted, by `evict_idle` or by `get` at most once per
+                interval. None keeps clients forever.
+            max_tenants (int): Maximum live tenant clients; the least recently
+                used one is evicted beyond it.
+            rate (float): Default requests per second allowed per tenant.
+                None disables rate limiting.
+            burst (float): Default burst size per tenant.
+            token_store: Optional store shared by the tenant clients, so
+                tokens survive eviction and are shared with other processes.
+            scheduler (RequestScheduler): Optional `scheduler.RequestScheduler`
+                shared by the tenant clients, so their requests share the
+                connection slots by priority class.
+        """
+        self.base_url = base_url
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        self.max_tenants = max_tenants
+        self.rate = rate
+        self.burst = burst
+        self.token_store = token_store
+        self.scheduler = scheduler
+        self._transport = transport
+        self._credentials = {}
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_eviction = None if idle_timeout is None else time.monotonic() + idle_timeout
+
+    @property
+    def transport(self):
+        """The shared transport."""
+        with self._lock:
+            if self._transport is None:
+                self._transport = RequestsTransport(self.pool_maxsize)
+            return self._transport
+
+    def register(self, tenant, client_id, client_secret, sign_key, rate=None, burst=None):
+        """
+        Registers or replaces a tenant's credentials.
+
+        Args:
+            tenant (str): The tenant key used with `get`.
+            client_id (str): The client ID for authentication.
+            client_secret (str): The client secret for authentication.
+            sign_key (str): The signing key used to generate the signature.
+            rate (float): Requests per second for this tenant. Defaults to the pool rate.
+            burst (float): Burst size for this tenant. Defaults to the pool burst.
+        """
+        rate = rate if rate is not None else self.rate
+        bucket = TokenBucket(rate, burst if burst is not None else self.burst) if rate else None
+        with self._lock:
+            self._credentials[tenant] = (client_id, client_secret, sign_key, bucket)
+            self._clients.pop(tenant, None)
+
+    def unregister(self, tenant):
+        """Forgets a tenant and its client."""
+        with self._lock:
+            self._credentials.pop(tenant, None)
+            self._clients.pop(tenant, None)
+
+    def get(self, tenant):
+        """
+        Returns the tenant's client, building it on first use. Idle clients
+        are evicted on the way, at most once per `idle_timeout`.
+
+        Raises:
+            KeyError: If the tenant was never registered.
+        """
+        transport = self.transport
+        now = time.monotonic()
+        with self._lock:
+            if self._next_eviction is not None and now >= self._next_eviction:
+                self._evict_idle(now)
+            entry = self._clients.get(tenant)
+            if entry is not None:
+                self._clients.move_to_end(tenant)
+                entry[1] = now
+                return entry[0]
+
+            client_id, client_secret, sign_key, bucket = self._credentials[tenant]
+            client = SmartTyreAPI(
+                self.base_url,
+                client_id,
+                client_secret,
+                sign_key,
+                token_store=self.token_store,
+                transport=transport,
+                scheduler=self.scheduler,
+                rate_limit=bucket,
+            )
+            self._clients[tenant] = [client, now]
+            if self.max_tenants is not None:
+                while len(self._clients) > self.max_tenants:
+                    self._clients.popitem(last=False)
+            return client
+
+    def evict_idle(self):
+        """
+        Drops the clients of tenants idle for longer than `idle_timeout`.
+
+        Returns:
+            The evicted tenant keys.
+        """
+        if self.idle_timeout is None:
+            return []
+        with self._lock:
+            return self._evict_idle(time.monotonic())
+
+    def _evict_idle(self, now):
+        # Clients are kept in least recently used order, so the idle ones lead.
+        cutoff = now - self.idle_timeout
+        evicted = []
+        while self._clients and next(iter(self._clients.values()))[1] < cutoff:
+            evicted.append(self._clients.popitem(last=False)[0])
+        self._next_eviction = now + self.idle_timeout
+        return evicted
+
+    def tenants(self):
+        """The registered tenant keys."""
+        with self._lock:
+            return list(self._credentials)
+
+    def active(self):
+        """The tenant keys with a live client."""
+        with self._lock:
+            return list(self._clients)
+
+    def close(self):
+        """Drops every client and closes the shared transport."""
+        with self._lock:
+            self._clients.clear()
+            transport, self._transport = self._transport, None
+        if transport is not None and hasattr(transport, "close"):
+            transport.close()
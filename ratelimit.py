@@ -0,0 +1,71 @@
+"""Rate budgets for SmartTyre API requests."""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket: `rate` requests per second on average, with
+    bursts of up to `burst` requests.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        """
+        Initializes a full bucket.
+
+        Args:
+            rate (float): Tokens added per second.
+            burst (float): Bucket capacity. Defaults to `rate`, at least 1.
+            clock (callable): Monotonic time source, replaceable in tests.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Takes `tokens` if available right now. Returns whether it did."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def delay(self, tokens=1):
+        """Seconds until `tokens` are available, 0 when they already are."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Blocks until `tokens` are taken.
+
+        Args:
+            tokens (float): The number of tokens to take.
+            timeout (float): Maximum seconds to wait, None to wait forever.
+
+        Returns:
+            True when the tokens were taken, False when the timeout expired.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire(tokens):
+            wait = self.delay(tokens)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+        return True
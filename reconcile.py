@@ -0,0 +1,331 @@
+"""Desired-state reconciliation for vehicles, tyres, sensors and TBoxes.
+
+Instead of calling every `update_*` method for every record on every run, a
+`Reconciler` fetches the current remote state in bulk through the list
+endpoints, compares it with the desired state and sends only the calls that
+change something: inserts for new records, updates for records whose fields
+differ, and the unbind/bind calls needed to move tyres and sensors to their
+desired positions.
+
+Example:
+    ```python
+    desired = {
+        "tires": [{"tyreCode": "ABC123", "tyreBrandId": "8", "tyreSizeId": "121",
+                   "tyrePattern": "Pattern B", "initialTreadDepth": "12"}],
+        "mounts": [{"vehicleId": 7543, "tyreCode": "ABC123", "axleIndex": 1,
+                    "wheelIndex": 2, "sensorCode": "A1B2C3D4E5F6"}],
+    }
+    reconciler = Reconciler(api)
+    plan = reconciler.plan(desired)
+    print(plan.summary())  # {"update_tire": 1, "bind_sensor_to_tire": 1, "unchanged": 41}
+    results = reconciler.apply(plan, workers=8)
+    ```
+
+Fields missing from the list records are compared against the detail
+endpoint, fetched only for the records that need it. Mounts may name the
+vehicle by `vehicleId` or `licensePlateNumber`; mounts on vehicles that do
+not exist remotely yet are applied on the next run, once the vehicle has an
+ID.
+"""
+
+import contextvars
+import json
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from topology import FleetIndex
+
+# Resource -> (key field, list method, detail method, insert method, update method).
+RESOURCES = {
+    "vehicles": ("licensePlateNumber", "get_vehicle_list", "get_vehicle_info",
+                 "add_vehicle", "update_vehicle"),
+    "tires": ("tyreCode", "get_tire_list", "get_tire_info", "add_tire", "update_tire"),
+    "sensors": ("sensorCode", "get_sensor_list", "get_sensor_info", "add_sensor",
+                "update_sensor"),
+    "tboxes": ("tboxCode", "get_tboxes_list", "get_tbox_info", "add_tbox", "update_tbox"),
+}
+
+# Calls of an earlier phase finish before the next phase starts.
+PHASES = (
+    ("add_vehicle", "update_vehicle", "add_tire", "update_tire", "add_sensor",
+     "update_sensor", "add_tbox", "update_tbox"),
+    ("unbind_sensor_from_tire",),
+    ("unbind_tire_from_vehicle",),
+    ("bind_tire_to_vehicle",),
+    ("bind_sensor_to_tire",),
+)
+
+Change = namedtuple("Change", ["method", "args", "reason"])
+
+
+def _same(desired, remote):
+    """Compares loosely typed API values: 10, "10" and "10.0" are equal."""
+    if desired == remote:
+        return True
+    if desired is None or remote is None:
+        return False
+    try:
+        return float(desired) == float(remote)
+    except (TypeError, ValueError):
+        return str(desired).strip() == str(remote).strip()
+
+
+class Plan:
+    """
+    The calls needed to reach the desired state, grouped by phase.
+    """
+
+    def __init__(self):
+        self.changes = []
+        self.unchanged = 0
+        self.unresolved = []
+        self._keys = set()
+
+    def add(self, method, reason, **args):
+        """
+        Adds a call to the plan, unless the same call is already planned.
+        Vehicle IDs given as 7543 and "7543" are the same vehicle.
+        """
+        canonical = dict(args)
+        if canonical.get("vehicle_id") is not None:
+            canonical["vehicle_id"] = str(canonical["vehicle_id"])
+        key = (method, json.dumps(canonical, sort_keys=True, default=str))
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        self.changes.append(Change(method, args, reason))
+
+    def phases(self):
+        """Yields the changes of each phase, in execution order."""
+        for methods in PHASES:
+            changes = [change for change in self.changes if change.method in methods]
+            if changes:
+                yield changes
+
+    def summary(self):
+        """The number of planned calls per method, plus unchanged records."""
+        counts = Counter(change.method for change in self.changes)
+        counts["unchanged"] = self.unchanged
+        if self.unresolved:
+            counts["unresolved"] = len(self.unresolved)
+        return dict(counts)
+
+    def __len__(self):
+        return len(self.changes)
+
+
+class Reconciler:
+    """
+    Plans and applies the minimal set of calls from the remote state to a
+    desired state.
+    """
+
+    def __init__(self, api, workers=8, page_size=100):
+        """
+        Initializes the reconciler.
+
+        Args:
+            api (SmartTyreAPI): The client to read and write through.
+            workers (int): Concurrent detail fetches while planning.
+            page_size (int): Records requested per list page.
+        """
+        self.api = api
+        self.workers = workers
+        self.page_size = page_size
+
+    def _map(self, function, items, workers):
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, function, item) for item in items
+            ]
+            return [future.result() for future in futures]
+
+    # Remote state
+
+    def fetch(self, resources=RESOURCES):
+        """
+        Fetches the remote records of each resource.
+
+        Returns:
+            A dict of `{resource: {key: record}}`.
+        """
+        state = {}
+        for resource in resources:
+            key_field, list_name = RESOURCES[resource][:2]
+            records = self.api.iter_records(
+                getattr(self.api, list_name), page_size=self.page_size
+            )
+            state[resource] = {
+                str(record[key_field]): record
+                for record in records if record.get(key_field) not in (None, "")
+            }
+        return state
+
+    def _details(self, resource, remote_records):
+        detail = getattr(self.api, RESOURCES[resource][2])
+        return self._map(lambda record: detail(record["id"]) or {}, remote_records, self.workers)
+
+    # Planning
+
+    def _plan_records(self, plan, resource, desired_records, remote):
+        key_field, _, _, insert_name, update_name = RESOURCES[resource]
+        incomplete = []
+        for desired in desired_records:
+            key = str(desired[key_field])
+            current = remote.get(key)
+            if current is None:
+                plan.add(insert_name, "missing", **{self._info_arg(insert_name): desired})
+                continue
+            fields = [field for field in desired if field != "id"]
+            if any(field not in current for field in fields):
+                incomplete.append((desired, current))
+                continue
+            self._compare(plan, update_name, desired, current)
+
+        if incomplete:
+            details = self._details(resource, [current for _, current in incomplete])
+            for (desired, current), detail in zip(incomplete, details):
+                self._compare(plan, update_name, desired, {**current, **detail})
+
+    @staticmethod
+    def _info_arg(method):
+        return {
+            "vehicle": "vehicle_info", "tire": "tire_info",
+            "sensor": "sensor_info", "tbox": "tbox_info",
+        }[method.split("_", 1)[1]]
+
+    def _compare(self, plan, update_name, desired, current):
+        changed = sorted(
+            field for field, value in desired.items()
+            if field != "id" and not _same(value, current.get(field))
+        )
+        if not changed:
+            plan.unchanged += 1
+            return
+        plan.add(
+            update_name,
+            f"changed: {', '.join(changed)}",
+            **{self._info_arg(update_name): {**desired, "id": current["id"]}},
+        )
+
+    def _plan_mounts(self, plan, mounts, state, index):
+        plates = {plate: record["id"] for plate, record in state.get("vehicles", {}).items()}
+        # The index keys vehicles by str(id); calls carry the ID as the API sent it.
+        remote_ids = {str(vehicle_id): vehicle_id for vehicle_id in plates.values()}
+
+        def remote(vehicle_id):
+            return remote_ids.get(vehicle_id, vehicle_id)
+
+        for mount in mounts:
+            vehicle_id = mount.get("vehicleId")
+            if vehicle_id is None:
+                vehicle_id = plates.get(str(mount.get("licensePlateNumber")))
+            if vehicle_id is None:
+                plan.unresolved.append(mount)
+                continue
+            vehicle_id = remote_ids.get(str(vehicle_id), vehicle_id)
+            tyre = str(mount["tyreCode"])
+            axle, wheel = int(mount["axleIndex"]), int(mount["wheelIndex"])
+            position = (str(vehicle_id), axle, wheel)
+            sensor = mount.get("sensorCode")
+            current_sensor = index.sensor_of_tyre(tyre)
+
+            if index.position_of_tyre(tyre) != position:
+                occupant = index.tyre_at(vehicle_id, axle, wheel)
+                if occupant is not None:
+                    plan.add("unbind_tire_from_vehicle", f"replaced by {tyre}",
+                             vehicle_id=vehicle_id, tire_id=occupant)
+                old_position = index.position_of_tyre(tyre)
+                if old_position is not None:
+                    if current_sensor is not None:
+                        plan.add("unbind_sensor_from_tire", "tyre moves",
+                                 tire_code=tyre, vehicle_id=remote(old_position[0]),
+                                 axle_index=old_position[1], wheel_index=old_position[2],
+                                 sensor_code=current_sensor)
+                        if sensor is None:
+                            # No sensor given: the tyre keeps its own at the new position.
+                            sensor = current_sensor
+                        current_sensor = None
+                    plan.add("unbind_tire_from_vehicle", "tyre moves",
+                             vehicle_id=remote(old_position[0]), tire_id=tyre)
+                plan.add("bind_tire_to_vehicle", "not mounted here",
+                         vehicle_id=vehicle_id, tire_code=tyre,
+                         axle_index=axle, wheel_index=wheel)
+            elif sensor is None or str(sensor) == current_sensor:
+                plan.unchanged += 1
+                continue
+
+            if sensor is None or str(sensor) == current_sensor:
+                continue
+            if current_sensor is not None:
+                plan.add("unbind_sensor_from_tire", f"replaced by {sensor}",
+                         tire_code=tyre, vehicle_id=vehicle_id, axle_index=axle,
+                         wheel_index=wheel, sensor_code=current_sensor)
+            other_tyre = index.tyre_of_sensor(sensor)
+            if other_tyre is not None and other_tyre != tyre:
+                other = index.position_of_tyre(other_tyre) or (None, None, None)
+                plan.add("unbind_sensor_from_tire", f"moves to {tyre}",
+                         tire_code=other_tyre, vehicle_id=remote(other[0]), axle_index=other[1],
+                         wheel_index=other[2], sensor_code=sensor)
+            plan.add("bind_sensor_to_tire", "not fitted",
+                     tire_code=tyre, vehicle_id=vehicle_id, axle_index=axle,
+                     wheel_index=wheel, sensor_code=sensor)
+
+    def plan(self, desired):
+        """
+        Compares the desired state with the remote state.
+
+        Args:
+            desired (dict): Lists of records under "vehicles", "tires",
+                "sensors" and "tboxes", in the format of the insert methods,
+                and optionally "mounts": dicts with `tyreCode`, `axleIndex`,
+                `wheelIndex`, `vehicleId` or `licensePlateNumber`, and an
+                optional `sensorCode`. Without it, a tyre keeps its current
+                sensor, also when it moves.
+
+        Returns:
+            A `Plan`.
+        """
+        resources = [resource for resource in RESOURCES if desired.get(resource)]
+        mounts = desired.get("mounts") or []
+        if mounts:
+            resources = list(RESOURCES)
+        state = self.fetch(resources)
+
+        plan = Plan()
+        for resource in resources:
+            if desired.get(resource):
+                self._plan_records(plan, resource, desired[resource], state[resource])
+        if mounts:
+            index = FleetIndex()
+            for record in state["vehicles"].values():
+                index.add_vehicle_record(record)
+            for record in state["tboxes"].values():
+                index.add_tbox_record(record)
+            for record in state["tires"].values():
+                index.add_tyre_record(record)
+            for record in state["sensors"].values():
+                index.add_sensor_record(record)
+            self._plan_mounts(plan, mounts, state, index)
+        return plan
+
+    # Applying
+
+    def _call(self, change):
+        try:
+            result = getattr(self.api, change.method)(**change.args)
+        except Exception as error:  # pylint: disable=broad-except
+            return change, None, str(error)
+        return change, result, None if result is not None else "request failed"
+
+    def apply(self, plan, workers=8):
+        """
+        Executes a plan, phase by phase, with the calls of a phase in parallel.
+
+        Returns:
+            A list of `(change, result, error)` tuples, `error` being None on success.
+        """
+        results = []
+        for changes in plan.phases():
+            results.extend(self._map(self._call, changes, workers))
+        return results
@@ -0,0 +1,346 @@
+"""Incrementally maintained fleet health rollups.
+
+Keeps running aggregates of tyre pressure, temperature and tread depth per
+vehicle, per organization (`orgId`), per tyre brand and for the whole fleet.
+Each batch of readings updates the aggregates in place (count, sum, min,
+max and a quantile sketch), so dashboards read precomputed values instead of
+recomputing over the whole history.
+
+Percentiles come from a `QuantileSketch`: logarithmic buckets with a
+relative error of `alpha` (1% by default), whose size depends on the value
+range, not on the number of readings. Sketches and rollups merge, so shards
+built by different processes can be combined, and `to_dict`/`from_dict`
+save and restore them as JSON.
+
+Example:
+    ```python
+    rollups = FleetRollups()
+    rollups.load_attributes(api)
+    tires_info = api.get_tires_info_by_vehicle(vehicle_id)
+    rollups.add(readings_from_tires_info(vehicle_id, tires_info, fields=ROLLUP_FIELDS))
+    rollups.get("orgId", "218", "pressure").to_dict()
+    # {"count": 5120, "mean": 8.4, "min": 6.1, "max": 9.8, "p50": 8.5, ...}
+    ```
+"""
+
+import math
+import threading
+
+from alerts import FIELDS
+
+# Reading field -> field name in the tyre data, for `readings_from_tires_info`.
+ROLLUP_FIELDS = {
+    **FIELDS,
+    "treadDepth": "newTreadDepth",
+    "orgId": "orgId",
+    "tyreBrandId": "tyreBrandId",
+}
+
+METRICS = ("pressure", "temperature", "treadDepth")
+DIMENSIONS = ("fleet", "vehicleId", "orgId", "tyreBrandId")
+PERCENTILES = (50, 90, 99)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy `alpha`.
+
+    A value `x` is counted in bucket `ceil(log(|x|) / log(gamma))` with
+    `gamma = (1 + alpha) / (1 - alpha)`, so every quantile is returned within
+    `alpha * |x|` of the true value.
+    """
+
+    def __init__(self, alpha=0.01):
+        self.alpha = alpha
+        self._gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self._gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _bucket(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, bucket):
+        return 2 * self._gamma ** bucket / (self._gamma + 1)
+
+    def add(self, value):
+        """Counts one value."""
+        if value > 0:
+            bucket = self._bucket(value)
+            self.positive[bucket] = self.positive.get(bucket, 0) + 1
+        elif value < 0:
+            bucket = self._bucket(-value)
+            self.negative[bucket] = self.negative.get(bucket, 0) + 1
+        else:
+            self.zeros += 1
+        self.count += 1
+
+    def merge(self, other):
+        """Adds the counts of a sketch with the same `alpha`."""
+        if other.alpha != self.alpha:
+            raise ValueError("Only sketches with the same alpha can be merged")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for bucket, count in theirs.items():
+                mine[bucket] = mine.get(bucket, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def quantile(self, q):
+        """The value at quantile `q` (0 to 1), or None when empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for bucket in sorted(self.negative, reverse=True):
+            seen += self.negative[bucket]
+            if seen > rank:
+                return -self._value(bucket)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for bucket in sorted(self.positive):
+            seen += self.positive[bucket]
+            if seen > rank:
+                return self._value(bucket)
+        return self._value(max(self.positive))
+
+    def to_dict(self):
+        """A JSON-serializable form, read back by `from_dict`."""
+        return {
+            "alpha": self.alpha,
+            "positive": {str(bucket): count for bucket, count in self.positive.items()},
+            "negative": {str(bucket): count for bucket, count in self.negative.items()},
+            "zeros": self.zeros,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuilds a sketch saved with `to_dict`."""
+        sketch = cls(data["alpha"])
+        sketch.positive = {int(bucket): count for bucket, count in data["positive"].items()}
+        sketch.negative = {int(bucket): count for bucket, count in data["negative"].items()}
+        sketch.zeros = data["zeros"]
+        sketch.count = sketch.zeros + sum(sketch.positive.values()) + sum(sketch.negative.values())
+        return sketch
+
+
+class Summary:
+    """
+    Running count, sum, min, max and quantile sketch of one metric.
+    """
+
+    def __init__(self, alpha=0.01):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(alpha)
+
+    def add(self, value):
+        """Adds one value."""
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.sketch.add(value)
+
+    def merge(self, other):
+        """Adds another summary of the same metric."""
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self):
+        """The mean, or None when empty."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percentile):
+        """The approximate percentile (0 to 100), clamped to the exact min and max."""
+        value = self.sketch.quantile(percentile / 100)
+        if value is None:
+            return None
+        return min(self.max, max(self.min, value))
+
+    def to_dict(self, percentiles=PERCENTILES):
+        """The aggregates, with `p<N>` entries for `percentiles`."""
+        summary = {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+        for percentile in percentiles:
+            summary[f"p{percentile}"] = self.percentile(percentile)
+        return summary
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+class FleetRollups:
+    """
+    Per-dimension summaries of every metric, updated reading by reading.
+    """
+
+    def __init__(self, metrics=METRICS, dimensions=DIMENSIONS, alpha=0.01):
+        """
+        Initializes empty rollups.
+
+        Args:
+            metrics (tuple): Reading fields to aggregate.
+            dimensions (tuple): Reading fields to group by; "fleet" groups
+                every reading together.
+            alpha (float): Relative accuracy of the percentiles.
+        """
+        self.metrics = metrics
+        self.dimensions = dimensions
+        self.alpha = alpha
+        self._summaries = {}
+        self._vehicles = {}
+        self._tyres = {}
+        self._lock = threading.Lock()
+
+    # Attributes
+
+    def describe_vehicle(self, vehicle_id, **attributes):
+        """Sets attributes, such as `orgId`, used for readings of a vehicle."""
+        self._vehicles.setdefault(str(vehicle_id), {}).update(attributes)
+
+    def describe_tyre(self, tyre_code, **attributes):
+        """Sets attributes, such as `tyreBrandId`, used for readings of a tyre."""
+        self._tyres.setdefault(str(tyre_code), {}).update(attributes)
+
+    def load_attributes(self, api, page_size=100):
+        """Reads vehicle `orgId` and tyre `orgId`/`tyreBrandId` from the list endpoints."""
+        for record in api.iter_records(api.get_vehicle_list, page_size=page_size):
+            if record.get("id") is not None:
+                self.describe_vehicle(record["id"], orgId=record.get("orgId"))
+        for record in api.iter_records(api.get_tire_list, page_size=page_size):
+            if record.get("tyreCode") is not None:
+                self.describe_tyre(
+                    record["tyreCode"],
+                    orgId=record.get("orgId"),
+                    tyreBrandId=record.get("tyreBrandId"),
+                )
+
+    def _group(self, reading, dimension):
+        if dimension == "fleet":
+            return "fleet"
+        value = reading.get(dimension)
+        if value is None:
+            value = self._tyres.get(str(reading.get("tyreCode")), {}).get(dimension)
+        if value is None:
+            value = self._vehicles.get(str(reading.get("vehicleId")), {}).get(dimension)
+        return None if value is None else str(value)
+
+    # Updates
+
+    def add(self, readings):
+        """
+        Adds readings, e.g. from `alerts.readings_from_tires_info` with
+        `fields=ROLLUP_FIELDS`. Readings without a value for a dimension are
+        left out of that dimension only.
+
+        Returns:
+            The number of readings added.
+        """
+        count = 0
+        with self._lock:
+            for reading in readings:
+                values = [(metric, _number(reading.get(metric))) for metric in self.metrics]
+                values = [(metric, value) for metric, value in values if value is not None]
+                for dimension in self.dimensions:
+                    group = self._group(reading, dimension)
+                    if group is None:
+                        continue
+                    for metric, value in values:
+                        key = (dimension, group, metric)
+                        summary = self._summaries.get(key)
+                        if summary is None:
+                            summary = self._summaries[key] = Summary(self.alpha)
+                        summary.add(value)
+                count += 1
+        return count
+
+    def merge(self, other):
+        """Adds the summaries of other rollups, e.g. from another process."""
+        with self._lock:
+            for key, summary in other._summaries.items():  # pylint: disable=protected-access
+                mine = self._summaries.get(key)
+                if mine is None:
+                    mine = self._summaries[key] = Summary(self.alpha)
+                mine.merge(summary)
+
+    # Serialization
+
+    def to_dict(self):
+        """A JSON-serializable form of the rollups and attributes, read back by `from_dict`."""
+        with self._lock:
+            summaries = [
+                {
+                    "dimension": dimension,
+                    "group": group,
+                    "metric": metric,
+                    "count": summary.count,
+                    "total": summary.total,
+                    "min": summary.min,
+                    "max": summary.max,
+                    "sketch": summary.sketch.to_dict(),
+                }
+                for (dimension, group, metric), summary in self._summaries.items()
+            ]
+            return {
+                "metrics": list(self.metrics),
+                "dimensions": list(self.dimensions),
+                "alpha": self.alpha,
+                "vehicles": {key: dict(value) for key, value in self._vehicles.items()},
+                "tyres": {key: dict(value) for key, value in self._tyres.items()},
+                "summaries": summaries,
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuilds rollups saved with `to_dict`."""
+        rollups = cls(tuple(data["metrics"]), tuple(data["dimensions"]), data["alpha"])
+        rollups._vehicles = {key: dict(value) for key, value in data["vehicles"].items()}
+        rollups._tyres = {key: dict(value) for key, value in data["tyres"].items()}
+        for entry in data["summaries"]:
+            summary = Summary(rollups.alpha)
+            summary.count = entry["count"]
+            summary.total = entry["total"]
+            summary.min = entry["min"]
+            summary.max = entry["max"]
+            summary.sketch = QuantileSketch.from_dict(entry["sketch"])
+            rollups._summaries[(entry["dimension"], entry["group"], entry["metric"])] = summary
+        return rollups
+
+    # Queries
+
+    def get(self, dimension, group, metric):
+        """The `Summary` of a metric for one group, or None."""
+        group = "fleet" if dimension == "fleet" else str(group)
+        return self._summaries.get((dimension, group, metric))
+
+    def groups(self, dimension):
+        """The groups seen for a dimension."""
+        return sorted({group for key_dimension, group, _ in self._summaries
+                       if key_dimension == dimension})
+
+    def snapshot(self, dimension, metric, percentiles=PERCENTILES):
+        """`{group: summary dict}` for one dimension and metric."""
+        with self._lock:
+            return {
+                group: summary.to_dict(percentiles)
+                for (key_dimension, group, key_metric), summary in self._summaries.items()
+                if key_dimension == dimension and key_metric == metric
+            }
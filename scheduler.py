@@ -0,0 +1,202 @@
+"""Priority-aware scheduling of SmartTyre requests.
+
+A `RequestScheduler` attached to one or more `SmartTyreAPI` clients limits
+how many requests are in flight at once and, optionally, how many start per
+second. Requests waiting for a slot are queued by priority class:
+
+- `INTERACTIVE`: lookups a user is waiting for (the default).
+- `TELEMETRY`: polling of live tyre data.
+- `BULK`: sweeps, imports and other background jobs.
+
+Classes share the slots by weight (stride scheduling), so background work
+keeps making progress, and a class that was idle does not get credit for it:
+an interactive request arriving behind a long bulk queue is served next. Bulk
+requests never take the last `reserved` slots, so interactive calls find a
+free connection even while a sweep saturates the rest.
+
+Example:
+    ```python
+    scheduler = RequestScheduler(slots=8, rate=20)
+    api = SmartTyreAPI(base_url, client_id, client_secret, sign_key, scheduler=scheduler)
+
+    with priority(BULK):
+        for tire in api.iter_records(api.get_tire_list):
+            ...
+    ```
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from deadline import DeadlineExceeded, current_deadline
+from ratelimit import TokenBucket
+
+INTERACTIVE = "interactive"
+TELEMETRY = "telemetry"
+BULK = "bulk"
+CLASSES = (INTERACTIVE, TELEMETRY, BULK)
+DEFAULT_WEIGHTS = {INTERACTIVE: 16, TELEMETRY: 4, BULK: 1}
+
+_PRIORITY = contextvars.ContextVar("smarttyre_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(name):
+    """
+    Runs the block's requests in class `name`. Threads started inside the
+    block inherit it only when run through `contextvars.copy_context()`.
+    """
+    if name not in CLASSES:
+        raise ValueError(f"Unknown priority class {name!r}")
+    token = _PRIORITY.set(name)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority():
+    """The priority class of requests made now."""
+    return _PRIORITY.get()
+
+
+class RequestScheduler:
+    """
+    Shares request slots and a rate budget between priority classes.
+    """
+
+    def __init__(self, slots=8, rate=None, burst=None, weights=None, reserved=1):
+        """
+        Initializes the scheduler.
+
+        Args:
+            slots (int): Requests allowed in flight at once.
+            rate (float): Requests started per second. None disables the limit.
+            burst (float): Burst size of the rate budget.
+            weights (dict): Share of each class when they compete, defaults
+                to `DEFAULT_WEIGHTS`.
+            reserved (int): Slots bulk requests may not use.
+        """
+        self.slots = slots
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.reserved = reserved
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self._cond = threading.Condition()
+        self._queues = {name: deque() for name in CLASSES}
+        self._pass = dict.fromkeys(CLASSES, 0.0)
+        self._in_flight = 0
+        self._granted = dict.fromkeys(CLASSES, 0)
+        self._waited = dict.fromkeys(CLASSES, 0.0)
+        self._held = threading.local()
+
+    def _limit(self, name):
+        if name == BULK:
+            return max(1, self.slots - self.reserved)
+        return self.slots
+
+    def _next_class(self):
+        candidates = [
+            name for name in CLASSES
+            if self._queues[name] and self._in_flight < self._limit(name)
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda name: (self._pass[name], CLASSES.index(name)))
+
+    def _activate(self, name):
+        # A class that was idle starts level with the busiest waiting class.
+        waiting = [self._pass[other] for other in CLASSES if self._queues[other]]
+        if waiting:
+            self._pass[name] = max(self._pass[name], min(waiting))
+
+    def _wait_time(self, name, ticket):
+        """Seconds to wait before trying again, 0 once the slot is taken."""
+        if self._next_class() != name or self._queues[name][0] is not ticket:
+            return None
+        if self.bucket is None or self.bucket.try_acquire():
+            return 0.0
+        return self.bucket.delay()
+
+    def acquire(self):
+        """
+        Waits for a slot for the current priority class. Nested calls from a
+        thread that already holds a slot, such as a token refresh made while
+        signing, pass through.
+
+        Raises:
+            DeadlineExceeded: If the active deadline runs out while queued.
+        """
+        depth = getattr(self._held, "depth", 0)
+        if depth:
+            self._held.depth = depth + 1
+            return
+        name = current_priority()
+        deadline = current_deadline()
+        ticket = object()
+        started = time.monotonic()
+        with self._cond:
+            queue = self._queues[name]
+            if not queue:
+                self._activate(name)
+            queue.append(ticket)
+            try:
+                while True:
+                    wait = self._wait_time(name, ticket)
+                    if wait == 0.0:
+                        break
+                    if deadline is not None:
+                        remaining = deadline.remaining()
+                        if remaining <= 0:
+                            raise DeadlineExceeded("The deadline budget is spent")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                queue.remove(ticket)
+                self._cond.notify_all()
+                raise
+            queue.popleft()
+            self._in_flight += 1
+            self._pass[name] += 1.0 / self.weights[name]
+            self._granted[name] += 1
+            self._waited[name] += time.monotonic() - started
+            self._cond.notify_all()
+        self._held.depth = 1
+
+    def release(self):
+        """Frees the slot taken by `acquire`."""
+        self._held.depth -= 1
+        if self._held.depth:
+            return
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Holds a slot for the block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        """Requests granted, currently queued and mean queueing time per class."""
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "classes": {
+                    name: {
+                        "granted": self._granted[name],
+                        "queued": len(self._queues[name]),
+                        "mean_wait": (
+                            self._waited[name] / self._granted[name]
+                            if self._granted[name] else 0.0
+                        ),
+                    }
+                    for name in CLASSES
+                },
+            }
@@ -1,22 +1,46 @@
 """Smart Tyre API Client
 This module provides a client for interacting with the SmartTyre API.
+
+`requests` is only imported on the first network call, so code that just
+signs payloads or builds clients starts without paying for it.
 """
 
 import json
+import logging
 import secrets
+import threading
 import time
+from contextlib import nullcontext
 
-import requests
-
+from deadline import DeadlineExceeded, current_deadline, expired_error, request_timeout
 from sign_util import SignUtil
 
+# Status codes meaning the access token was rejected. Other failures, such as
+# 404, 429 or 5xx, keep the cached token.
+AUTH_FAILURES = (401, 403)
+
+logger = logging.getLogger(__name__)
+
 
 class SmartTyreAPI:
     """
     A class to interact with the Smart Tyre API.
     """
 
-    def __init__(self, base_url, client_id, client_secret, sign_key):
+    def __init__(
+        self,
+        base_url,
+        client_id,
+        client_secret,
+        sign_key,
+        token_ttl=None,
+        token_store=None,
+        transport=None,
+        timeout=20,
+        hedge=None,
+        scheduler=None,
+        rate_limit=None,
+    ):
         """
         Initializes the SmartTyreAPI with the necessary credentials.
 
@@ -25,15 +49,84 @@ class SmartTyreAPI:
             client_id (str): The client ID for authentication.
             client_secret (str): The client secret for authentication.
             sign_key (str): The signing key used to generate the signature.
+            token_ttl (float): Optional number of seconds an access token is
+                reused. Defaults to the `expiresIn` returned by the API, or
+                five minutes when it is not provided.
+            token_store: Optional store sharing access tokens with other
+                clients, such as a `token_store.FileTokenStore` shared by
+                every worker process on a host.
+            transport: Optional object exposing requests-style `get`/`post`
+                used to send the requests, such as a `requests.Session`, a
+                `cassette.Cassette` or one of the `transport` module classes,
+                or the name of one ("requests", "urllib3"). Defaults to the
+                `requests` module, imported on the first request.
+            timeout (float): Seconds each request may take. Capped by the
+                active `deadline.Deadline`, if any.
+            hedge (HedgePolicy): Optional `hedge.HedgePolicy` hedging slow
+                idempotent reads with a second request.
+            scheduler (RequestScheduler): Optional `scheduler.RequestScheduler`,
+                possibly shared with other clients, queueing requests by
+                priority class for connection slots and rate budget.
+            rate_limit (TokenBucket): Optional `ratelimit.TokenBucket` budget of
+                this client alone, e.g. one tenant of a `pool.ClientPool`. It is
+                spent before a scheduler slot is taken, so a throttled client
+                never holds a shared slot while it waits.
         """
         self.base_url = base_url
         self.client_id = client_id
         self.client_secret = client_secret
         self.sign_key = sign_key
+        self.transport = transport
+        self.timeout = timeout
+        self.hedge = hedge
+        self.scheduler = scheduler
+        self.rate_limit = rate_limit
+        self._listeners = []
+        self.token_ttl = token_ttl
+        self._access_token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self.token_store = token_store
+
+    def _token_key(self):
+        return f"{self.base_url}|{self.client_id}"
+
+    def _adopt_stored_token(self):
+        stored = self.token_store.load(self._token_key())
+        if not stored:
+            return None
+        token, expires_at = stored
+        self._access_token = token
+        self._token_expires_at = time.monotonic() + (expires_at - time.time())
+        return token
+
+    def _cached_access_token(self):
+        if self._access_token and time.monotonic() < self._token_expires_at:
+            return self._access_token
+        # Only one thread authorizes; the others wait and reuse its token.
+        with self._token_lock:
+            if self._access_token and time.monotonic() < self._token_expires_at:
+                return self._access_token
+            if self.token_store is None:
+                return self.get_access_token()
+
+            token = self._adopt_stored_token()
+            if token:
+                return token
+            # Only one client sharing the store refreshes the token.
+            with self.token_store.lock(self._token_key()):
+                return self._adopt_stored_token() or self.get_access_token()
+
+    def _invalidate_access_token(self):
+        token = self._access_token
+        self._access_token = None
+        self._token_expires_at = 0.0
+        if token and self.token_store is not None:
+            self.token_store.discard(self._token_key(), token)
 
     def _new_header(self, need_access_token=True):
         if need_access_token:
-            access_token = self.get_access_token()
+            access_token = self._cached_access_token()
 
             return {
                 "clientId": self.client_id,
@@ -48,6 +141,46 @@ class SmartTyreAPI:
             "nonce": secrets.token_hex(16),
         }
 
+    def add_listener(self, callback):
+        """
+        Registers a callback notified after every successful mutation.
+        Args:
+            callback (callable): Called as `callback(event, details)`, where
+                `event` is the method name (e.g. "bind_tire_to_vehicle") and
+                `details` a dict of its arguments. Exceptions it raises are
+                logged and never reach the caller of the mutation.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """
+        Unregisters a callback added with `add_listener`.
+        """
+        self._listeners.remove(callback)
+
+    def _notify(self, event, result, **details):
+        if result is None:
+            return
+        for callback in list(self._listeners):
+            # The mutation already succeeded; a failing listener must not
+            # make it look failed or keep the other listeners from running.
+            try:
+                callback(event, details)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Listener %r failed on %s", callback, event)
+
+    def _http(self):
+        # pylint: disable=import-outside-toplevel
+        if self.transport is None:
+            import requests
+
+            self.transport = requests
+        elif isinstance(self.transport, str):
+            from transport import new_transport
+
+            self.transport = new_transport(self.transport)
+        return self.transport
+
     def _new_signature(self, headers, body, params, paths):
         return SignUtil.sign(
             headers=headers,
@@ -57,36 +190,78 @@ class SmartTyreAPI:
             sign_key=self.sign_key,
         )
 
+    def _slot(self, charged=True):
+        # Wait for the client's own budget before queueing for a shared slot.
+        # Authorize calls, made while a slot may already be held, are not charged.
+        if charged and self.rate_limit is not None:
+            deadline = current_deadline()
+            timeout = None if deadline is None else max(0.0, deadline.remaining())
+            if not self.rate_limit.acquire(timeout=timeout):
+                raise DeadlineExceeded("The deadline budget is spent")
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot()
+
+    def _send(self, endpoint, send, idempotent):
+        try:
+            if idempotent and self.hedge is not None and self.hedge.applies(endpoint):
+                return self.hedge.call(endpoint, send)
+            return send()
+        except Exception as error:
+            exceeded = expired_error(error)
+            if exceeded is None:
+                raise
+            raise exceeded from error
+
     def _new_get_request(self, endpoint, params):
         url = f"{self.base_url}{endpoint}"
-        headers = self._new_header()
-        headers["sign"] = self._new_signature(headers, "", params, [])
-        headers["Content-Type"] = "application/json"
-        headers["Accept"] = "application/json"
 
-        response = requests.get(url, headers=headers, params=params, timeout=20)
+        def send():
+            # Sign once a slot is free, so queued requests keep a fresh timestamp.
+            with self._slot():
+                headers = self._new_header()
+                headers["sign"] = self._new_signature(headers, "", params, [])
+                headers["Content-Type"] = "application/json"
+                headers["Accept"] = "application/json"
+                return self._http().get(
+                    url, headers=headers, params=params, timeout=request_timeout(self.timeout)
+                )
+
+        response = self._send(endpoint, send, idempotent=True)
         if response.status_code == 200:
             return response.json().get("data")
+        if response.status_code in AUTH_FAILURES:
+            self._invalidate_access_token()
         return None
 
     def _new_post_request(
-        self, endpoint, body, need_access_token=True, returns_data=True
+        self, endpoint, body, need_access_token=True, returns_data=True, idempotent=False
     ):
         url = f"{self.base_url}{endpoint}"
-        headers = self._new_header(need_access_token)
-        headers["sign"] = self._new_signature(headers, body, {}, [])
-        headers["Content-Type"] = "application/json"
-        headers["Accept"] = "application/json"
-        response = requests.post(url, headers=headers, data=body, timeout=20)
+
+        def send():
+            with self._slot(charged=need_access_token):
+                headers = self._new_header(need_access_token)
+                headers["sign"] = self._new_signature(headers, body, {}, [])
+                headers["Content-Type"] = "application/json"
+                headers["Accept"] = "application/json"
+                return self._http().post(
+                    url, headers=headers, data=body, timeout=request_timeout(self.timeout)
+                )
+
+        response = self._send(endpoint, send, idempotent)
         if response.status_code == 200 and returns_data:
             return response.json().get("data")
         if response.status_code == 200:
             return response.json().get("msg")
+        if need_access_token and response.status_code in AUTH_FAILURES:
+            self._invalidate_access_token()
         return None
 
     def get_access_token(self):
         """
-        Obtains an access token from the Smart Tyre API.
+        Obtains a new access token from the Smart Tyre API.
+        The token is cached and reused by the other requests until it expires.
 
         Args:
             base_url (str): The base URL of the Smart Tyre API.
@@ -113,7 +288,62 @@ class SmartTyreAPI:
             need_access_token=False,
         )
 
-        return response.get("accessToken") if response else None
+        if not response or not response.get("accessToken"):
+            return None
+
+        ttl = self.token_ttl
+        if ttl is None:
+            # Keep a safety margin so a token never expires mid-request.
+            ttl = max(float(response.get("expiresIn") or 300) - 30, 0)
+        self._access_token = response["accessToken"]
+        self._token_expires_at = time.monotonic() + ttl
+        if self.token_store is not None:
+            self.token_store.save(self._token_key(), self._access_token, time.time() + ttl)
+        return self._access_token
+
+    def iter_records(self, list_method, params=None, page_size=100):
+        """
+        Walks every page of a list endpoint and yields its records one by one.
+        Args:
+            list_method (callable): One of the list methods, e.g. `self.get_tire_list`.
+            params (dict): Optional filtering parameters, without paging fields.
+            page_size (int): The number of records requested per page.
+        Example:
+            ```python
+            for tire in api.iter_records(api.get_tire_list):
+                print(tire["tyreCode"])
+            ```
+        Note: Iteration stops at the first page that fails or comes back short.
+        When the active deadline runs out, iteration stops early and the
+        unfetched page is recorded in the deadline's `skipped` list.
+        Returns:
+            A generator over the records of all pages.
+        """
+        page = 1
+        seen = 0
+        while True:
+            page_params = dict(params or {})
+            page_params["page"] = [str(page)]
+            page_params["pageSize"] = [str(page_size)]
+
+            try:
+                data = list_method(params=page_params)
+            except DeadlineExceeded:
+                deadline = current_deadline()
+                if deadline is None:
+                    raise
+                deadline.skip((getattr(list_method, "__name__", "list"), page))
+                return
+            if not data:
+                return
+            records = data.get("records") or []
+            yield from records
+
+            seen += len(records)
+            total = int(data.get("total") or 0)
+            if len(records) < page_size or (total and seen >= total):
+                return
+            page += 1
 
     # Vehicle Management
 
@@ -158,11 +388,13 @@ class SmartTyreAPI:
 
         body_str = json.dumps(vehicle_info, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify("add_vehicle", result, vehicle_info=vehicle_info)
+        return result
 
     def update_vehicle(self, vehicle_info):
         """
@@ -207,11 +439,13 @@ class SmartTyreAPI:
 
         body_str = json.dumps(vehicle_info, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify("update_vehicle", result, vehicle_info=vehicle_info)
+        return result
 
     def get_vehicle_list(self, params=None):
         """
@@ -287,11 +521,13 @@ class SmartTyreAPI:
 
         body_str = json.dumps(tire_info, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify("add_tire", result, tire_info=tire_info)
+        return result
 
     def update_tire(self, tire_info):
         """
@@ -332,11 +568,13 @@ class SmartTyreAPI:
         endpoint = "/smartyre/openapi/tyre/update"
 
         body_str = json.dumps(tire_info, separators=(",", ":"), ensure_ascii=False)
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify("update_tire", result, tire_info=tire_info)
+        return result
 
     def get_tires_info_by_vehicle(self, vehicle_id):
         """
@@ -357,6 +595,7 @@ class SmartTyreAPI:
         return self._new_post_request(
             endpoint=endpoint,
             body=body_str,
+            idempotent=True,
         )
 
     def get_tire_list(self, params=None):
@@ -410,11 +649,20 @@ class SmartTyreAPI:
 
         body_str = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify(
+            "bind_tire_to_vehicle",
+            result,
+            vehicle_id=vehicle_id,
+            tire_code=tire_code,
+            axle_index=axle_index,
+            wheel_index=wheel_index,
+        )
+        return result
 
     def unbind_tire_from_vehicle(self, vehicle_id, tire_id):
         """
@@ -433,9 +681,11 @@ class SmartTyreAPI:
         }
 
         body_str = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint, body=body_str, returns_data=False
         )
+        self._notify("unbind_tire_from_vehicle", result, vehicle_id=vehicle_id, tire_id=tire_id)
+        return result
 
     # Tbox Management
 
@@ -463,11 +713,13 @@ class SmartTyreAPI:
 
         body_str = json.dumps(tbox_info, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify("add_tbox", result, tbox_info=tbox_info)
+        return result
 
     def update_tbox(self, tbox_info):
         """
@@ -495,11 +747,13 @@ class SmartTyreAPI:
 
         body_str = json.dumps(tbox_info, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify("update_tbox", result, tbox_info=tbox_info)
+        return result
 
     def get_tboxes_list(self, params=None):
         """
@@ -554,11 +808,13 @@ class SmartTyreAPI:
 
         body_str = json.dumps(sensor_info, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify("add_sensor", result, sensor_info=sensor_info)
+        return result
 
     def update_sensor(self, sensor_info):
         """
@@ -583,11 +839,13 @@ class SmartTyreAPI:
 
         body_str = json.dumps(sensor_info, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify("update_sensor", result, sensor_info=sensor_info)
+        return result
 
     def get_sensor_list(self, params=None):
         """
@@ -641,11 +899,21 @@ class SmartTyreAPI:
 
         body_str = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify(
+            "bind_sensor_to_tire",
+            result,
+            tire_code=tire_code,
+            vehicle_id=vehicle_id,
+            axle_index=axle_index,
+            wheel_index=wheel_index,
+            sensor_code=sensor_code,
+        )
+        return result
 
     def unbind_sensor_from_tire(self, tire_code, vehicle_id, axle_index, wheel_index, sensor_code):
         """
@@ -671,11 +939,21 @@ class SmartTyreAPI:
 
         body_str = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
 
-        return self._new_post_request(
+        result = self._new_post_request(
             endpoint=endpoint,
             body=body_str,
             returns_data=False,
         )
+        self._notify(
+            "unbind_sensor_from_tire",
+            result,
+            tire_code=tire_code,
+            vehicle_id=vehicle_id,
+            axle_index=axle_index,
+            wheel_index=wheel_index,
+            sensor_code=sensor_code,
+        )
+        return result
 
     # Reference Data Management
     def get_tire_brands(self):
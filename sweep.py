@@ -0,0 +1,169 @@
+"""Multiprocess fleet sweep engine.
+
+Fetches the tyre data of many vehicles and scores it on every core. Vehicle
+IDs are split into shards handled by a process pool; each worker process
+builds its own client, fetches its shard's `get_tires_info_by_vehicle`
+data over a few threads and runs the CPU-heavy scoring locally, outside the
+parent's GIL. Workers send back packed `array` buffers instead of pickled
+dicts, which the parent concatenates into one `SweepResult`.
+
+Example:
+    ```python
+    def wear_score(vehicle_id, tires_info):
+        return (float(len(tires_info)),)
+
+    factory = functools.partial(SmartTyreAPI, base_url, client_id, client_secret,
+                                sign_key, token_store=FileTokenStore())
+    result = sweep(factory, wear_score, width=1)
+    for vehicle_id, scores in result.rows():
+        ...
+    ```
+"""
+
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from scheduler import BULK, priority
+
+_WORKER = {}
+
+
+class SweepResult:
+    """
+    Columnar sweep output: `vehicle_ids[i]` has the scores
+    `scores[i * width:(i + 1) * width]`.
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.vehicle_ids = array("q")
+        self.scores = array("d")
+        self.failed = array("q")
+
+    def __len__(self):
+        return len(self.vehicle_ids)
+
+    def merge(self, ids, scores, failed):
+        """Appends a shard's packed buffers."""
+        self.vehicle_ids.frombytes(ids)
+        self.scores.frombytes(scores)
+        self.failed.frombytes(failed)
+
+    def rows(self):
+        """Yields `(vehicle_id, scores)` pairs."""
+        width = self.width
+        for index, vehicle_id in enumerate(self.vehicle_ids):
+            yield vehicle_id, tuple(self.scores[index * width:(index + 1) * width])
+
+    def to_dict(self):
+        """Returns `{vehicle_id: scores}`."""
+        return dict(self.rows())
+
+
+def _init_worker(api_factory, score, width, threads):
+    _WORKER.update(api=api_factory(), score=score, width=width, threads=threads)
+
+
+def _fetch_and_score(vehicle_id):
+    try:
+        with priority(BULK):
+            tires_info = _WORKER["api"].get_tires_info_by_vehicle(vehicle_id)
+    except Exception:  # pylint: disable=broad-except
+        # One unreachable vehicle must not abort its shard and the sweep.
+        tires_info = None
+    if tires_info is None:
+        return vehicle_id, None
+    return vehicle_id, _WORKER["score"](vehicle_id, tires_info)
+
+
+def _sweep_shard(vehicle_ids):
+    """Runs in a worker process. Returns the packed ids, scores and failures."""
+    width = _WORKER["width"]
+    ids, scores, failed = array("q"), array("d"), array("q")
+    with ThreadPoolExecutor(max_workers=_WORKER["threads"]) as pool:
+        for vehicle_id, result in pool.map(_fetch_and_score, vehicle_ids):
+            if result is None:
+                failed.append(vehicle_id)
+                continue
+            result = tuple(result)
+            if len(result) != width:
+                raise ValueError(
+                    f"score returned {len(result)} values for vehicle {vehicle_id}, "
+                    f"expected {width}"
+                )
+            ids.append(vehicle_id)
+            scores.extend(result)
+    return ids.tobytes(), scores.tobytes(), failed.tobytes()
+
+
+def shard(vehicle_ids, shards):
+    """Splits `vehicle_ids` into at most `shards` contiguous, near-equal lists."""
+    vehicle_ids = list(vehicle_ids)
+    shards = max(1, min(shards, len(vehicle_ids)))
+    size, extra = divmod(len(vehicle_ids), shards)
+    result, start = [], 0
+    for index in range(shards):
+        end = start + size + (index < extra)
+        result.append(vehicle_ids[start:end])
+        start = end
+    return [ids for ids in result if ids]
+
+
+def list_vehicle_ids(api, page_size=100):
+    """Collects every vehicle ID through the paginated vehicle list."""
+    return [
+        int(record["id"])
+        for record in api.iter_records(api.get_vehicle_list, page_size=page_size)
+    ]
+
+
+def sweep(
+    api_factory,
+    score,
+    width=1,
+    vehicle_ids=None,
+    processes=None,
+    threads=4,
+    shards_per_process=4,
+    mp_context=None,
+):
+    """
+    Scores the tyre data of every vehicle across a process pool.
+
+    Args:
+        api_factory (callable): Picklable callable returning a `SmartTyreAPI`,
+            called once per worker process. Pass a shared `token_store` to
+            avoid one authorize call per process.
+        score (callable): Picklable `score(vehicle_id, tires_info)` returning
+            `width` numbers.
+        width (int): The number of values returned by `score`.
+        vehicle_ids (iterable): Integer vehicle IDs. Defaults to every vehicle
+            in the fleet.
+        processes (int): Worker processes. Defaults to the CPU count.
+        threads (int): Concurrent requests per worker process.
+        shards_per_process (int): Shards per process, for load balancing.
+        mp_context: Optional `multiprocessing` context.
+
+    Returns:
+        A `SweepResult`; vehicles whose tyre data could not be fetched,
+        including requests that raised, are listed in `failed`.
+    """
+    if vehicle_ids is None:
+        vehicle_ids = list_vehicle_ids(api_factory())
+    processes = processes or os.cpu_count() or 1
+
+    result = SweepResult(width)
+    shards = shard(vehicle_ids, processes * shards_per_process)
+    if not shards:
+        return result
+
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(shards)),
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(api_factory, score, width, threads),
+    ) as pool:
+        for packed in pool.map(_sweep_shard, shards):
+            result.merge(*packed)
+    return result
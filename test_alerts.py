@@ -0,0 +1,84 @@
+"""Test the streaming tyre alert engine."""
+
+import time
+
+from alerts import (
+    CLEARED,
+    RAISED,
+    AlertEngine,
+    RateOfChangeRule,
+    ThresholdRule,
+    default_rules,
+    readings_from_tires_info,
+)
+
+
+def reading(pressure, timestamp, temperature=40.0, vehicle_id=1, wheel=1):
+    return {
+        "vehicleId": vehicle_id,
+        "axleIndex": 1,
+        "wheelIndex": wheel,
+        "pressure": pressure,
+        "temperature": temperature,
+        "timestamp": timestamp,
+    }
+
+
+class TestAlertEngine:
+    def test_threshold_with_hysteresis(self):
+        """Test that values inside the hysteresis band do not clear the alert."""
+        engine = AlertEngine([ThresholdRule("low", "pressure", below=7.0, clear=7.5)])
+        states = []
+        for step, pressure in enumerate([8.0, 6.9, 7.2, 6.8, 7.3, 7.6]):
+            states += [event.state for event in engine.process([reading(pressure, step)])]
+        assert states == [RAISED, CLEARED]
+
+    def test_debounce_ignores_single_spikes(self):
+        """Test that a single breaching reading does not raise when debounced."""
+        engine = AlertEngine([ThresholdRule("hot", "temperature", above=80, debounce=2)])
+        events = engine.process(
+            [reading(8.0, step, temperature=t) for step, t in enumerate([70, 85, 70, 85, 86])]
+        )
+        assert [(event.state, event.value) for event in events] == [(RAISED, 86.0)]
+
+    def test_rate_of_change_per_wheel(self):
+        """Test that rapid pressure loss is tracked per wheel position."""
+        engine = AlertEngine([RateOfChangeRule("loss", "pressure", max_drop=0.3, window=300)])
+        batch = []
+        for minute in range(4):
+            batch.append(reading(8.0 - 0.5 * minute, minute * 60, wheel=1))
+            batch.append(reading(8.0, minute * 60, wheel=2))
+        events = engine.process(batch)
+        assert [(event.key, event.state) for event in events] == [((1, 1, 1), RAISED)]
+        assert engine.active() == [("loss", (1, 1, 1))]
+
+    def test_missing_values_are_ignored(self):
+        """Test that readings without values neither raise nor clear."""
+        engine = AlertEngine(default_rules())
+        assert engine.process([reading(None, 0), reading("", 1)]) == []
+
+    def test_large_batch(self):
+        """Test that a batch of thousands of vehicles raises every event."""
+        engine = AlertEngine(default_rules())
+        batch = [
+            reading(6.5 if vehicle % 7 == 0 else 8.0, 0, vehicle_id=vehicle, wheel=wheel)
+            for vehicle in range(5000)
+            for wheel in range(6)
+        ]
+        started = time.perf_counter()
+        engine.process(batch)
+        events = engine.process([dict(item, timestamp=60) for item in batch])
+        # Generous bound: only catches accidental quadratic behaviour, not slow runners.
+        assert time.perf_counter() - started < 10.0
+        assert len(events) == len(range(0, 5000, 7)) * 6
+
+
+class TestReadings:
+    def test_readings_from_tires_info(self):
+        """Test flattening the API result into readings."""
+        tires_info = {"tyreList": [{"axleIndex": 1, "wheelIndex": 2, "pressure": "8.1"}]}
+        readings = readings_from_tires_info(7543, tires_info, timestamp=10)
+        assert readings[0]["vehicleId"] == 7543
+        assert readings[0]["pressure"] == "8.1"
+        assert readings[0]["timestamp"] == 10
+        assert readings_from_tires_info(7543, None) == []
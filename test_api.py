@@ -2,22 +2,50 @@
 
 import os
 
+import pytest
 from dotenv import load_dotenv
 
+from cassette import Cassette
 from smarttyre_api import SmartTyreAPI
 
 load_dotenv()
 
+CASSETTE_PATH = os.getenv(
+    "SMARTTYRE_CASSETTE",
+    os.path.join(os.path.dirname(__file__), "cassettes", "test_api.json.gz"),
+)
+CASSETTE_MODE = os.getenv("SMARTTYRE_CASSETTE_MODE", "once")
+CREDENTIALS = all(os.getenv(name) for name in ("CLIENT_ID", "CLIENT_SECRET", "SIGN_KEY"))
+REPLAYABLE = CASSETTE_MODE != "record" and os.path.exists(CASSETTE_PATH)
 
+
+@pytest.mark.skipif(
+    not (REPLAYABLE or CREDENTIALS),
+    reason="no recorded cassette and no CLIENT_ID/CLIENT_SECRET/SIGN_KEY to record one",
+)
 class TestAPI:
+    @classmethod
+    def setup_class(cls):
+        """Replay the recorded cassette, or record one against the live
+        service when it does not exist yet."""
+        cls.cassette = Cassette(CASSETTE_PATH, mode=CASSETTE_MODE)
+
+    @classmethod
+    def teardown_class(cls):
+        """Persist the cassette when it was recorded during this run and
+        every request reached the service."""
+        if cls.cassette.complete:
+            cls.cassette.save()
+
     def setup_method(self):
         """Set up the test environment by loading environment
         variables and initializing the API client."""
         self.api = SmartTyreAPI(
             base_url="https://www.dajintruck.com",
-            client_id=os.getenv("CLIENT_ID"),
-            client_secret=os.getenv("CLIENT_SECRET"),
-            sign_key=os.getenv("SIGN_KEY"),
+            client_id=os.getenv("CLIENT_ID", ""),
+            client_secret=os.getenv("CLIENT_SECRET", ""),
+            sign_key=os.getenv("SIGN_KEY", ""),
+            transport=self.cassette,
         )
 
     def test_get_access_token(self):
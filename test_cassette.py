@@ -0,0 +1,95 @@
+"""Test the Cassette record/replay transport."""
+
+import gzip
+import time
+
+import pytest
+
+from cassette import Cassette, CassetteError
+
+
+def service(method, path, params, body):
+    """Answers like the SmartTyre service without touching the network."""
+    return 200, {"code": 200, "data": {"records": [{"id": 7543}]}}
+
+
+class TestCassette:
+    def test_record_then_replay_offline(self, tmp_path, fake_api, fake_transport):
+        """Test that a recorded cassette replays without the live transport."""
+        path = str(tmp_path / "api.json.gz")
+        transport = fake_transport(service)
+        with Cassette(path, mode="record", transport=transport) as cassette:
+            vehicles = fake_api(transport=cassette).get_vehicle_list()
+        assert len(transport.calls) == 2
+
+        replay = Cassette(path, mode="once")
+        assert not replay.recording
+        assert fake_api(transport=replay).get_vehicle_list() == vehicles
+
+    def test_secrets_are_scrubbed(self, tmp_path, fake_api, fake_transport):
+        """Test that credentials and tokens never reach the cassette file."""
+        path = str(tmp_path / "api.json.gz")
+        transport = fake_transport(service, token="live-token")
+        with Cassette(path, mode="record", transport=transport) as cassette:
+            fake_api(transport=cassette, client_secret="top-secret").get_vehicle_list()
+
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            content = file.read()
+        assert "top-secret" not in content
+        assert "live-token" not in content
+        assert '"nonce"' not in content
+
+    def test_replay_matches_other_credentials(self, tmp_path, fake_api, fake_transport):
+        """Test that replay ignores volatile headers and credentials."""
+        path = str(tmp_path / "api.json")
+        with Cassette(path, mode="record", transport=fake_transport(service)) as cassette:
+            fake_api(transport=cassette).get_vehicle_info(7543)
+
+        replay = Cassette(path, mode="replay")
+        api = fake_api(transport=replay, client_id="other", client_secret="other-secret")
+        assert api.get_vehicle_info(7543) == {"records": [{"id": 7543}]}
+
+    def test_unrecorded_request_raises(self, tmp_path, fake_api, fake_transport):
+        """Test that replaying an unknown request fails loudly."""
+        path = str(tmp_path / "api.json")
+        with Cassette(path, mode="record", transport=fake_transport(service)) as cassette:
+            fake_api(transport=cassette).get_vehicle_info(7543)
+
+        with pytest.raises(CassetteError):
+            fake_api(transport=Cassette(path, mode="replay")).get_vehicle_info(1)
+
+    def test_failed_recording_is_not_saved(self, tmp_path, fake_api, fake_transport):
+        """Test that a recording whose requests raised leaves no cassette."""
+        path = tmp_path / "api.json"
+
+        def offline(method, path, params, body):
+            raise ConnectionError("unreachable")
+
+        with Cassette(str(path), mode="record", transport=fake_transport(offline)) as cassette:
+            with pytest.raises(ConnectionError):
+                fake_api(transport=cassette).get_vehicle_list()
+        assert cassette.failures == 1
+        assert not path.exists()
+
+        with Cassette(str(path), mode="record", transport=fake_transport(service)):
+            pass
+        assert not path.exists()
+
+    def test_replay_speed(self, tmp_path, fake_api, fake_transport):
+        """Test that replay speed scales the recorded latency."""
+        path = str(tmp_path / "api.json")
+        with Cassette(path, mode="record", transport=fake_transport(service)) as cassette:
+            fake_api(transport=cassette).get_tire_brands()
+        for entry in cassette.entries:
+            entry["elapsed"] = 0.05
+        cassette.save()
+
+        api = fake_api(transport=Cassette(path, mode="replay", speed=0))
+        started = time.perf_counter()
+        api.get_tire_brands()
+        assert time.perf_counter() - started < 0.05
+
+        api = fake_api(transport=Cassette(path, mode="replay", speed=1.0))
+        started = time.perf_counter()
+        api.get_tire_brands()
+        assert time.perf_counter() - started >= 0.1
@@ -0,0 +1,137 @@
+"""Test the non-interactive command line interface."""
+
+import gzip
+import io
+import json
+
+import cli
+
+
+class Service:
+    """Fake SmartTyre service answering from memory and recording inserts."""
+
+    def __init__(self, tires=25):
+        self.tires = [{"id": index, "tyreCode": f"T{index}"} for index in range(tires)]
+        self.inserted = []
+
+    def __call__(self, method, path, params, body):
+        if method == "POST":
+            self.inserted.append(json.loads(body))
+            return 200, {"msg": "success"}
+        if path.endswith("/tyre/list"):
+            page = int(params["page"][0])
+            size = int(params["pageSize"][0])
+            records = self.tires[(page - 1) * size:page * size]
+            return 200, {"data": {"records": records, "total": len(self.tires)}}
+        if path.endswith("/vehicle/detail"):
+            vehicle_id = int(params["vehicleId"][0])
+            return 200, {"data": {"id": vehicle_id} if vehicle_id < 100 else None}
+        return 404, {}
+
+
+def unreachable(method, path, params, body):
+    """Fake service that cannot be reached past authorization."""
+    raise ConnectionError("Max retries exceeded")
+
+
+def read_lines(path):
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+class TestCLI:
+    def test_list_all_streams_every_page(self, tmp_path, fake_api):
+        """Test that `tires list --all` writes one record per line."""
+        path = str(tmp_path / "tires.ndjson.gz")
+        argv = ["-o", path, "tires", "list", "--all", "--page-size", "10"]
+        code = cli.main(argv, fake_api(Service()))
+        assert code == cli.EXIT_OK
+        assert [line["id"] for line in read_lines(path)] == list(range(25))
+
+    def test_manifest_reports_failures(self, tmp_path, fake_api):
+        """Test that a manifest runs concurrently and exits 1 on failures."""
+        manifest = tmp_path / "manifest.ndjson"
+        manifest.write_text(
+            "\n".join(
+                json.dumps({"id": vehicle_id, "op": "vehicles.get",
+                            "args": {"vehicle_id": vehicle_id}})
+                for vehicle_id in (1, 2, 500)
+            )
+        )
+        path = str(tmp_path / "results.ndjson.gz")
+        code = cli.main(["-o", path, "--workers", "3", "run", str(manifest)], fake_api(Service()))
+        assert code == cli.EXIT_FAILED
+
+        results = {line["id"]: line for line in read_lines(path)}
+        assert results[1]["ok"] and results[1]["result"] == {"id": 1}
+        assert not results[500]["ok"]
+
+    def test_unknown_operation_fails(self, tmp_path, fake_api):
+        """Test that unknown manifest operations are reported, not raised."""
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text(json.dumps([{"op": "tires.explode"}]))
+        path = str(tmp_path / "results.ndjson.gz")
+        assert cli.main(["-o", path, "run", str(manifest)], fake_api(Service())) == cli.EXIT_FAILED
+        assert "Unknown operation" in read_lines(path)[0]["error"]
+
+    def test_import_csv(self, tmp_path, fake_api):
+        """Test that every CSV row becomes an insert call."""
+        source = tmp_path / "tires.csv"
+        source.write_text("tyreCode,tyreBrandId,orgId\nA1,1,\nA2,1,218\n")
+        service = Service()
+        path = str(tmp_path / "results.ndjson.gz")
+        code = cli.main(["-o", path, "import", "tires", str(source)], fake_api(service))
+        assert code == cli.EXIT_OK
+        assert sorted(service.inserted, key=lambda row: row["tyreCode"]) == [
+            {"tyreCode": "A1", "tyreBrandId": "1"},
+            {"tyreCode": "A2", "tyreBrandId": "1", "orgId": "218"},
+        ]
+
+    def test_connection_errors_are_reported(self, tmp_path, fake_api):
+        """Test that list walks and imports report failures as NDJSON lines."""
+        path = str(tmp_path / "tires.ndjson.gz")
+        code = cli.main(["-o", path, "tires", "list", "--all"], fake_api(unreachable))
+        assert code == cli.EXIT_FAILED
+        assert read_lines(path) == [
+            {"op": "tires.list", "ok": False, "error": "Max retries exceeded"}
+        ]
+
+        source = tmp_path / "tires.csv"
+        source.write_text("tyreCode,tyreBrandId\nA1,1\n")
+        code = cli.main(["-o", path, "import", "tires", str(source)], fake_api(unreachable))
+        assert code == cli.EXIT_FAILED
+        assert read_lines(path)[-1]["error"] == "Max retries exceeded"
+
+    def test_missing_credentials(self, monkeypatch):
+        """Test the configuration exit code when credentials are missing."""
+        monkeypatch.setattr(cli, "new_api", lambda base_url: None)
+        assert cli.main(["token"]) == cli.EXIT_CONFIG
+
+    def test_manifest_is_streamed_with_bounded_backlog(self, tmp_path):
+        """Test that operations are pulled lazily, a few per worker at a time."""
+        manifest = tmp_path / "manifest.ndjson"
+        manifest.write_text(
+            "\n".join(json.dumps({"op": "noop", "args": {}}) for _ in range(200))
+        )
+        output = io.StringIO()
+        ahead = []
+
+        def operations():
+            for index, item in enumerate(cli.load_manifest(str(manifest))):
+                ahead.append(index - output.getvalue().count("\n"))
+                yield item
+
+        failures = cli.run_operations(
+            None, operations(), output, workers=2, executor=lambda api, op, args: op, backlog=3
+        )
+        assert failures == 0
+        assert output.getvalue().count("\n") == 200
+        assert max(ahead) <= 2 * 3
+
+    def test_malformed_manifest_line(self, tmp_path, capsys, fake_api):
+        """Test that a bad NDJSON line is a usage error naming the line."""
+        manifest = tmp_path / "manifest.ndjson"
+        manifest.write_text('{"op": "vehicles.get"}\n{oops\n')
+        path = str(tmp_path / "results.ndjson.gz")
+        assert cli.main(["-o", path, "run", str(manifest)], fake_api(Service())) == cli.EXIT_USAGE
+        assert "manifest line 2" in capsys.readouterr().err
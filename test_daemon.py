@@ -0,0 +1,108 @@
+"""Test the warm daemon and its lightweight client."""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from daemon import SmartTyreDaemon
+from daemon_client import DaemonClient, DaemonError, default_socket_path
+from token_store import MemoryTokenStore
+
+
+def service(method, path, params, body):
+    """Fake SmartTyre service with one brand and any vehicle."""
+    if path.endswith("/tyre/brand/all"):
+        return 200, {"data": [{"id": 1, "name": "Brand"}]}
+    if path.endswith("/vehicle/detail"):
+        return 200, {"data": {"id": int(params["vehicleId"][0])}}
+    return 200, {"data": []}
+
+
+def calls(transport, endpoint):
+    return sum(path.endswith(f"/openapi/{endpoint}") for _, path, _, _ in transport.calls)
+
+
+@pytest.fixture(name="daemon")
+def fixture_daemon(tmp_path, fake_api, fake_transport):
+    transport = fake_transport(service)
+    api = fake_api(transport=transport)
+    server = SmartTyreDaemon(api, str(tmp_path / "st.sock"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, transport, DaemonClient(str(tmp_path / "st.sock"))
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+class TestDaemon:
+    def test_operations_reuse_token(self, daemon):
+        """Test that a warm daemon authorizes once for many requests."""
+        _, transport, client = daemon
+        assert client.ping()
+        for vehicle_id in (1, 2, 3):
+            assert client.call("vehicles.get", vehicle_id=vehicle_id) == {"id": vehicle_id}
+        assert calls(transport, "auth/oauth20/authorize") == 1
+        assert calls(transport, "vehicle/detail") == 3
+
+    def test_reference_data_is_cached(self, daemon):
+        """Test that reference data is served from the daemon cache."""
+        _, transport, client = daemon
+        for _ in range(3):
+            assert client.call("reference.brands") == [{"id": 1, "name": "Brand"}]
+        assert calls(transport, "tyre/brand/all") == 1
+
+    def test_errors_are_reported(self, daemon):
+        """Test that failing operations raise DaemonError on the client."""
+        _, _, client = daemon
+        with pytest.raises(DaemonError):
+            client.call("tires.explode")
+
+    def test_refuses_second_daemon(self, daemon):
+        """Test that a live socket is never taken over."""
+        server, _, _ = daemon
+        with pytest.raises(RuntimeError):
+            SmartTyreDaemon(server.api, server.server_address)
+
+    def test_ping_without_daemon(self, tmp_path):
+        """Test that ping reports a missing daemon instead of raising."""
+        assert not DaemonClient(str(tmp_path / "missing.sock")).ping()
+
+    def test_client_does_not_import_requests(self):
+        """Test that the client import path stays free of requests."""
+        code = "import sys, daemon_client; print('requests' in sys.modules)"
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        assert output.strip() == "False"
+
+    def test_socket_is_private(self, daemon, tmp_path, monkeypatch):
+        """Test that the socket is owner-only and its default directory is checked."""
+        server, _, _ = daemon
+        assert os.stat(server.server_address).st_mode & 0o777 == 0o600
+
+        monkeypatch.delenv("SMARTTYRE_SOCKET", raising=False)
+        monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+        path = default_socket_path()
+        assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+
+        os.chmod(os.path.dirname(path), 0o777)
+        with pytest.raises(PermissionError):
+            default_socket_path()
+
+    def test_warm_reuses_stored_token(self, tmp_path, fake_api, fake_transport):
+        """Test that warming up adopts a token from the token store."""
+        store = MemoryTokenStore()
+        store.save("https://example.test|client", "shared", time.time() + 60)
+        transport = fake_transport(service)
+        api = fake_api(transport=transport, token_store=store)
+        server = SmartTyreDaemon(api, str(tmp_path / "st.sock"))
+        try:
+            server.warm()
+        finally:
+            server.server_close()
+        assert calls(transport, "auth/oauth20/authorize") == 0
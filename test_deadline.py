@@ -0,0 +1,110 @@
+"""Test deadline budgets propagated through composite operations."""
+
+import time
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded, fan_out, request_timeout
+from transport import FakeTransport
+
+
+def slow_handler(delay):
+    def handler(method, path, params, body):
+        time.sleep(delay)
+        if path.endswith("/tyre/list"):
+            return 200, {"data": {"records": [{"id": int(params["page"][0])}], "total": 100}}
+        return 200, {"data": {"id": params.get("vehicleId", [None])[0]}}
+
+    return handler
+
+
+class ReadTimeout(Exception):
+    """Stand-in for the timeout error of a real transport."""
+
+
+def timing_out_handler(delay):
+    """Answers the first list page, then times out like a slow server."""
+    def handler(method, path, params, body):
+        if params.get("page") == ["1"] or params.get("vehicleId") == ["1"]:
+            return slow_handler(0)(method, path, params, body)
+        time.sleep(delay)
+        raise ReadTimeout("Read timed out")
+
+    return handler
+
+
+class RecordingTransport(FakeTransport):
+    """Fake transport that also records the timeout of every request."""
+
+    def __init__(self, handler):
+        super().__init__(handler)
+        self.timeouts = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.timeouts.append(timeout)
+        return super().get(url, headers=headers, params=params, timeout=timeout)
+
+
+class TestDeadline:
+    def test_timeout_is_capped(self, fake_api, fake_transport):
+        """Test that request timeouts shrink to the time left."""
+        transport = fake_transport(slow_handler(0), RecordingTransport)
+        api = fake_api(transport=transport)
+        api.get_vehicle_info(1)
+        with Deadline(2):
+            api.get_vehicle_info(1)
+        assert transport.timeouts[0] == 20
+        assert 0 < transport.timeouts[1] <= 2
+
+    def test_spent_deadline_fails_fast(self):
+        """Test that no request starts once the budget is spent."""
+        with Deadline(0):
+            with pytest.raises(DeadlineExceeded):
+                request_timeout(20)
+        assert request_timeout(20) == 20
+
+    def test_pagination_returns_partial_results(self, fake_api):
+        """Test that a list walk stops at the deadline and reports the skipped page."""
+        api = fake_api(slow_handler(0.02))
+        with Deadline(0.1) as deadline:
+            records = list(api.iter_records(api.get_tire_list, page_size=1))
+        assert 0 < len(records) < 100
+        assert deadline.skipped == [("get_tire_list", len(records) + 1)]
+
+    def test_fan_out_skips_unfinished_items(self, fake_api):
+        """Test that fan-out returns what finished and lists the rest."""
+        api = fake_api(slow_handler(0.05))
+        started = time.perf_counter()
+        with Deadline(0.12) as deadline:
+            results = fan_out(api.get_vehicle_info, range(20), workers=2)
+        assert time.perf_counter() - started < 0.5
+        assert results
+        assert sorted(list(results) + deadline.skipped) == list(range(20))
+
+    def test_timeouts_after_the_deadline(self, fake_api):
+        """Test that requests timing out with the budget keep partial results."""
+        api = fake_api(timing_out_handler(0.1))
+        with Deadline(0.05) as deadline:
+            records = list(api.iter_records(api.get_tire_list, page_size=1))
+            with pytest.raises(DeadlineExceeded):
+                api.get_vehicle_info(2)
+        assert records == [{"id": 1}]
+        assert deadline.skipped == [("get_tire_list", 2)]
+
+        with Deadline(0.05) as deadline:
+            results = fan_out(api.get_vehicle_info, [1, 2, 3], workers=3)
+        assert results == {1: {"id": "1"}}
+        assert sorted(deadline.skipped) == [2, 3]
+
+    def test_timeouts_before_the_deadline(self, fake_api):
+        """Test that transport errors within the budget are not masked."""
+        api = fake_api(timing_out_handler(0))
+        with Deadline(5):
+            with pytest.raises(ReadTimeout):
+                api.get_vehicle_info(2)
+            with pytest.raises(ReadTimeout):
+                fan_out(api.get_vehicle_info, [2])
+
+    def test_fan_out_without_deadline(self):
+        """Test that fan-out works as a plain parallel map."""
+        assert fan_out(lambda item: item * 2, [1, 2, 3]) == {1: 2, 2: 4, 3: 6}
@@ -0,0 +1,80 @@
+"""Test the columnar inventory export."""
+
+import json
+import threading
+
+import pytest
+
+from export import ExportError, export_inventory, iter_pages, load
+
+numpy = pytest.importorskip("numpy")
+
+
+class Inventory:
+    """Fake service paging through generated records."""
+
+    def __init__(self, tires=250):
+        self.tires = [
+            {"id": index, "tyreCode": f"T{index}", "tyrePattern": "AB"[index % 2],
+             "newTreadDepth": str(index % 15), "totalDistance": index * 100}
+            for index in range(tires)
+        ]
+        self.tires[3]["newTreadDepth"] = None
+        self.pages = []
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, params, body):
+        records = self.tires if path.endswith("/tyre/list") else []
+        page, size = int(params["page"][0]), int(params["pageSize"][0])
+        with self._lock:
+            self.pages.append((path, page))
+        return 200, {"data": {"records": records[(page - 1) * size:page * size],
+                              "total": len(records)}}
+
+
+class TestExport:
+    def test_pages_in_order(self, fake_api):
+        """Test that parallel page fetching keeps the record order."""
+        api = fake_api(Inventory())
+        pages = list(iter_pages(api.get_tire_list, page_size=20, workers=4))
+        assert [record["id"] for page in pages for record in page] == list(range(250))
+
+    def test_round_trip(self, tmp_path, fake_api):
+        """Test that chunks are written and load back as columns."""
+        inventory = Inventory()
+        manifest = export_inventory(fake_api(inventory), str(tmp_path), chunk_rows=100,
+                                    page_size=50, workers=3)
+        entry = manifest["resources"]["tires"]
+        assert entry["files"] == ["tires-00000.npz", "tires-00001.npz", "tires-00002.npz"]
+        assert entry["rows"] == 250
+        assert manifest["resources"]["tboxes"]["rows"] == 0
+        assert json.loads((tmp_path / "manifest.json").read_text()) == manifest
+
+        tires = load(str(tmp_path), "tires")
+        assert tires["id"].tolist() == list(range(250))
+        assert tires["tyreCode"][7] == "T7"
+        assert tires["tyrePattern"][:3].tolist() == ["A", "B", "A"]
+        assert tires["sensorCode"][0] == ""
+        assert numpy.isnan(tires["newTreadDepth"][3])
+        assert tires["totalDistance"][249] == 24900.0
+        assert tires["vehicleId"][0] == -1
+
+    def test_failed_page_aborts_export(self, tmp_path, fake_api):
+        """Test that a page that cannot be fetched fails the export."""
+        inventory = Inventory()
+
+        def flaky(method, path, params, body):
+            if params["page"] == ["3"]:
+                return 503, {}
+            return inventory(method, path, params, body)
+
+        with pytest.raises(ExportError):
+            export_inventory(fake_api(flaky), str(tmp_path), page_size=50, workers=3)
+        assert not (tmp_path / "manifest.json").exists()
+
+    def test_dictionary_encoding(self, tmp_path, fake_api):
+        """Test that repeated text is stored once per chunk."""
+        export_inventory(fake_api(Inventory()), str(tmp_path), resources=("tires",))
+        with numpy.load(tmp_path / "tires-00000.npz") as chunk:
+            assert chunk["tyrePattern.dictionary"].tolist() == ["A", "B"]
+            assert chunk["tyrePattern.codes"].dtype == numpy.int32
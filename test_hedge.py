@@ -0,0 +1,78 @@
+"""Test hedged requests for idempotent reads."""
+
+import threading
+import time
+
+from hedge import HedgePolicy
+
+
+class SlowFirstHandler:
+    """Answers the first read of every pair slowly, the second one fast."""
+
+    def __init__(self, slow=0.3):
+        self.slow = slow
+        self.reads = 0
+        self.nonces = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, params, body):
+        with self._lock:
+            self.reads += 1
+            first = self.reads % 2 == 1
+        if first:
+            time.sleep(self.slow)
+        return 200, {"data": {"id": 1, "fast": not first}}
+
+
+class TestHedge:
+    def test_hedge_wins_slow_read(self, fake_api):
+        """Test that a slow read is answered by the hedge."""
+        hedge = HedgePolicy(delay=0.02, max_extra=1.0)
+        api = fake_api(SlowFirstHandler(), hedge=hedge)
+        started = time.perf_counter()
+        assert api.get_vehicle_info(1) == {"id": 1, "fast": True}
+        assert time.perf_counter() - started < 0.2
+        stats = hedge.stats()
+        assert (stats["requests"], stats["hedges"], stats["hedge_wins"]) == (1, 1, 1)
+
+    def test_extra_load_is_capped(self, fake_api):
+        """Test that hedges stay within the max_extra share."""
+        hedge = HedgePolicy(delay=0.001, max_extra=0.25)
+        api = fake_api(SlowFirstHandler(slow=0.01), hedge=hedge)
+        for _ in range(20):
+            api.get_tires_info_by_vehicle(1)
+        assert hedge.stats()["hedges"] <= 5
+
+    def test_writes_are_never_hedged(self, fake_api):
+        """Test that mutations go out exactly once."""
+        handler = SlowFirstHandler(slow=0.05)
+        hedge = HedgePolicy(delay=0.001, max_extra=1.0)
+        fake_api(handler, hedge=hedge).update_tire({"id": "1"})
+        assert handler.reads == 1
+        assert hedge.stats()["requests"] == 0
+
+    def test_endpoint_filter_and_percentile_delay(self):
+        """Test the endpoint allow-list and the percentile-based delay."""
+        hedge = HedgePolicy(endpoints=["/smartyre/openapi/vehicle/detail"], min_samples=5)
+        assert hedge.applies("/smartyre/openapi/vehicle/detail")
+        assert not hedge.applies("/smartyre/openapi/tyre/list")
+        assert hedge.hedge_delay("/x") == hedge.initial_delay
+        for latency in (0.01, 0.02, 0.03, 0.04, 0.5):
+            hedge._record("/x", latency)  # pylint: disable=protected-access
+        assert hedge.hedge_delay("/x") == 0.5
+
+    def test_queue_time_is_not_latency(self, fake_api):
+        """Test that requests queued for a hedging thread are not hedged."""
+        def handler(method, path, params, body):
+            time.sleep(0.02)
+            return 200, {"data": {"id": 1}}
+
+        hedge = HedgePolicy(delay=0.05, max_extra=1.0, max_workers=2)
+        api = fake_api(handler, hedge=hedge)
+        threads = [threading.Thread(target=api.get_vehicle_info, args=(1,)) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert hedge.stats()["requests"] == 12
+        assert hedge.stats()["hedges"] == 0
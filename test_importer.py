@@ -0,0 +1,131 @@
+"""Test the resumable CSV importer."""
+
+import json
+import threading
+
+import pytest
+
+from importer import Importer
+
+
+class Supplier:
+    """Fake service with existing records that can reject or crash on inserts."""
+
+    def __init__(self, existing=(), crash_after=None, reject=()):
+        self.existing = [{"sensorCode": code, "tyreCode": code} for code in existing]
+        self.inserted = []
+        self.crash_after = crash_after
+        self.reject = set(reject)
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, params, body):
+        if path.endswith("/brand/all"):
+            return 200, {"data": [{"id": 7, "name": "Dajin"}]}
+        if path.endswith("/size/all"):
+            return 200, {"data": [{"id": 121, "name": "295/80R22.5"}]}
+        if method == "GET":
+            return 200, {"data": {"records": self.existing, "total": len(self.existing)}}
+        row = json.loads(body)
+        with self._lock:
+            if row.get("sensorCode") in self.reject:
+                # Rejected once, accepted when sent again.
+                self.reject.discard(row["sensorCode"])
+                return 500, {}
+            if self.crash_after is not None and len(self.inserted) >= self.crash_after:
+                raise KeyboardInterrupt
+            self.inserted.append(row)
+        return 200, {"msg": "success"}
+
+
+def write_csv(path, header, rows):
+    path.write_text("\n".join([header] + rows) + "\n")
+    return str(path)
+
+
+class TestImporter:
+    def test_validates_and_dedupes(self, tmp_path, fake_api):
+        """Test the hex rule and the remote and in-file dedupe."""
+        source = write_csv(tmp_path / "sensors.csv", "sensorCode,remark", [
+            "a1b2c3d4e5f6,lower case",
+            "A1B2C3D4E5F6,repeated",
+            "000000000001,exists",
+            "XYZ,bad",
+            ",missing",
+        ])
+        supplier = Supplier(existing=["000000000001"])
+        results = {}
+        counts = Importer(fake_api(supplier), "sensors").run(
+            source, on_result=lambda line, row, status, error: results.update({line: status})
+        )
+        assert counts == {"inserted": 1, "duplicate": 2, "invalid": 2, "failed": 0}
+        assert results == {2: "inserted", 3: "duplicate", 4: "duplicate",
+                           5: "invalid", 6: "invalid"}
+        assert supplier.inserted == [{"sensorCode": "A1B2C3D4E5F6", "remark": "lower case"}]
+
+    def test_resolves_reference_names(self, tmp_path, fake_api):
+        """Test that brand and size names are replaced by their IDs."""
+        source = write_csv(tmp_path / "tires.csv", "tyreCode,tyreBrand,tyreSize", [
+            "T1,dajin,295/80R22.5",
+            "T2,Unknown,295/80R22.5",
+        ])
+        supplier = Supplier()
+        counts = Importer(fake_api(supplier), "tires").run(source)
+        assert counts["invalid"] == 1
+        assert supplier.inserted == [{"tyreCode": "T1", "tyreBrandId": "7", "tyreSizeId": "121"}]
+
+    def test_resumes_after_crash(self, tmp_path, fake_api):
+        """Test that a crashed import continues from its checkpoint."""
+        codes = [f"{index:012X}" for index in range(10)]
+        source = write_csv(tmp_path / "sensors.csv", "sensorCode", codes)
+        checkpoint = str(tmp_path / "sensors.ckpt")
+
+        supplier = Supplier(crash_after=5)
+        with pytest.raises(KeyboardInterrupt):
+            Importer(fake_api(supplier), "sensors", workers=1, batch_size=3,
+                     checkpoint=checkpoint).run(source)
+        assert len(supplier.inserted) == 5
+
+        supplier.existing = [dict(row) for row in supplier.inserted]
+        supplier.crash_after = None
+        counts = Importer(fake_api(supplier), "sensors", workers=4, batch_size=3,
+                          checkpoint=checkpoint).run(source)
+        assert sorted(row["sensorCode"] for row in supplier.inserted) == codes
+        assert counts == {"inserted": 8, "duplicate": 2, "invalid": 0, "failed": 0}
+
+        again = Importer(fake_api(supplier), "sensors", checkpoint=checkpoint).run(source)
+        assert again == counts
+
+    def test_failed_rows_are_retried(self, tmp_path, fake_api):
+        """Test that rows failing once are retried by the next run."""
+        codes = [f"{index:012X}" for index in range(6)]
+        source = write_csv(tmp_path / "sensors.csv", "sensorCode", codes)
+        checkpoint = str(tmp_path / "sensors.ckpt")
+
+        supplier = Supplier(reject=[codes[1], codes[4]])
+        counts = Importer(fake_api(supplier), "sensors", batch_size=2,
+                          checkpoint=checkpoint).run(source)
+        assert counts == {"inserted": 4, "duplicate": 0, "invalid": 0, "failed": 2}
+
+        results = {}
+        counts = Importer(fake_api(supplier), "sensors", batch_size=2, checkpoint=checkpoint).run(
+            source, on_result=lambda line, row, status, error: results.update({line: status})
+        )
+        assert results == {3: "inserted", 6: "inserted"}
+        assert counts == {"inserted": 6, "duplicate": 0, "invalid": 0, "failed": 0}
+        assert sorted(row["sensorCode"] for row in supplier.inserted) == codes
+
+    def test_repeat_of_failed_code_is_inserted(self, tmp_path, fake_api):
+        """Test that a repeated code is only a duplicate once an insert succeeded."""
+        source = write_csv(tmp_path / "sensors.csv", "sensorCode,remark", [
+            "A1B2C3D4E5F6,first",
+            "A1B2C3D4E5F6,second",
+            "A1B2C3D4E5F6,third",
+        ])
+        supplier = Supplier(reject=["A1B2C3D4E5F6"])
+        results = {}
+        counts = Importer(fake_api(supplier), "sensors").run(
+            source, on_result=lambda line, row, status, error: results.update({line: status})
+        )
+        assert results == {2: "failed", 3: "inserted", 4: "duplicate"}
+        assert counts == {"inserted": 1, "duplicate": 1, "invalid": 0, "failed": 1}
+        assert supplier.inserted == [{"sensorCode": "A1B2C3D4E5F6", "remark": "second"}]
@@ -0,0 +1,65 @@
+"""Test the synthetic fleet load generator."""
+
+import json
+
+import pytest
+
+import loadgen
+from loadgen import LoadGenerator, StandInServer, SyntheticFleet
+from smarttyre_api import SmartTyreAPI
+
+
+@pytest.fixture(name="fleet")
+def fixture_fleet():
+    return SyntheticFleet(vehicles=50, tyres_per_vehicle=6)
+
+
+class TestStandInServer:
+    def test_serves_synthetic_fleet(self, fleet):
+        """Test that the list, detail and tyre data endpoints answer consistently."""
+        with StandInServer(fleet) as server:
+            api = SmartTyreAPI(server.url, "loadgen", "secret", "key", transport="urllib3")
+            tires = list(api.iter_records(api.get_tire_list, page_size=100))
+            assert len(tires) == fleet.tyres == 300
+            assert api.get_vehicle_info(7)["licensePlateNumber"] == "SYN000006"
+            data = api.get_tires_info_by_vehicle(2)
+            assert [tyre["tyreCode"] for tyre in data] == [t["tyreCode"] for t in tires[6:12]]
+            assert all(5 < tyre["pressure"] < 12 for tyre in data)
+            assert api.update_tire(tires[0]) == "success"
+
+
+class TestLoadGenerator:
+    def test_reports_per_interval(self, fleet):
+        """Test the interval reports and the final totals."""
+        reports = []
+        with StandInServer(fleet, error_rate=0.2) as server:
+            api = SmartTyreAPI(server.url, "loadgen", "secret", "key", transport="urllib3")
+            summary = LoadGenerator(api, fleet, concurrency=4, interval=0.2).run(
+                0.7, on_report=reports.append
+            )
+        assert len(reports) == 4
+        # Requests still in flight at the last report only count in the totals.
+        assert summary["requests"] >= sum(report["requests"] for report in reports) > 0
+        assert 0.05 < summary["error_rate"] < 0.4
+        assert set(summary["latency"]) <= set(loadgen.OPERATIONS)
+        tyre_data = summary["latency"]["tyre_data"]
+        assert tyre_data["p50"] <= tyre_data["p99"] <= tyre_data["max"]
+        assert "rss_slope_bytes_per_hour" in summary
+
+    def test_unknown_operation(self, fleet):
+        """Test that mixes naming unknown operations are rejected."""
+        with pytest.raises(ValueError):
+            LoadGenerator(None, fleet, mix={"delete_fleet": 1})
+
+    def test_command_line(self, tmp_path):
+        """Test that the command writes NDJSON reports and the totals."""
+        output = tmp_path / "soak.ndjson"
+        code = loadgen.main([
+            "--vehicles", "20", "--duration", "0.3", "--interval", "0.1",
+            "--concurrency", "2", "--slots", "2", "--mix", "tyre_data=3,tyre_page=1",
+            "--output", str(output),
+        ])
+        assert code == 0
+        lines = [json.loads(line) for line in output.read_text().splitlines()]
+        assert "final" in lines[-1] and len(lines) >= 3
+        assert set(lines[-1]["final"]["latency"]) <= {"tyre_data", "tyre_page"}
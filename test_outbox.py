@@ -0,0 +1,156 @@
+"""Test the durable write outbox."""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from outbox import DONE, FAILED, IN_FLIGHT, PENDING, Outbox
+
+
+class RecordingAPI:
+    """Fake client recording mutations, failing the first `failures` calls."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.calls = []
+        self.failures = failures
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def _call(self, name, **args):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls.append((name, args))
+            if self.failures:
+                self.failures -= 1
+                return None
+        return "success"
+
+    def update_tire(self, tire_info):
+        return self._call("update_tire", tire_info=tire_info)
+
+    def bind_sensor_to_tire(self, tire_code, vehicle_id, axle_index, wheel_index, sensor_code):
+        return self._call("bind_sensor_to_tire", tire_code=tire_code, sensor_code=sensor_code)
+
+
+class TestOutbox:
+    def test_enqueue_is_durable(self, tmp_path):
+        """Test that queued messages survive a restart and stale claims are resent."""
+        path = str(tmp_path / "outbox.sqlite3")
+        outbox = Outbox(path)
+        first = outbox.enqueue("update_tire", tire_info={"tyreCode": "T1"})
+        outbox.enqueue("update_tire", tire_info={"tyreCode": "T2"})
+        outbox._claim()  # pylint: disable=protected-access
+        outbox.close()
+
+        api = RecordingAPI()
+        now = [time.time()]
+        reopened = Outbox(path, api, clock=lambda: now[0])
+        assert reopened.counts()[IN_FLIGHT] == 2
+        assert reopened.drain_once() == 0
+        now[0] += reopened.lease
+        assert reopened.drain_once() == 2
+        assert reopened.status(first)["status"] == DONE
+        assert reopened.status(first)["result"] == "success"
+        assert len(api.calls) == 2
+        reopened.close()
+
+    def test_open_does_not_steal_claims(self, tmp_path):
+        """Test that opening the outbox again leaves live claims alone."""
+        path = str(tmp_path / "outbox.sqlite3")
+        drainer = Outbox(path, RecordingAPI())
+        drainer.enqueue("update_tire", tire_info={"tyreCode": "T1"})
+        assert len(drainer._claim()[1]) == 1  # pylint: disable=protected-access
+
+        producer = Outbox(path)
+        assert producer._claim()[1] == []  # pylint: disable=protected-access
+        assert producer.counts()[IN_FLIGHT] == 1
+        producer.close()
+        drainer.close()
+
+    def test_entity_order_is_kept(self, tmp_path):
+        """Test that messages of one tyre are sent in order, one at a time."""
+        api = RecordingAPI(delay=0.002)
+        outbox = Outbox(str(tmp_path / "outbox.sqlite3"), api, batch_size=5, poll_interval=0.01)
+        for index in range(20):
+            outbox.enqueue("update_tire", tire_info={"tyreCode": f"T{index % 4}", "seq": index})
+        outbox.start(workers=4)
+        assert outbox.join(timeout=10)
+        outbox.close()
+
+        for code in ("T0", "T1", "T2", "T3"):
+            sequence = [args["tire_info"]["seq"] for _, args in api.calls
+                        if args["tire_info"]["tyreCode"] == code]
+            assert sequence == sorted(sequence) and len(sequence) == 5
+
+    def test_failures_are_retried_with_backoff(self, tmp_path):
+        """Test the retry schedule and the failed state."""
+        now = [0.0]
+        api = RecordingAPI(failures=3)
+        outbox = Outbox(str(tmp_path / "outbox.sqlite3"), api, max_attempts=3, backoff=1.0,
+                        clock=lambda: now[0])
+        message = outbox.enqueue("bind_sensor_to_tire", tire_code="T1", vehicle_id=1,
+                                 axle_index=1, wheel_index=1, sensor_code="S1")
+        later = outbox.enqueue("update_tire", tire_info={"tyreCode": "T1"})
+
+        assert outbox.drain_once() == 1
+        assert outbox.status(message)["next_attempt"] == 1.0
+        assert outbox.drain_once() == 0
+        now[0] = 1.0
+        outbox.drain_once()
+        now[0] = 3.0
+        outbox.drain_once()
+        assert outbox.status(message)["status"] == FAILED
+        assert outbox.status(message)["attempts"] == 3
+
+        outbox.drain_once()
+        assert outbox.status(later)["status"] == DONE
+        outbox.retry(message)
+        outbox.drain_once()
+        assert outbox.status(message)["status"] == DONE
+        assert outbox.messages(entity="tyre:T1", status=DONE) == [message, later]
+        outbox.close()
+
+    def test_expired_lease_cannot_settle(self, tmp_path):
+        """Test that a drainer whose lease ran out leaves the new owner's outcome."""
+        now = [time.time()]
+        outbox = Outbox(str(tmp_path / "outbox.sqlite3"), RecordingAPI(),
+                        clock=lambda: now[0])
+        message = outbox.enqueue("update_tire", tire_info={"tyreCode": "T1"})
+        stale, _ = outbox._claim()  # pylint: disable=protected-access
+        now[0] += outbox.lease
+        owner, _ = outbox._claim()  # pylint: disable=protected-access
+
+        outbox._settle(owner, [(message, 2, "success", None)])  # pylint: disable=protected-access
+        outbox._settle(stale, [(message, 1, None, "timeout")])  # pylint: disable=protected-access
+        assert outbox.status(message)["status"] == DONE
+        assert outbox.status(message)["attempts"] == 2
+        outbox.close()
+
+    def test_worker_survives_database_errors(self, tmp_path):
+        """Test that a failing batch is logged and the worker keeps draining."""
+        outbox = Outbox(str(tmp_path / "outbox.sqlite3"), RecordingAPI(),
+                        poll_interval=0.01, lease=0.05)
+        settle = outbox._settle  # pylint: disable=protected-access
+        failures = [sqlite3.OperationalError("database is locked")]
+
+        def flaky_settle(owner, outcomes):
+            if failures:
+                raise failures.pop()
+            settle(owner, outcomes)
+
+        outbox._settle = flaky_settle  # pylint: disable=protected-access
+        message = outbox.enqueue("update_tire", tire_info={"tyreCode": "T1"})
+        outbox.start(workers=1)
+        assert outbox.join(timeout=5)
+        assert outbox.status(message)["status"] == DONE
+        assert outbox.counts()[PENDING] == 0
+        outbox.close()
+
+    def test_unknown_method(self, tmp_path):
+        """Test that only mutating methods can be queued."""
+        outbox = Outbox(str(tmp_path / "outbox.sqlite3"))
+        with pytest.raises(ValueError):
+            outbox.enqueue("get_tire_list")
+        outbox.close()
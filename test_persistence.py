@@ -0,0 +1,111 @@
+"""Test the streaming, atomic persistence helpers."""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from persistence import (
+    RotatingNDJSONWriter,
+    write_json,
+    write_json_array,
+    write_ndjson,
+)
+
+
+def records(count):
+    for index in range(count):
+        yield {"id": index, "tyreCode": f"T{index}"}
+
+
+class TestPersistence:
+    def test_ndjson_gzip(self, tmp_path):
+        """Test that records stream into a gzip-compressed NDJSON file."""
+        path = str(tmp_path / "tires.ndjson.gz")
+        assert write_ndjson(path, records(1000)) == 1000
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            lines = [json.loads(line) for line in file]
+        assert lines == list(records(1000))
+
+    def test_json_array(self, tmp_path):
+        """Test that the streamed array is valid JSON, empty or not."""
+        path = tmp_path / "tires.json"
+        assert write_json_array(str(path), records(3)) == 3
+        assert json.loads(path.read_text()) == list(records(3))
+        write_json_array(str(path), [])
+        assert json.loads(path.read_text()) == []
+
+    def test_failure_keeps_previous_file(self, tmp_path):
+        """Test that an interrupted write leaves the old file intact."""
+        path = tmp_path / "response.json"
+        write_json(str(path), {"version": 1})
+
+        def broken():
+            yield {"id": 1}
+            raise RuntimeError("connection lost")
+
+        with pytest.raises(RuntimeError):
+            write_ndjson(str(path), broken())
+        assert json.loads(path.read_text()) == {"version": 1}
+        assert os.listdir(tmp_path) == ["response.json"]
+
+    def test_zstd(self, tmp_path):
+        """Test zstd output when the optional dependency is installed."""
+        zstandard = pytest.importorskip("zstandard")
+        path = tmp_path / "tires.ndjson.zst"
+        write_ndjson(str(path), records(10))
+        content = zstandard.ZstdDecompressor().decompressobj().decompress(path.read_bytes())
+        assert len(content.decode("utf-8").splitlines()) == 10
+
+    def test_rotation_and_append(self, tmp_path):
+        """Test that the rotating writer appends, rotates and keeps backups."""
+        path = str(tmp_path / "readings.ndjson.gz")
+        with RotatingNDJSONWriter(path, max_records=4, backups=2) as writer:
+            writer.write_many(records(3))
+        with RotatingNDJSONWriter(path, max_records=4, backups=2) as writer:
+            writer.write_many(records(10))
+
+        names = sorted(os.listdir(tmp_path))
+        assert names == ["readings.ndjson.1.gz", "readings.ndjson.2.gz", "readings.ndjson.gz"]
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            assert len(file.readlines()) == 2
+        # The first writer's file was rotated away on open, then out of the backups.
+        with gzip.open(str(tmp_path / "readings.ndjson.2.gz"), "rt", encoding="utf-8") as file:
+            assert len(file.readlines()) == 4
+
+    def test_plain_file_is_appended(self, tmp_path):
+        """Test that an uncompressed file is appended to and its size counts."""
+        path = tmp_path / "readings.ndjson"
+        with RotatingNDJSONWriter(str(path), max_records=4) as writer:
+            writer.write_many(records(3))
+        size = path.stat().st_size
+        with RotatingNDJSONWriter(str(path), max_bytes=size + 1) as writer:
+            writer.write_many(records(2))
+        assert len(path.read_text().splitlines()) == 1
+        assert len((tmp_path / "readings.1.ndjson").read_text().splitlines()) == 4
+
+    def test_truncated_compressed_file_is_rotated(self, tmp_path):
+        """Test that reopening never appends behind a truncated gzip member."""
+        path = tmp_path / "readings.ndjson.gz"
+        with RotatingNDJSONWriter(str(path)) as writer:
+            writer.write_many(records(100))
+        path.write_bytes(path.read_bytes()[:-20])
+
+        with RotatingNDJSONWriter(str(path)) as writer:
+            writer.write_many(records(5))
+        with gzip.open(str(path), "rt", encoding="utf-8") as file:
+            assert len(file.readlines()) == 5
+
+    def test_compressed_size_limit(self, tmp_path):
+        """Test that max_bytes counts the uncompressed bytes of compressed files."""
+        path = tmp_path / "readings.ndjson.gz"
+        with RotatingNDJSONWriter(str(path), max_bytes=1000) as writer:
+            writer.write_many(records(5))
+        line = len(json.dumps(next(records(1)), separators=(",", ":"))) + 1
+        with RotatingNDJSONWriter(str(path), max_bytes=line * 3) as writer:
+            writer.write_many(records(4))
+        with gzip.open(str(path), "rt", encoding="utf-8") as file:
+            assert len(file.readlines()) == 1
+        with gzip.open(str(tmp_path / "readings.ndjson.1.gz"), "rt", encoding="utf-8") as file:
+            assert len(file.readlines()) == 3
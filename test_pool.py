@@ -0,0 +1,130 @@
+"""Test the multi-tenant client pool."""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded
+from pool import ClientPool
+from ratelimit import TokenBucket
+from scheduler import RequestScheduler
+from transport import FakeTransport
+
+
+def shared_transport():
+    """Fake service issuing one token per client ID."""
+
+    def handler(method, path, params, body):
+        if method == "GET":
+            return 200, {"data": {"records": []}}
+        return 200, {"data": {"accessToken": f"token-{json.loads(body)['clientId']}"}}
+
+    return FakeTransport(handler)
+
+
+def authorized(transport):
+    return [json.loads(body)["clientId"] for method, _, _, body in transport.calls
+            if method == "POST"]
+
+
+def tokens_seen(transport):
+    return [headers["accessToken"] for (method, *_), headers
+            in zip(transport.calls, transport.headers) if method == "GET"]
+
+
+def new_pool(transport, **kwargs):
+    pool = ClientPool("https://example.test", transport=transport, **kwargs)
+    for tenant in ("acme", "globex", "initech"):
+        pool.register(tenant, f"id-{tenant}", "secret", "key")
+    return pool
+
+
+class TestClientPool:
+    def test_tenants_share_transport_with_own_tokens(self):
+        """Test that tenants share one transport but keep separate tokens."""
+        transport = shared_transport()
+        pool = new_pool(transport)
+        for tenant in ("acme", "globex", "acme"):
+            pool.get(tenant).get_vehicle_list()
+        assert authorized(transport) == ["id-acme", "id-globex"]
+        assert tokens_seen(transport) == ["token-id-acme", "token-id-globex", "token-id-acme"]
+
+    def test_concurrent_calls_authorize_once(self):
+        """Test that concurrent requests of one tenant share one authorize call."""
+        transport = shared_transport()
+        pool = new_pool(transport)
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(lambda _: pool.get("acme").get_vehicle_list(), range(64)))
+        assert authorized(transport) == ["id-acme"]
+
+    def test_idle_tenants_are_evicted(self):
+        """Test that idle clients are dropped and rebuilt on demand."""
+        pool = new_pool(shared_transport(), idle_timeout=0)
+        client = pool.get("acme")
+        assert pool.evict_idle() == ["acme"]
+        assert pool.active() == []
+        assert pool.get("acme") is not client
+
+    def test_get_evicts_idle_tenants(self):
+        """Test that get drops idle clients without an explicit evict_idle call."""
+        pool = new_pool(shared_transport(), idle_timeout=0.05)
+        pool.get("acme")
+        pool.get("globex")
+        time.sleep(0.06)
+        pool.get("globex")
+        assert pool.active() == ["globex"]
+
+    def test_max_tenants_evicts_least_recent(self):
+        """Test the cap on live tenant clients."""
+        pool = new_pool(shared_transport(), max_tenants=2)
+        for tenant in ("acme", "globex", "acme", "initech"):
+            pool.get(tenant)
+        assert pool.active() == ["acme", "initech"]
+
+    def test_throttled_tenant_does_not_hold_slots(self):
+        """Test that a tenant waiting for its rate budget leaves shared slots free."""
+        pool = new_pool(shared_transport(), scheduler=RequestScheduler(slots=1, reserved=0))
+        pool.register("throttled", "id-throttled", "secret", "key", rate=1, burst=1)
+        throttled = pool.get("throttled")
+        throttled.get_vehicle_list()
+        waiting = threading.Thread(target=throttled.get_vehicle_list)
+        waiting.start()
+        time.sleep(0.05)
+
+        started = time.perf_counter()
+        pool.get("acme").get_vehicle_list()
+        assert time.perf_counter() - started < 0.5
+        waiting.join()
+
+    def test_rate_budget_wait_respects_deadline(self):
+        """Test that waiting for a tenant's rate budget stops at the deadline."""
+        pool = new_pool(shared_transport())
+        pool.register("throttled", "id-throttled", "secret", "key", rate=0.1, burst=1)
+        throttled = pool.get("throttled")
+        throttled.get_vehicle_list()
+
+        started = time.perf_counter()
+        with Deadline(0.1):
+            with pytest.raises(DeadlineExceeded):
+                throttled.get_vehicle_list()
+        assert time.perf_counter() - started < 1
+
+    def test_unknown_tenant(self):
+        """Test that unknown tenants raise KeyError."""
+        with pytest.raises(KeyError):
+            new_pool(shared_transport()).get("umbrella")
+
+
+class TestTokenBucket:
+    def test_budget_refills_over_time(self):
+        """Test the burst capacity and refill rate."""
+        now = [0.0]
+        bucket = TokenBucket(rate=2, burst=3, clock=lambda: now[0])
+        assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+        assert bucket.delay() == pytest.approx(0.5)
+        now[0] = 1.0
+        assert bucket.try_acquire(2)
+        assert not bucket.try_acquire()
@@ -0,0 +1,136 @@
+"""Test the desired-state reconciliation engine."""
+
+import json
+
+from reconcile import Reconciler
+
+
+class Fleet:
+    """Fake service holding remote records and recording every mutation."""
+
+    def __init__(self):
+        self.records = {
+            "vehicle": [{"id": 1, "licensePlateNumber": "ABC123", "emptyWeight": "1000"}],
+            "tyre": [
+                {"id": 10, "tyreCode": "T1", "tyrePattern": "A", "initialTreadDepth": 10,
+                 "vehicleId": 1, "axleIndex": 1, "wheelIndex": 1, "sensorCode": "S1"},
+                {"id": 11, "tyreCode": "T2", "tyrePattern": "A", "initialTreadDepth": 10},
+            ],
+            "sensor": [{"id": 20, "sensorCode": "S1", "tyreCode": "T1"}],
+            "tbox": [],
+        }
+        self.details = {"/smartyre/openapi/tyre/detail": {"id": 11, "remark": "spare"}}
+        self.mutations = []
+
+    def __call__(self, method, path, params, body):
+        if method == "POST":
+            self.mutations.append((path.rsplit("/openapi/", 1)[1], json.loads(body)))
+            return 200, {"msg": "success"}
+        if path.endswith("/list"):
+            records = self.records[path.split("/")[-2]]
+            return 200, {"data": {"records": records, "total": len(records)}}
+        return 200, {"data": self.details.get(path)}
+
+
+class TestReconciler:
+    def test_unchanged_state_sends_nothing(self, fake_api):
+        """Test that a desired state matching the remote one plans no calls."""
+        fleet = Fleet()
+        reconciler = Reconciler(fake_api(fleet))
+        plan = reconciler.plan({
+            "vehicles": [{"licensePlateNumber": "ABC123", "emptyWeight": 1000}],
+            "tires": [{"tyreCode": "T1", "tyrePattern": "A", "initialTreadDepth": "10.0"}],
+            "mounts": [{"licensePlateNumber": "ABC123", "tyreCode": "T1", "axleIndex": 1,
+                        "wheelIndex": "1", "sensorCode": "S1"}],
+        })
+        assert len(plan) == 0
+        assert plan.summary() == {"unchanged": 3}
+        assert reconciler.apply(plan) == []
+        assert fleet.mutations == []
+
+    def test_minimal_diff(self, fake_api):
+        """Test inserts, updates and detail comparisons."""
+        fleet = Fleet()
+        reconciler = Reconciler(fake_api(fleet))
+        plan = reconciler.plan({
+            "tires": [
+                {"tyreCode": "T1", "tyrePattern": "B", "initialTreadDepth": 10},
+                {"tyreCode": "T2", "remark": "spare"},
+                {"tyreCode": "T3", "tyrePattern": "A"},
+            ],
+        })
+        assert plan.summary() == {"update_tire": 1, "add_tire": 1, "unchanged": 1}
+        results = reconciler.apply(plan)
+        assert all(error is None for _, _, error in results)
+        assert sorted(fleet.mutations, key=lambda item: item[0]) == [
+            ("tyre/insert", {"tyreCode": "T3", "tyrePattern": "A"}),
+            ("tyre/update", {"tyreCode": "T1", "tyrePattern": "B", "initialTreadDepth": 10,
+                             "id": 10}),
+        ]
+
+    def test_moves_tyre_and_sensor_in_phases(self, fake_api):
+        """Test that a swap unbinds before it binds."""
+        fleet = Fleet()
+        reconciler = Reconciler(fake_api(fleet))
+        plan = reconciler.plan({
+            "mounts": [{"vehicleId": 1, "tyreCode": "T2", "axleIndex": 1, "wheelIndex": 1,
+                        "sensorCode": "S1"}],
+        })
+        reconciler.apply(plan, workers=1)
+        assert [path for path, _ in fleet.mutations] == [
+            "tyre/sensor/unbind",
+            "vehicle/tyre/unbind",
+            "vehicle/tyre/bind",
+            "tyre/sensor/bind",
+        ]
+        assert fleet.mutations[0][1]["tyreCode"] == "T1"
+        assert fleet.mutations[3][1] == {"tyreCode": "T2", "vehicleId": 1, "axleIndex": 1,
+                                         "wheelIndex": 1, "sensorCode": "S1"}
+
+    def test_moved_tyre_keeps_its_sensor(self, fake_api):
+        """Test that a mount without sensorCode rebinds the tyre's sensor where it moves."""
+        fleet = Fleet()
+        reconciler = Reconciler(fake_api(fleet))
+        plan = reconciler.plan({
+            "mounts": [{"vehicleId": 1, "tyreCode": "T1", "axleIndex": 1, "wheelIndex": 2}],
+        })
+        reconciler.apply(plan, workers=1)
+        assert [path for path, _ in fleet.mutations] == [
+            "tyre/sensor/unbind",
+            "vehicle/tyre/unbind",
+            "vehicle/tyre/bind",
+            "tyre/sensor/bind",
+        ]
+        assert fleet.mutations[3][1] == {"tyreCode": "T1", "vehicleId": 1, "axleIndex": 1,
+                                         "wheelIndex": 2, "sensorCode": "S1"}
+
+    def test_swap_unbinds_each_tyre_once(self, fake_api):
+        """Test that swapping two tyres plans one unbind per tyre, whatever the ID type."""
+        fleet = Fleet()
+        fleet.records["tyre"][1].update(vehicleId=1, axleIndex=1, wheelIndex=2)
+        reconciler = Reconciler(fake_api(fleet))
+        plan = reconciler.plan({
+            "mounts": [
+                {"vehicleId": 1, "tyreCode": "T1", "axleIndex": 1, "wheelIndex": 2},
+                {"vehicleId": "1", "tyreCode": "T2", "axleIndex": 1, "wheelIndex": 1},
+            ],
+        })
+        unbinds = [change.args for change in plan.changes
+                   if change.method == "unbind_tire_from_vehicle"]
+        assert sorted(args["tire_id"] for args in unbinds) == ["T1", "T2"]
+        assert all(args["vehicle_id"] == 1 for args in unbinds)
+
+        reconciler.apply(plan, workers=1)
+        binds = [body for path, body in fleet.mutations if path == "vehicle/tyre/bind"]
+        assert sorted((body["tyreCode"], body["wheelIndex"]) for body in binds) == [
+            ("T1", 2), ("T2", 1),
+        ]
+        assert all(body["vehicleId"] == 1 for body in binds)
+
+    def test_unknown_vehicle_is_unresolved(self, fake_api):
+        """Test that mounts on vehicles without an ID are deferred."""
+        plan = Reconciler(fake_api(Fleet())).plan({
+            "mounts": [{"licensePlateNumber": "NEW1", "tyreCode": "T2", "axleIndex": 1,
+                        "wheelIndex": 2}],
+        })
+        assert plan.summary() == {"unchanged": 0, "unresolved": 1}
@@ -0,0 +1,97 @@
+"""Test the incremental fleet health rollups."""
+
+import json
+import random
+
+import pytest
+
+from alerts import readings_from_tires_info
+from rollups import ROLLUP_FIELDS, FleetRollups, QuantileSketch
+
+
+def tires_info(pressures, brand="8"):
+    return [
+        {"axleIndex": 1, "wheelIndex": index + 1, "tyreCode": f"T{index}",
+         "pressure": pressure, "temperature": 40, "newTreadDepth": "12.5",
+         "tyreBrandId": brand}
+        for index, pressure in enumerate(pressures)
+    ]
+
+
+class TestQuantileSketch:
+    def test_relative_accuracy(self):
+        """Test that quantiles stay within alpha of the exact ones."""
+        generator = random.Random(7)
+        values = [generator.lognormvariate(2, 1) for _ in range(20000)]
+        sketch = QuantileSketch(alpha=0.01)
+        for value in values:
+            sketch.add(value)
+        values.sort()
+        for q in (0.01, 0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+        assert len(sketch.positive) < 1000
+
+    def test_negative_values_and_merge(self):
+        """Test negative temperatures and merging shards."""
+        left, right = QuantileSketch(), QuantileSketch()
+        for value in (-10, -5, 0):
+            left.add(value)
+        for value in (5, 10):
+            right.add(value)
+        left.merge(right)
+        assert left.quantile(0) == pytest.approx(-10, rel=0.01)
+        assert left.quantile(0.5) == 0.0
+        assert left.quantile(1) == pytest.approx(10, rel=0.01)
+        restored = QuantileSketch.from_dict(left.to_dict())
+        assert restored.count == 5 and restored.quantile(0.25) == left.quantile(0.25)
+
+
+class TestFleetRollups:
+    def test_incremental_updates(self):
+        """Test that each batch updates the vehicle, org, brand and fleet rollups."""
+        rollups = FleetRollups()
+        rollups.describe_vehicle(7543, orgId="218")
+        rollups.add(readings_from_tires_info(7543, tires_info([8.0, 9.0]), fields=ROLLUP_FIELDS))
+        rollups.add(readings_from_tires_info(7544, tires_info([7.0], brand="9"),
+                                             fields=ROLLUP_FIELDS))
+
+        vehicle = rollups.get("vehicleId", 7543, "pressure")
+        assert (vehicle.count, vehicle.mean, vehicle.min, vehicle.max) == (2, 8.5, 8.0, 9.0)
+        assert rollups.get("orgId", "218", "pressure").count == 2
+        assert rollups.groups("tyreBrandId") == ["8", "9"]
+        fleet = rollups.get("fleet", None, "pressure").to_dict()
+        assert fleet["count"] == 3 and fleet["p50"] == pytest.approx(8.0, rel=0.01)
+        assert rollups.get("fleet", None, "treadDepth").mean == 12.5
+        assert rollups.snapshot("vehicleId", "temperature")["7544"]["max"] == 40
+
+    def test_missing_values_are_skipped(self):
+        """Test that readings without a metric value do not count for it."""
+        rollups = FleetRollups()
+        rollups.add([{"vehicleId": 1, "pressure": None, "temperature": "n/a"}])
+        assert rollups.get("fleet", None, "pressure") is None
+        assert rollups.snapshot("orgId", "pressure") == {}
+
+    def test_merge(self):
+        """Test that rollups from two shards combine."""
+        left, right = FleetRollups(), FleetRollups()
+        left.add([{"vehicleId": 1, "pressure": 8}])
+        right.add([{"vehicleId": 1, "pressure": 10}, {"vehicleId": 2, "pressure": 6}])
+        left.merge(right)
+        assert left.get("vehicleId", 1, "pressure").mean == 9
+        assert left.get("fleet", None, "pressure").min == 6
+
+    def test_round_trip(self):
+        """Test that rollups saved as JSON restore their summaries and attributes."""
+        rollups = FleetRollups()
+        rollups.describe_vehicle(7543, orgId="218")
+        rollups.add(readings_from_tires_info(7543, tires_info([8.0, 9.0, -1.0, 0.0]),
+                                             fields=ROLLUP_FIELDS))
+        restored = FleetRollups.from_dict(json.loads(json.dumps(rollups.to_dict())))
+
+        for dimension in ("fleet", "orgId", "tyreBrandId"):
+            assert restored.snapshot(dimension, "pressure") == rollups.snapshot(
+                dimension, "pressure"
+            )
+        restored.add([{"vehicleId": 7543, "pressure": 10}])
+        assert restored.get("orgId", "218", "pressure").max == 10
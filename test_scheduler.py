@@ -0,0 +1,103 @@
+"""Test the priority-aware request scheduler."""
+
+import threading
+import time
+
+import pytest
+
+from deadline import Deadline, DeadlineExceeded
+from scheduler import BULK, INTERACTIVE, RequestScheduler, priority
+
+
+def queue_up(scheduler, names, order):
+    """Starts one thread per name that takes a slot and records its class."""
+    def worker(name):
+        with priority(name):
+            with scheduler.slot():
+                order.append(name)
+
+    threads = []
+    for name in names:
+        thread = threading.Thread(target=worker, args=(name,))
+        thread.start()
+        threads.append(thread)
+        # Queue the threads in order.
+        while scheduler.stats()["classes"][name]["queued"] < names[:len(threads)].count(name):
+            time.sleep(0.001)
+    return threads
+
+
+class TestRequestScheduler:
+    def test_interactive_jumps_bulk_queue(self):
+        """Test that an interactive request is served before queued bulk work."""
+        scheduler = RequestScheduler(slots=1)
+        order = []
+        with priority(BULK):
+            scheduler.acquire()
+        threads = queue_up(scheduler, [BULK] * 4 + [INTERACTIVE], order)
+        scheduler.release()
+        for thread in threads:
+            thread.join()
+        assert order[0] == INTERACTIVE
+
+    def test_bulk_still_progresses(self):
+        """Test that bulk work gets its share while interactive calls queue."""
+        scheduler = RequestScheduler(slots=1)
+        order = []
+        with priority(BULK):
+            scheduler.acquire()
+        threads = queue_up(scheduler, [BULK] * 2 + [INTERACTIVE] * 20, order)
+        scheduler.release()
+        for thread in threads:
+            thread.join()
+        # Weights 16:1 give bulk one slot per 16 interactive requests.
+        assert order == [INTERACTIVE, BULK] + [INTERACTIVE] * 16 + [BULK] + [INTERACTIVE] * 3
+
+    def test_reserved_slot(self):
+        """Test that bulk work cannot take the reserved slot."""
+        scheduler = RequestScheduler(slots=2, reserved=1)
+        with priority(BULK):
+            scheduler.acquire()
+        order = []
+        threads = queue_up(scheduler, [BULK], order)
+        with scheduler.slot():
+            assert order == []
+        scheduler.release()
+        threads[0].join()
+        assert order == [BULK]
+
+    def test_deadline_while_queued(self):
+        """Test that queued requests give up when the deadline runs out."""
+        scheduler = RequestScheduler(slots=1)
+        scheduler.acquire()
+        errors = []
+
+        def worker():
+            with Deadline(0.05):
+                try:
+                    scheduler.acquire()
+                except DeadlineExceeded as error:
+                    errors.append(error)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        scheduler.release()
+        assert len(errors) == 1
+        assert scheduler.stats()["classes"][INTERACTIVE]["queued"] == 0
+
+    def test_client_token_refresh_does_not_deadlock(self, fake_api, fake_transport):
+        """Test that the nested authorize call reuses the request's slot."""
+        transport = fake_transport(lambda method, path, params, body: (
+            200, {"data": {"records": []}}))
+        scheduler = RequestScheduler(slots=1, rate=100)
+        api = fake_api(transport=transport, scheduler=scheduler)
+        assert api.get_vehicle_list() == {"records": []}
+        assert scheduler.stats()["classes"][INTERACTIVE]["granted"] == 1
+        assert len(transport.calls) == 2
+
+    def test_unknown_class(self):
+        """Test that unknown priority classes are rejected."""
+        with pytest.raises(ValueError):
+            with priority("urgent"):
+                pass
@@ -0,0 +1,46 @@
+"""Test that the lightweight modules import fast and without heavy dependencies."""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative import time allowed per module, in milliseconds.
+IMPORT_BUDGET_MS = float(os.getenv("SMARTTYRE_IMPORT_BUDGET_MS", "50"))
+
+HEAVY_MODULES = ("requests", "urllib3", "dotenv")
+
+
+def import_profile(module):
+    """Import `module` in a fresh interpreter and return its cumulative
+    import time in milliseconds and the heavy modules it pulled in."""
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    match = re.search(rf"\|\s*(\d+)\s*\|\s*{module}$", result.stderr, re.MULTILINE)
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return int(match.group(1)) / 1000, loaded
+
+
+class TestStartup:
+    @pytest.mark.parametrize("module", ["sign_util", "smarttyre_api", "main"])
+    def test_import_skips_heavy_dependencies(self, module):
+        """Test that importing the module does not load requests or dotenv."""
+        _, loaded = import_profile(module)
+        assert loaded == []
+
+    @pytest.mark.parametrize("module", ["sign_util", "smarttyre_api"])
+    def test_import_time_budget(self, module):
+        """Test that the module imports within the start-up budget."""
+        elapsed_ms, _ = import_profile(module)
+        assert elapsed_ms < IMPORT_BUDGET_MS
@@ -0,0 +1,71 @@
+"""Test the multiprocess fleet sweep engine."""
+
+import functools
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from sweep import shard, sweep
+
+
+def fleet(method, path, params, body):
+    """Fake service with vehicles 1 to 30; every tenth has no tyre data."""
+    if path.endswith("/vehicle/list"):
+        page = int(params["page"][0])
+        size = int(params["pageSize"][0])
+        ids = range(1, 31)[(page - 1) * size:page * size]
+        return 200, {"data": {"records": [{"id": vehicle_id} for vehicle_id in ids],
+                              "total": 30}}
+    vehicle_id = json.loads(body)["vehicleId"]
+    if vehicle_id % 10 == 0:
+        return 500, {}
+    if vehicle_id == 15:
+        raise ConnectionError("Max retries exceeded")
+    return 200, {"data": [{"pressure": 8.0 + vehicle_id / 10, "pid": os.getpid()}]}
+
+
+@pytest.fixture(name="factory")
+def fixture_factory(fake_api):
+    """Client factory for the worker processes, forked with the fake service."""
+    return functools.partial(fake_api, fleet)
+
+
+def pressure_score(vehicle_id, tires_info):
+    return (tires_info[0]["pressure"], float(vehicle_id * 2))
+
+
+def bad_score(vehicle_id, tires_info):
+    return (1.0,)
+
+
+CONTEXT = multiprocessing.get_context("fork")
+
+
+class TestSweep:
+    def test_sweep_merges_all_shards(self, factory):
+        """Test that every vehicle is scored once and failures stay per vehicle."""
+        result = sweep(factory, pressure_score, width=2, processes=3, mp_context=CONTEXT)
+        scores = result.to_dict()
+        assert sorted(result.failed) == [10, 15, 20, 30]
+        assert sorted(scores) == [v for v in range(1, 31) if v % 10 and v != 15]
+        assert scores[7] == pytest.approx((8.7, 14.0))
+
+    def test_explicit_vehicle_ids(self, factory):
+        """Test sweeping a given subset of vehicles."""
+        result = sweep(
+            factory, pressure_score, width=2, vehicle_ids=[3, 4], processes=2, mp_context=CONTEXT
+        )
+        assert sorted(result.vehicle_ids) == [3, 4]
+
+    def test_score_width_is_checked(self, factory):
+        """Test that a score with the wrong width fails loudly."""
+        with pytest.raises(ValueError):
+            sweep(factory, bad_score, width=2, vehicle_ids=[1], processes=1, mp_context=CONTEXT)
+
+    def test_shard_sizes(self):
+        """Test that shards are contiguous and balanced."""
+        assert shard(range(7), 3) == [[0, 1, 2], [3, 4], [5, 6]]
+        assert shard([1, 2], 8) == [[1], [2]]
+        assert not shard([], 4)
@@ -0,0 +1,113 @@
+"""Test the shared access-token stores."""
+
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from token_store import FileTokenStore, MemoryTokenStore
+from transport import FakeTransport
+
+
+def logging_transport(log_path, status_code=200):
+    """Fake service that appends every authorize call to a shared log file."""
+
+    def handler(method, path, params, body):
+        if method == "GET":
+            return status_code, {"data": {"records": []}} if status_code == 200 else {}
+        with open(log_path, "a", encoding="utf-8") as log:
+            log.write(f"{os.getpid()}\n")
+        time.sleep(0.05)
+        return 200, {"data": {"accessToken": f"token-{os.getpid()}"}}
+
+    return FakeTransport(handler)
+
+
+def authorize_calls(log_path):
+    if not os.path.exists(log_path):
+        return 0
+    with open(log_path, encoding="utf-8") as log:
+        return len(log.readlines())
+
+
+def _worker(fake_api, log_path, directory):
+    fake_api(
+        transport=logging_transport(log_path), token_store=FileTokenStore(directory)
+    ).get_vehicle_list()
+
+
+class TestTokenStore:
+    def test_processes_share_one_token(self, tmp_path, fake_api):
+        """Test that concurrent worker processes authorize only once."""
+        log_path = str(tmp_path / "authorize.log")
+        directory = str(tmp_path / "tokens")
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_worker, args=(fake_api, log_path, directory))
+            for _ in range(8)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert [worker.exitcode for worker in workers] == [0] * 8
+        assert authorize_calls(log_path) == 1
+
+    def test_clients_share_memory_store(self, tmp_path, fake_api):
+        """Test that clients of one process reuse the stored token."""
+        log_path = str(tmp_path / "authorize.log")
+        store = MemoryTokenStore()
+        for _ in range(3):
+            fake_api(transport=logging_transport(log_path), token_store=store).get_vehicle_list()
+        assert authorize_calls(log_path) == 1
+
+    def test_rejected_token_is_discarded(self, tmp_path, fake_api):
+        """Test that a rejected token is removed from the store."""
+        log_path = str(tmp_path / "authorize.log")
+        store = FileTokenStore(str(tmp_path / "tokens"))
+        token = f"token-{os.getpid()}"
+        store.save("https://example.test|client", token, time.time() + 60)
+
+        api = fake_api(transport=logging_transport(log_path, 401), token_store=store)
+        assert api.get_vehicle_list() is None
+        assert store.load("https://example.test|client") is None
+        assert api.get_vehicle_list() is None
+        assert authorize_calls(log_path) == 1
+
+    def test_server_errors_keep_token(self, tmp_path, fake_api):
+        """Test that failures other than auth rejections keep the shared token."""
+        log_path = str(tmp_path / "authorize.log")
+        store = FileTokenStore(str(tmp_path / "tokens"))
+        for status_code in (404, 429, 503):
+            api = fake_api(
+                transport=logging_transport(log_path, status_code), token_store=store
+            )
+            assert api.get_vehicle_list() is None
+            assert api.get_vehicle_list() is None
+        assert store.load("https://example.test|client") is not None
+        assert authorize_calls(log_path) == 1
+
+    def test_expired_token_is_ignored(self, tmp_path):
+        """Test that expired entries are not loaded."""
+        store = FileTokenStore(str(tmp_path / "tokens"))
+        store.save("key", "token", time.time() - 1)
+        assert store.load("key") is None
+
+    def test_directory_must_be_private(self, tmp_path):
+        """Test that shared, foreign or symlinked token directories are refused."""
+        shared = tmp_path / "shared"
+        shared.mkdir(mode=0o755)
+        shared.chmod(0o755)
+        with pytest.raises(PermissionError):
+            FileTokenStore(str(shared))
+
+        private = tmp_path / "private"
+        private.mkdir(mode=0o700)
+        link = tmp_path / "link"
+        link.symlink_to(private)
+        with pytest.raises(PermissionError):
+            FileTokenStore(str(link))
+
+        store = FileTokenStore(str(tmp_path / "tokens"))
+        assert os.stat(store.directory).st_mode & 0o777 == 0o700
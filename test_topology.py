@@ -0,0 +1,95 @@
+"""Test the in-memory fleet topology index."""
+
+import json
+
+from topology import FleetIndex
+
+RECORDS = {
+    "/smartyre/openapi/vehicle/list": [
+        {"id": 7543, "tboxCode": "TB-1"},
+        {"id": 7544},
+    ],
+    "/smartyre/openapi/tbox/list": [{"tboxCode": "TB-2", "vehicleId": 7544}],
+    "/smartyre/openapi/tyre/list": [
+        {"tyreCode": "T-1", "vehicleId": 7543, "axleIndex": "1", "wheelIndex": "1",
+         "sensorCode": "S-1"},
+        {"tyreCode": "T-2", "vehicleId": 7543, "axleIndex": 2, "wheelIndex": 3},
+        {"tyreCode": "T-3"},
+    ],
+    "/smartyre/openapi/sensor/list": [{"sensorCode": "S-2", "tyreCode": "T-2"}],
+}
+
+
+def handler(method, path, params, body):
+    if method == "POST":
+        return 200, {"msg": "success", "body": json.loads(body)}
+    records = RECORDS[path]
+    return 200, {"data": {"records": records, "total": len(records)}}
+
+
+class TestFleetIndex:
+    def test_build_answers_lookups_both_ways(self, fake_api):
+        """Test that list records are indexed in every direction."""
+        index = FleetIndex.build(fake_api(handler))
+        assert index.tyre_at(7543, 1, 1) == "T-1"
+        assert index.sensor_at("7543", "2", "3") == "S-2"
+        assert index.position_of_tyre("T-2") == ("7543", 2, 3)
+        assert index.vehicle_of_sensor("S-1") == "7543"
+        assert index.tyre_of_sensor("S-2") == "T-2"
+        assert index.vehicle_of_tyre("T-3") is None
+        assert index.tyres_on_vehicle(7543) == {(1, 1): "T-1", (2, 3): "T-2"}
+        assert index.tbox_of_vehicle(7543) == "TB-1"
+        assert index.vehicle_of_tbox("TB-2") == "7544"
+
+    def test_attached_index_follows_binds(self, fake_api):
+        """Test that successful binds and unbinds update the index."""
+        api = fake_api(handler)
+        index = FleetIndex.build(api)
+        index.attach(api)
+
+        api.bind_tire_to_vehicle(7544, "T-3", 1, 2)
+        api.bind_sensor_to_tire("T-3", 7544, 1, 2, "S-3")
+        assert index.sensor_at(7544, 1, 2) == "S-3"
+        assert index.vehicle_of_sensor("S-3") == "7544"
+
+        api.unbind_sensor_from_tire("T-3", 7544, 1, 2, "S-3")
+        api.unbind_tire_from_vehicle(7543, "T-1")
+        assert index.sensor_of_tyre("T-3") is None
+        assert index.tyre_at(7543, 1, 1) is None
+        assert index.sensor_of_tyre("T-1") == "S-1"
+
+        index.detach(api)
+        api.bind_tire_to_vehicle(7543, "T-1", 1, 1)
+        assert index.tyre_at(7543, 1, 1) is None
+
+    def test_failed_calls_are_ignored(self, fake_api):
+        """Test that rejected mutations leave the index unchanged."""
+        api = fake_api(lambda method, path, params, body: (500, {}))
+        index = FleetIndex()
+        index.attach(api)
+        assert api.bind_tire_to_vehicle(7543, "T-1", 1, 1) is None
+        assert index.tyre_at(7543, 1, 1) is None
+
+    def test_failing_listener_is_contained(self, fake_api, caplog):
+        """Test that a raising listener neither fails the mutation nor others."""
+        api = fake_api(handler)
+        index = FleetIndex()
+
+        def broken(event, details):
+            raise RuntimeError("listener bug")
+
+        api.add_listener(broken)
+        index.attach(api)
+        assert api.bind_tire_to_vehicle(7543, "T-1", 1, 1) is not None
+        assert index.tyre_at(7543, 1, 1) == "T-1"
+        assert "listener bug" in caplog.text
+
+    def test_mount_replaces_position(self):
+        """Test that mounting over an occupied position moves the old tyre off."""
+        index = FleetIndex()
+        index.mount(1, "A", 1, 1)
+        index.mount(1, "B", 1, 1)
+        index.mount(2, "B", 1, 1)
+        assert index.vehicle_of_tyre("A") is None
+        assert index.tyre_at(1, 1, 1) is None
+        assert index.tyre_at(2, 1, 1) == "B"
@@ -0,0 +1,74 @@
+"""Test the pluggable transports."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from transport import RequestsTransport, Urllib3Transport, new_transport
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Local stand-in answering with the request it received."""
+
+    def _answer(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        url = urlsplit(self.path)
+        self._answer({"data": {"path": url.path, "params": parse_qs(url.query)}})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+        if self.path.endswith("/authorize"):
+            self._answer({"data": {"accessToken": "token"}})
+        else:
+            self._answer({"data": {"body": json.loads(body)}})
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(name="base_url", scope="module")
+def fixture_base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestTransports:
+    @pytest.mark.parametrize("name", ["requests", "urllib3"])
+    def test_network_transports(self, base_url, name, fake_api):
+        """Test that both network transports send params and bodies alike."""
+        api = fake_api(transport=name, base_url=base_url)
+        assert api.get_vehicle_info(7543) == {
+            "path": "/smartyre/openapi/vehicle/detail",
+            "params": {"vehicleId": ["7543"]},
+        }
+        assert api.get_tires_info_by_vehicle(7543) == {"body": {"vehicleId": 7543}}
+        assert isinstance(api.transport, (RequestsTransport, Urllib3Transport))
+
+    def test_fake_transport(self, fake_api, fake_transport):
+        """Test the in-process fake transport."""
+        transport = fake_transport(lambda method, path, params, body: (404, {}))
+        assert fake_api(transport=transport).get_tire_brands() is None
+        assert [call[:2] for call in transport.calls] == [
+            ("POST", "/smartyre/openapi/auth/oauth20/authorize"),
+            ("GET", "/smartyre/openapi/tyre/brand/all"),
+        ]
+        assert transport.headers[1]["accessToken"] == "token"
+
+    def test_unknown_transport(self):
+        """Test that unknown transport names are rejected."""
+        with pytest.raises(ValueError):
+            new_transport("carrier-pigeon")
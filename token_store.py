@@ -0,0 +1,164 @@
+"""Access-token stores shared between SmartTyreAPI instances.
+
+By default each `SmartTyreAPI` caches its token in memory. Passing a store as
+`token_store` lets several clients reuse one token per client ID:
+`MemoryTokenStore` shares it inside a process and `FileTokenStore` across
+every worker process on a host. Refreshes are serialized through the store's
+lock, so only one client authorizes while the others wait and reuse its token.
+
+Example:
+    ```python
+    store = FileTokenStore()
+    api = SmartTyreAPI(base_url, client_id, client_secret, sign_key, token_store=store)
+    ```
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+def default_token_directory():
+    """Per-user directory in the runtime dir, or in the temp dir."""
+    directory = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"smarttyre-tokens-{os.getuid()}")
+
+
+def private_directory(path):
+    """
+    Creates `path` readable by the current user only, or checks that an
+    existing one is.
+
+    Shared temp dirs let anyone pre-create a predictable name, so an existing
+    directory must be a real directory, not a symlink, owned by this user
+    with mode 0700.
+
+    Returns:
+        The path.
+
+    Raises:
+        PermissionError: If the directory is not private to this user.
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or stat.S_IMODE(info.st_mode) != 0o700
+    ):
+        raise PermissionError(
+            f"{path} must be a directory owned by the current user with mode 0700"
+        )
+    return path
+
+
+class MemoryTokenStore:
+    """
+    Shares tokens between the clients of one process.
+    """
+
+    def __init__(self):
+        self._tokens = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def load(self, key):
+        """Returns `(token, expires_at)` for a valid token, otherwise None.
+        `expires_at` is a `time.time()` timestamp."""
+        entry = self._tokens.get(key)
+        if entry and entry[1] > time.time():
+            return entry
+        return None
+
+    def save(self, key, token, expires_at):
+        """Stores a token valid until the `time.time()` timestamp `expires_at`."""
+        self._tokens[key] = (token, expires_at)
+
+    def discard(self, key, token):
+        """Forgets the stored token if it is still `token`."""
+        with self._guard:
+            if self._tokens.get(key, (None,))[0] == token:
+                del self._tokens[key]
+
+    @contextmanager
+    def lock(self, key):
+        """Holds the refresh lock for `key`."""
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+
+
+class FileTokenStore:
+    """
+    Shares tokens between the processes of a host through small files guarded
+    by `flock` locks. Files are readable by their owner only.
+    """
+
+    def __init__(self, directory=None):
+        """
+        Initializes the store.
+
+        Args:
+            directory (str): Where the token files live. Defaults to
+                `default_token_directory()`.
+
+        Raises:
+            PermissionError: If the directory is not private to this user.
+        """
+        self.directory = private_directory(directory or default_token_directory())
+
+    def _path(self, key, suffix):
+        name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{name}{suffix}")
+
+    def load(self, key):
+        """Returns `(token, expires_at)` for a valid token, otherwise None.
+        `expires_at` is a `time.time()` timestamp."""
+        try:
+            with open(self._path(key, ".json"), encoding="utf-8") as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if entry.get("token") and entry.get("expires_at", 0) > time.time():
+            return entry["token"], entry["expires_at"]
+        return None
+
+    def save(self, key, token, expires_at):
+        """Atomically stores a token valid until the `time.time()` timestamp `expires_at`."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump({"token": token, "expires_at": expires_at}, file)
+            os.replace(temp_path, self._path(key, ".json"))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def discard(self, key, token):
+        """Forgets the stored token if it is still `token`."""
+        with self.lock(key):
+            entry = self.load(key)
+            if entry and entry[0] == token:
+                os.unlink(self._path(key, ".json"))
+
+    @contextmanager
+    def lock(self, key):
+        """Holds the cross-process refresh lock for `key`."""
+        import fcntl  # pylint: disable=import-outside-toplevel
+
+        fd = os.open(self._path(key, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
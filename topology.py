@@ -0,0 +1,259 @@
+"""In-memory fleet topology index.
+
+Answers questions such as "which sensor is on vehicle X, axle 2, wheel 3" or
+"which vehicle is tyre code Y mounted on" with dict lookups instead of API
+calls. The index covers vehicle -> axle/wheel position -> tyre -> sensor and
+vehicle <-> TBox, in every direction, and follows successful
+`bind_tire_to_vehicle`, `unbind_tire_from_vehicle`, `bind_sensor_to_tire`
+and `unbind_sensor_from_tire` calls made through an attached client.
+
+Example:
+    ```python
+    index = FleetIndex.build(api)
+    index.attach(api)
+    index.sensor_at(7543, 2, 3)
+    index.vehicle_of_tyre("ABC123")
+    ```
+
+IDs and codes are stored as strings and axle/wheel indexes as ints, so
+lookups accept either form.
+"""
+
+import threading
+
+# Index field -> field name in the API list records.
+TYRE_FIELDS = {
+    "code": "tyreCode",
+    "vehicle_id": "vehicleId",
+    "axle": "axleIndex",
+    "wheel": "wheelIndex",
+    "sensor_code": "sensorCode",
+}
+SENSOR_FIELDS = {"code": "sensorCode", "tyre_code": "tyreCode"}
+VEHICLE_FIELDS = {"id": "id", "tbox_code": "tboxCode"}
+TBOX_FIELDS = {"code": "tboxCode", "vehicle_id": "vehicleId"}
+
+
+def _id(value):
+    return None if value in (None, "") else str(value)
+
+
+def _index(value):
+    return None if value in (None, "") else int(value)
+
+
+class FleetIndex:
+    """
+    Bidirectional vehicle/position/tyre/sensor/TBox lookups.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tyre_at = {}  # (vehicle, axle, wheel) -> tyre code
+        self._position_of_tyre = {}  # tyre code -> (vehicle, axle, wheel)
+        self._positions = {}  # vehicle -> {(axle, wheel): tyre code}
+        self._sensor_of_tyre = {}  # tyre code -> sensor code
+        self._tyre_of_sensor = {}  # sensor code -> tyre code
+        self._tbox_of_vehicle = {}  # vehicle -> tbox code
+        self._vehicle_of_tbox = {}  # tbox code -> vehicle
+        self._vehicles = set()
+
+    # Building
+
+    @classmethod
+    def build(cls, api, page_size=100):
+        """
+        Builds the index from the vehicle, tyre, sensor and TBox list endpoints.
+
+        Args:
+            api (SmartTyreAPI): The client to read from.
+            page_size (int): Records requested per page.
+        """
+        index = cls()
+        for record in api.iter_records(api.get_vehicle_list, page_size=page_size):
+            index.add_vehicle_record(record)
+        for record in api.iter_records(api.get_tboxes_list, page_size=page_size):
+            index.add_tbox_record(record)
+        for record in api.iter_records(api.get_tire_list, page_size=page_size):
+            index.add_tyre_record(record)
+        for record in api.iter_records(api.get_sensor_list, page_size=page_size):
+            index.add_sensor_record(record)
+        return index
+
+    def add_vehicle_record(self, record, fields=VEHICLE_FIELDS):
+        """Indexes a vehicle list/detail record."""
+        vehicle = _id(record.get(fields["id"]))
+        if vehicle is None:
+            return
+        with self._lock:
+            self._vehicles.add(vehicle)
+            tbox = _id(record.get(fields["tbox_code"]))
+            if tbox is not None:
+                self.link_tbox(vehicle, tbox)
+
+    def add_tbox_record(self, record, fields=TBOX_FIELDS):
+        """Indexes a TBox list/detail record."""
+        tbox = _id(record.get(fields["code"]))
+        vehicle = _id(record.get(fields["vehicle_id"]))
+        if tbox is not None and vehicle is not None:
+            self.link_tbox(vehicle, tbox)
+
+    def add_tyre_record(self, record, fields=TYRE_FIELDS):
+        """Indexes a tyre list/detail record, with its position and sensor."""
+        code = _id(record.get(fields["code"]))
+        if code is None:
+            return
+        vehicle = _id(record.get(fields["vehicle_id"]))
+        axle = _index(record.get(fields["axle"]))
+        wheel = _index(record.get(fields["wheel"]))
+        with self._lock:
+            if vehicle is not None and axle is not None and wheel is not None:
+                self.mount(vehicle, code, axle, wheel)
+            sensor = _id(record.get(fields["sensor_code"]))
+            if sensor is not None:
+                self.link_sensor(code, sensor)
+
+    def add_sensor_record(self, record, fields=SENSOR_FIELDS):
+        """Indexes a sensor list/detail record."""
+        sensor = _id(record.get(fields["code"]))
+        tyre = _id(record.get(fields["tyre_code"]))
+        if sensor is not None and tyre is not None:
+            self.link_sensor(tyre, sensor)
+
+    # Mutations
+
+    def mount(self, vehicle_id, tyre_code, axle_index, wheel_index):
+        """Records a tyre mounted at a vehicle position, replacing what was there."""
+        vehicle, tyre = _id(vehicle_id), _id(tyre_code)
+        position = (vehicle, _index(axle_index), _index(wheel_index))
+        with self._lock:
+            self.unmount(tyre)
+            previous = self._tyre_at.get(position)
+            if previous is not None:
+                self.unmount(previous)
+            self._vehicles.add(vehicle)
+            self._tyre_at[position] = tyre
+            self._position_of_tyre[tyre] = position
+            self._positions.setdefault(vehicle, {})[position[1:]] = tyre
+
+    def unmount(self, tyre_code):
+        """Records a tyre taken off its vehicle. Its sensor stays linked."""
+        tyre = _id(tyre_code)
+        with self._lock:
+            position = self._position_of_tyre.pop(tyre, None)
+            if position is None:
+                return
+            self._tyre_at.pop(position, None)
+            wheels = self._positions.get(position[0])
+            if wheels is not None:
+                wheels.pop(position[1:], None)
+
+    def link_sensor(self, tyre_code, sensor_code):
+        """Records a sensor fitted in a tyre, replacing previous links of both."""
+        tyre, sensor = _id(tyre_code), _id(sensor_code)
+        with self._lock:
+            self.unlink_sensor(sensor)
+            previous = self._sensor_of_tyre.get(tyre)
+            if previous is not None:
+                self.unlink_sensor(previous)
+            self._sensor_of_tyre[tyre] = sensor
+            self._tyre_of_sensor[sensor] = tyre
+
+    def unlink_sensor(self, sensor_code):
+        """Records a sensor removed from its tyre."""
+        sensor = _id(sensor_code)
+        with self._lock:
+            tyre = self._tyre_of_sensor.pop(sensor, None)
+            if tyre is not None and self._sensor_of_tyre.get(tyre) == sensor:
+                del self._sensor_of_tyre[tyre]
+
+    def link_tbox(self, vehicle_id, tbox_code):
+        """Records a TBox installed in a vehicle, replacing previous links of both."""
+        vehicle, tbox = _id(vehicle_id), _id(tbox_code)
+        with self._lock:
+            old_vehicle = self._vehicle_of_tbox.pop(tbox, None)
+            if old_vehicle is not None:
+                self._tbox_of_vehicle.pop(old_vehicle, None)
+            old_tbox = self._tbox_of_vehicle.pop(vehicle, None)
+            if old_tbox is not None:
+                self._vehicle_of_tbox.pop(old_tbox, None)
+            self._tbox_of_vehicle[vehicle] = tbox
+            self._vehicle_of_tbox[tbox] = vehicle
+
+    # Client integration
+
+    def attach(self, api):
+        """Keeps the index in sync with binds and unbinds made through `api`."""
+        api.add_listener(self.apply)
+
+    def detach(self, api):
+        """Stops following `api`."""
+        api.remove_listener(self.apply)
+
+    def apply(self, event, details):
+        """Applies a `SmartTyreAPI` mutation event (see `add_listener`)."""
+        if event == "bind_tire_to_vehicle":
+            self.mount(details["vehicle_id"], details["tire_code"],
+                       details["axle_index"], details["wheel_index"])
+        elif event == "unbind_tire_from_vehicle":
+            # The API sends this argument as the tyre code.
+            self.unmount(details["tire_id"])
+        elif event == "bind_sensor_to_tire":
+            with self._lock:
+                self.mount(details["vehicle_id"], details["tire_code"],
+                           details["axle_index"], details["wheel_index"])
+                self.link_sensor(details["tire_code"], details["sensor_code"])
+        elif event == "unbind_sensor_from_tire":
+            self.unlink_sensor(details["sensor_code"])
+
+    # Lookups
+
+    def tyre_at(self, vehicle_id, axle_index, wheel_index):
+        """The tyre code mounted at a position, or None."""
+        return self._tyre_at.get((_id(vehicle_id), _index(axle_index), _index(wheel_index)))
+
+    def sensor_at(self, vehicle_id, axle_index, wheel_index):
+        """The sensor code at a position, or None."""
+        return self._sensor_of_tyre.get(self.tyre_at(vehicle_id, axle_index, wheel_index))
+
+    def position_of_tyre(self, tyre_code):
+        """`(vehicle_id, axle_index, wheel_index)` of a tyre, or None."""
+        return self._position_of_tyre.get(_id(tyre_code))
+
+    def vehicle_of_tyre(self, tyre_code):
+        """The vehicle a tyre is mounted on, or None."""
+        position = self.position_of_tyre(tyre_code)
+        return position[0] if position else None
+
+    def sensor_of_tyre(self, tyre_code):
+        """The sensor code fitted in a tyre, or None."""
+        return self._sensor_of_tyre.get(_id(tyre_code))
+
+    def tyre_of_sensor(self, sensor_code):
+        """The tyre code a sensor is fitted in, or None."""
+        return self._tyre_of_sensor.get(_id(sensor_code))
+
+    def position_of_sensor(self, sensor_code):
+        """`(vehicle_id, axle_index, wheel_index)` of a sensor, or None."""
+        return self._position_of_tyre.get(self.tyre_of_sensor(sensor_code))
+
+    def vehicle_of_sensor(self, sensor_code):
+        """The vehicle a sensor is on, or None."""
+        position = self.position_of_sensor(sensor_code)
+        return position[0] if position else None
+
+    def tyres_on_vehicle(self, vehicle_id):
+        """`{(axle_index, wheel_index): tyre code}` for a vehicle."""
+        return dict(self._positions.get(_id(vehicle_id), {}))
+
+    def tbox_of_vehicle(self, vehicle_id):
+        """The TBox code installed in a vehicle, or None."""
+        return self._tbox_of_vehicle.get(_id(vehicle_id))
+
+    def vehicle_of_tbox(self, tbox_code):
+        """The vehicle a TBox is installed in, or None."""
+        return self._vehicle_of_tbox.get(_id(tbox_code))
+
+    def vehicles(self):
+        """Every vehicle ID seen."""
+        return set(self._vehicles)
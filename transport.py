@@ -0,0 +1,174 @@
+"""HTTP transports for the SmartTyre API client.
+
+`SmartTyreAPI` sends every request through a transport: any object with
+requests-style `get(url, headers=..., params=..., timeout=...)` and
+`post(url, headers=..., data=..., timeout=...)` methods returning an object
+with `status_code` and `json()`. The `requests` module, a `requests.Session`
+and a `cassette.Cassette` already qualify; this module adds:
+
+- `RequestsTransport`: a pooled `requests.Session`.
+- `Urllib3Transport`: a raw `urllib3.PoolManager`, skipping requests' overhead.
+- `FakeTransport`: an in-process fake answering from a handler, for tests.
+
+Transports can also be chosen by name, e.g. from deployment configuration:
+
+Example:
+    ```python
+    api = SmartTyreAPI(base_url, client_id, client_secret, sign_key,
+                       transport="urllib3")
+    ```
+
+The client methods are synchronous; asyncio code can call them through
+`asyncio.to_thread` on top of any of these transports.
+"""
+
+import json
+import threading
+from urllib.parse import urlencode, urlsplit
+
+
+class Response:
+    """Minimal `requests.Response` stand-in returned by the transports."""
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        """Decode the body as JSON."""
+        return json.loads(self.text)
+
+
+class RequestsTransport:
+    """
+    Sends requests through one pooled `requests.Session`.
+    """
+
+    def __init__(self, pool_maxsize=10, session=None):
+        """
+        Initializes the transport.
+
+        Args:
+            pool_maxsize (int): Connections kept open per host.
+            session: Optional existing `requests.Session` to use.
+        """
+        # pylint: disable=import-outside-toplevel
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        self.session = session
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        """Sends a GET request."""
+        return self.session.get(url, headers=headers, params=params, timeout=timeout)
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        """Sends a POST request."""
+        return self.session.post(url, headers=headers, data=data, timeout=timeout)
+
+    def close(self):
+        """Closes the pooled connections."""
+        self.session.close()
+
+
+class Urllib3Transport:
+    """
+    Sends requests through a `urllib3.PoolManager`, without the requests layer.
+    """
+
+    def __init__(self, pool_maxsize=10, retries=False):
+        """
+        Initializes the transport.
+
+        Args:
+            pool_maxsize (int): Connections kept open per host.
+            retries: urllib3 retry configuration. Disabled by default, like requests.
+        """
+        import urllib3  # pylint: disable=import-outside-toplevel
+
+        self._urllib3 = urllib3
+        self.pool = urllib3.PoolManager(maxsize=pool_maxsize, retries=retries)
+
+    def _request(self, method, url, headers, body, timeout):
+        response = self.pool.request(
+            method,
+            url,
+            headers=headers,
+            body=body.encode("utf-8") if isinstance(body, str) else body,
+            timeout=self._urllib3.Timeout(total=timeout) if timeout else None,
+        )
+        return Response(response.status, response.data.decode("utf-8"))
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        """Sends a GET request; list values are sent as repeated parameters."""
+        if params:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(params, doseq=True)}"
+        return self._request("GET", url, headers, None, timeout)
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        """Sends a POST request."""
+        return self._request("POST", url, headers, data, timeout)
+
+    def close(self):
+        """Closes the pooled connections."""
+        self.pool.clear()
+
+
+class FakeTransport:
+    """
+    In-process transport answering from a handler, for tests and benchmarks.
+
+    The handler is called as `handler(method, path, params, body)` and returns
+    `(status_code, payload)`; the payload is serialized as the JSON body.
+    Every call is recorded in `calls` as `(method, path, params, body)`, and
+    its headers at the same index of `headers`.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+        self.headers = []
+        self._lock = threading.Lock()
+
+    def _request(self, method, url, headers, params, body):
+        path = urlsplit(url).path
+        with self._lock:
+            self.calls.append((method, path, params, body))
+            self.headers.append(dict(headers or {}))
+        status_code, payload = self.handler(method, path, params, body)
+        return Response(status_code, json.dumps(payload))
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        """Answers a GET request from the handler."""
+        return self._request("GET", url, headers, params or {}, None)
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        """Answers a POST request from the handler."""
+        return self._request("POST", url, headers, {}, data)
+
+
+TRANSPORTS = {
+    "requests": RequestsTransport,
+    "urllib3": Urllib3Transport,
+}
+
+
+def new_transport(name, **kwargs):
+    """
+    Builds a transport by name.
+
+    Args:
+        name (str): "requests" or "urllib3".
+        **kwargs: Passed to the transport constructor.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown transport {name!r}, expected one of {sorted(TRANSPORTS)}")
+    return TRANSPORTS[name](**kwargs)